@@ -1,12 +1,19 @@
 from typing import Any
 from uuid import UUID
 
-from fastapi import APIRouter, BackgroundTasks, Depends, Query, Request, Response, status
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, Query, Request, UploadFile, status
+from fastapi.responses import RedirectResponse, StreamingResponse
 
+from app.cache import Cache, get_cache, get_seller_profile_cache, get_token_cache
 from app.core.config import settings
-from app.middlewares.auth import SellerCheck
+from app.middlewares.auth import SellerCheck, api_key_auth
 from app.middlewares.request_info import set_request_info
-from app.models.fields_extensions_models import ProductStatusForChange
+from app.models.fields_extensions_models import (
+    DocumentDelivery,
+    ProductStatusForChange,
+    UploadedFileInDB,
+    UploadedFileKind,
+)
 from app.models.products_models import (
     ProductBrandInDB,
     ProductCategoryInDB,
@@ -16,7 +23,15 @@ from app.models.products_models import (
     ProductSizeInDB,
 )
 from app.schemas.categories_schemas import ProductCategory
-from app.schemas.fields_extensions_schemas import ProductBrand, ProductColor, ProductPrice, ProductSize
+from app.schemas.fields_extensions_schemas import (
+    DocumentUrl,
+    ProductBrand,
+    ProductColor,
+    ProductPrice,
+    ProductSize,
+    TokenRevocation,
+    UploadedFile,
+)
 from app.schemas.products_schemas import (
     ProductCreate,
     ProductPagination,
@@ -55,11 +70,85 @@ seller_check = SellerCheck()
     ],
 )
 async def create_product(
-    request: Request, product: ProductCreate, service: Service = Depends(dependency=get_service)
+    request: Request,
+    product: ProductCreate,
+    background_tasks: BackgroundTasks,
+    service: Service = Depends(dependency=get_service),
 ) -> ProductInDB:
     return await service.create_product(
         seller_id=getattr(request, "seller_id"),
         product=product,
+        background_tasks=background_tasks,
+    )
+
+
+@router.get(
+    path="/products/images/{image_id}/{width:int}x{height:int}.{image_format}",
+    status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+    name="product:get_image_variant",
+    tags=["Товар продавца"],
+    summary="Товар продавца: получить изображение заданного размера",
+    operation_id="product:get_image_variant",
+    response_class=RedirectResponse,
+)
+async def get_image_variant(
+    image_id: UUID,
+    width: int,
+    height: int,
+    image_format: str,
+    request: Request,
+    service: Service = Depends(dependency=get_service),
+) -> RedirectResponse:
+    return await service.get_image_variant(
+        image_id=image_id,
+        width=width,
+        height=height,
+        image_format=image_format,
+        client_host=request.client.host if request.client else None,
+    )
+
+
+@router.post(
+    path="/products/upload-image",
+    status_code=status.HTTP_201_CREATED,
+    name="product:upload_image",
+    tags=["Товар продавца"],
+    summary="Товар продавца: загрузить изображение",
+    operation_id="product:upload_image",
+    response_model=UploadedFile,
+    dependencies=[
+        Depends(seller_check),
+    ],
+)
+async def upload_image(
+    request: Request, file: UploadFile, service: Service = Depends(dependency=get_service)
+) -> UploadedFileInDB:
+    return await service.upload_file(
+        seller_id=getattr(request, "seller_id"),
+        kind=UploadedFileKind.image,
+        file=file,
+    )
+
+
+@router.post(
+    path="/products/upload-document",
+    status_code=status.HTTP_201_CREATED,
+    name="product:upload_document",
+    tags=["Товар продавца"],
+    summary="Товар продавца: загрузить документ",
+    operation_id="product:upload_document",
+    response_model=UploadedFile,
+    dependencies=[
+        Depends(seller_check),
+    ],
+)
+async def upload_document(
+    request: Request, file: UploadFile, service: Service = Depends(dependency=get_service)
+) -> UploadedFileInDB:
+    return await service.upload_file(
+        seller_id=getattr(request, "seller_id"),
+        kind=UploadedFileKind.document,
+        file=file,
     )
 
 
@@ -208,12 +297,17 @@ async def get_all(
     ],
 )
 async def update(
-    request: Request, product_id: UUID, product: ProductUpdate, service: Service = Depends(dependency=get_service)
+    request: Request,
+    product_id: UUID,
+    product: ProductUpdate,
+    background_tasks: BackgroundTasks,
+    service: Service = Depends(dependency=get_service),
 ) -> ProductInDB:
     return await service.edit(
         seller_id=getattr(request, "seller_id"),
         product_id=product_id,
         product=product,
+        background_tasks=background_tasks,
     )
 
 
@@ -224,6 +318,7 @@ async def update(
     tags=["Товар продавца"],
     summary="Товар продавца: получить документ",
     operation_id="product:get_document",
+    response_model=None,
     dependencies=[
         Depends(seller_check),
     ],
@@ -231,11 +326,18 @@ async def update(
 async def get_document(
     document_id: UUID,
     request: Request,
+    delivery: DocumentDelivery = Query(
+        default=DocumentDelivery.stream,
+        description="stream — файл через сервис, redirect — 307 на подписанную ссылку, url — подписанная ссылка в JSON",
+    ),
+    byte_range: str | None = Header(default=None, alias="Range"),
     service: Service = Depends(dependency=get_service),
-) -> Response:
+) -> StreamingResponse | RedirectResponse | DocumentUrl:
     return await service.get_document(
         document_id=document_id,
         seller_id=getattr(request, "seller_id"),
+        byte_range=byte_range,
+        delivery=delivery,
     )
 
 
@@ -343,3 +445,43 @@ async def change_product_status(
         product_id=product_id,
         product_status=product_status,
     )
+
+
+@router.post(
+    path="/auth/revoke-token",
+    status_code=status.HTTP_204_NO_CONTENT,
+    name="auth:revoke_token",
+    tags=["Авторизация"],
+    summary="Авторизация: отозвать токен продавца из кэша проверенных токенов",
+    operation_id="auth:revoke_token",
+    dependencies=[
+        Depends(api_key_auth),
+    ],
+)
+async def revoke_token(
+    token_revocation: TokenRevocation,
+    cache: Cache = Depends(dependency=get_cache),
+) -> None:
+    await get_token_cache().revoke(
+        cache=cache,
+        token=token_revocation.token,
+        seller_id=str(token_revocation.seller_id) if token_revocation.seller_id else None,
+    )
+
+
+@router.delete(
+    path="/sellers/{seller_id}/cache",
+    status_code=status.HTTP_204_NO_CONTENT,
+    name="sellers:invalidate_cache",
+    tags=["Продавцы"],
+    summary="Продавцы: удалить данные продавца из кэша продавцов",
+    operation_id="sellers:invalidate_cache",
+    dependencies=[
+        Depends(api_key_auth),
+    ],
+)
+async def invalidate_seller_cache(
+    seller_id: UUID,
+    cache: Cache = Depends(dependency=get_cache),
+) -> None:
+    await get_seller_profile_cache().invalidate(cache=cache, seller_id=str(seller_id))
@@ -1,6 +1,15 @@
 __all__ = (
     "Cache",
+    "RateLimiter",
+    "SellerProfileCache",
+    "TokenCache",
     "get_cache",
+    "get_image_variant_rate_limiter",
+    "get_seller_profile_cache",
+    "get_token_cache",
 )
 
 from app.cache.cache import Cache, get_cache
+from app.cache.rate_limit import RateLimiter, get_image_variant_rate_limiter
+from app.cache.sellers import SellerProfileCache, get_seller_profile_cache
+from app.cache.tokens import TokenCache, get_token_cache
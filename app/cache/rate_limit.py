@@ -0,0 +1,42 @@
+from logging import error
+from time import time
+
+from app.cache.cache import Cache
+from app.core.config import settings
+
+
+class RateLimiter:
+    """Ограничение частоты действий по ключу: не больше limit за окно window секунд.
+
+    Счётчики окон хранятся в Redis и общие для всех воркеров. Ошибки Redis не прерывают запрос:
+    действие разрешается.
+    """
+
+    def __init__(self, prefix: str, limit: int, window: int) -> None:
+        self.prefix: str = prefix
+        self.limit: int = limit
+        self.window: int = window
+
+    async def hit(self, cache: Cache, key: str) -> bool:
+        """Учитывает действие по ключу. Отдаёт False, если лимит текущего окна исчерпан."""
+        window_key = f"{self.prefix}:{key}:{int(time() // self.window)}"
+        try:
+            async with cache.redis.pipeline(transaction=True) as pipeline:
+                pipeline.incr(window_key)
+                pipeline.expire(window_key, self.window)
+                count, _ = await pipeline.execute()
+        except Exception as err:
+            error(f"Ограничение частоты: ошибка Redis: {err}")
+            return True
+        return int(count) <= self.limit
+
+
+image_variant_rate_limiter: RateLimiter = RateLimiter(
+    prefix="image_variant_rate",
+    limit=settings.image_settings.variant_rate_limit,
+    window=settings.image_settings.variant_rate_window,
+)
+
+
+def get_image_variant_rate_limiter() -> RateLimiter:
+    return image_variant_rate_limiter
@@ -0,0 +1,81 @@
+import asyncio
+import json
+from logging import error
+from time import time
+from typing import Any, Awaitable, Callable
+
+from app.cache.cache import Cache
+from app.core.config import settings
+from app.http_client import SingleFlight
+
+
+class SellerProfileCache:
+    """Кэш данных продавцов в Redis по seller_id с отдачей устаревших данных (stale-while-revalidate).
+
+    Данные моложе fresh_ttl секунд отдаются как есть. Более старые отдаются сразу, а в фоне
+    запускается их обновление: одно на продавца во всём сервисе (блокировка в Redis на refresh_timeout секунд).
+    Через ttl секунд данные удаляются из Redis, и следующий запрос ждёт ответа сервиса продавцов.
+    Ошибки фонового обновления и Redis не прерывают запрос: остаются прежние данные до истечения ttl.
+    """
+
+    def __init__(self, fresh_ttl: int, ttl: int, refresh_timeout: int) -> None:
+        self.fresh_ttl: int = fresh_ttl
+        self.ttl: int = ttl
+        self.refresh_timeout: int = refresh_timeout
+        self.single_flight: SingleFlight = SingleFlight()
+        self.refresh_tasks: dict[str, asyncio.Task] = {}
+
+    async def get(self, cache: Cache, seller_id: str, fetch: Callable[[], Awaitable[dict[str, Any]]]) -> dict[str, Any]:
+        """Отдаёт данные продавца из кэша или от fetch, если их нет в кэше."""
+        try:
+            entry = await cache.get_value(f"seller_profile:{seller_id}")
+        except Exception as err:
+            error(f"Кэш продавцов: ошибка чтения из Redis: {err}")
+            entry = None
+        if entry:
+            entry = json.loads(entry)
+            if time() - entry["fetched_at"] >= self.fresh_ttl:
+                self._refresh_later(cache, seller_id, fetch)
+            return entry["data"]
+        # Одновременные запросы данных одного продавца в воркере ждут один ответ сервиса продавцов.
+        return await self.single_flight.do(seller_id, lambda: self._fetch_and_add(cache, seller_id, fetch))
+
+    async def invalidate(self, cache: Cache, seller_id: str) -> None:
+        """Удаляет данные продавца из кэша: следующий запрос получит их от сервиса продавцов."""
+        await cache.redis.delete(f"seller_profile:{seller_id}", f"seller_profile_refresh:{seller_id}")
+
+    async def _fetch_and_add(
+        self, cache: Cache, seller_id: str, fetch: Callable[[], Awaitable[dict[str, Any]]]
+    ) -> dict[str, Any]:
+        data = await fetch()
+        try:
+            await cache.set_value(
+                f"seller_profile:{seller_id}", json.dumps({"fetched_at": time(), "data": data}), expire=self.ttl
+            )
+        except Exception as err:
+            error(f"Кэш продавцов: ошибка записи в Redis: {err}")
+        return data
+
+    def _refresh_later(self, cache: Cache, seller_id: str, fetch: Callable[[], Awaitable[dict[str, Any]]]) -> None:
+        if seller_id not in self.refresh_tasks:
+            task = asyncio.create_task(self._refresh(cache, seller_id, fetch))
+            self.refresh_tasks[seller_id] = task
+            task.add_done_callback(lambda _: self.refresh_tasks.pop(seller_id, None))
+
+    async def _refresh(self, cache: Cache, seller_id: str, fetch: Callable[[], Awaitable[dict[str, Any]]]) -> None:
+        try:
+            if await cache.redis.set(f"seller_profile_refresh:{seller_id}", 1, nx=True, ex=self.refresh_timeout):
+                await self._fetch_and_add(cache, seller_id, fetch)
+        except Exception as err:
+            error(f"Кэш продавцов: не удалось обновить данные продавца {seller_id}: {err}")
+
+
+seller_profile_cache: SellerProfileCache = SellerProfileCache(
+    fresh_ttl=settings.ecom_settings.seller_cache_fresh_ttl,
+    ttl=settings.ecom_settings.seller_cache_ttl,
+    refresh_timeout=settings.ecom_settings.seller_cache_refresh_timeout,
+)
+
+
+def get_seller_profile_cache() -> SellerProfileCache:
+    return seller_profile_cache
@@ -0,0 +1,104 @@
+from collections import OrderedDict
+from hashlib import sha256
+from logging import error
+from time import monotonic
+
+from app.cache.cache import Cache
+from app.core.config import settings
+
+
+class TokenCache:
+    """Двухуровневый кэш проверенных токенов продавцов: sha256 токена -> seller_id.
+
+    Первый уровень — LRU в памяти воркера на max_size токенов с TTL local_ttl, второй — Redis с TTL ttl,
+    общий для всех воркеров. Сами токены не хранятся, только их хэши.
+    revoke удаляет токен (или все токены продавца) из Redis и из памяти текущего воркера;
+    другие воркеры перестают принимать токен не позже чем через local_ttl.
+    Ошибки Redis не прерывают запрос: токен проверяется сервисом авторизации.
+    """
+
+    def __init__(self, ttl: int, local_ttl: int, max_size: int) -> None:
+        self.ttl: int = ttl
+        self.local_ttl: int = local_ttl
+        self.max_size: int = max_size
+        self.local: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    @staticmethod
+    def _get_token_hash(token: str) -> str:
+        return sha256(token.encode()).hexdigest()
+
+    def _get_local(self, token_hash: str) -> str | None:
+        if (entry := self.local.get(token_hash)) is None:
+            return None
+        expires_at, seller_id = entry
+        if expires_at < monotonic():
+            del self.local[token_hash]
+            return None
+        self.local.move_to_end(token_hash)
+        return seller_id
+
+    def _set_local(self, token_hash: str, seller_id: str) -> None:
+        self.local[token_hash] = (monotonic() + self.local_ttl, seller_id)
+        self.local.move_to_end(token_hash)
+        while len(self.local) > self.max_size:
+            self.local.popitem(last=False)
+
+    async def get(self, cache: Cache, token: str) -> str | None:
+        """Отдаёт seller_id проверенного токена или None, если токена нет в кэше."""
+        token_hash = self._get_token_hash(token)
+        if seller_id := self._get_local(token_hash):
+            return seller_id
+        try:
+            seller_id = await cache.get_value(f"seller_token:{token_hash}")
+        except Exception as err:
+            error(f"Кэш токенов: ошибка чтения из Redis: {err}")
+            return None
+        if not seller_id:
+            return None
+        seller_id = seller_id.decode() if isinstance(seller_id, bytes) else seller_id
+        self._set_local(token_hash, seller_id)
+        return seller_id
+
+    async def add(self, cache: Cache, token: str, seller_id: str) -> None:
+        """Сохраняет seller_id проверенного токена."""
+        token_hash = self._get_token_hash(token)
+        self._set_local(token_hash, seller_id)
+        try:
+            async with cache.redis.pipeline(transaction=False) as pipeline:
+                pipeline.set(f"seller_token:{token_hash}", seller_id, ex=self.ttl)
+                # Хэши токенов продавца для отзыва всех его токенов.
+                pipeline.sadd(f"seller_tokens:{seller_id}", token_hash)
+                pipeline.expire(f"seller_tokens:{seller_id}", self.ttl)
+                await pipeline.execute()
+        except Exception as err:
+            error(f"Кэш токенов: ошибка записи в Redis: {err}")
+
+    async def revoke(self, cache: Cache, token: str | None = None, seller_id: str | None = None) -> None:
+        """Удаляет из кэша токен и/или все токены продавца seller_id."""
+        token_hashes = set()
+        if token is not None:
+            token_hashes.add(self._get_token_hash(token))
+        if seller_id is not None:
+            token_hashes.update(
+                token_hash for token_hash, (_, local_seller_id) in self.local.items() if local_seller_id == seller_id
+            )
+            token_hashes.update(
+                token_hash.decode() if isinstance(token_hash, bytes) else token_hash
+                for token_hash in await cache.redis.smembers(f"seller_tokens:{seller_id}")
+            )
+            await cache.del_value(f"seller_tokens:{seller_id}")
+        for token_hash in token_hashes:
+            self.local.pop(token_hash, None)
+        if token_hashes:
+            await cache.redis.delete(*(f"seller_token:{token_hash}" for token_hash in token_hashes))
+
+
+token_cache: TokenCache = TokenCache(
+    ttl=settings.auth_settings.token_cache_ttl,
+    local_ttl=settings.auth_settings.token_cache_local_ttl,
+    max_size=settings.auth_settings.token_cache_size,
+)
+
+
+def get_token_cache() -> TokenCache:
+    return token_cache
@@ -1,7 +1,7 @@
 from multiprocessing import cpu_count
 
 from dotenv import load_dotenv
-from pydantic import ValidationInfo, field_validator
+from pydantic import Field, ValidationInfo, field_validator
 from pydantic.networks import PostgresDsn, RedisDsn
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -180,9 +180,45 @@ class ECOMSettings(Base):
     seller_check_url: str = ""
     seller_data_url: str = ""
     product_storage_amount_url: str = ""
+    # Общий HTTP-клиент воркера: пул keep-alive соединений и таймауты, секунд.
+    http2: bool = False
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    max_connections_per_host: int = 50
+    keepalive_expiry: float = 30
+    timeout: float = 10
+    connect_timeout: float = 5
+    # Общий срок ожидания, секунд, данных о продавце и складе для отправки товара в ETL.
+    etl_deadline: float = 15
+    # Данные продавцов кэшируются в Redis на seller_cache_ttl секунд. Данные старше seller_cache_fresh_ttl
+    # отдаются сразу и обновляются в фоне; фоновое обновление продавца запускается не чаще
+    # чем раз в seller_cache_refresh_timeout секунд.
+    seller_cache_fresh_ttl: int = 300
+    seller_cache_ttl: int = 86400
+    seller_cache_refresh_timeout: int = 30
     model_config = SettingsConfigDict(env_prefix="ECOM_")
 
 
+class AuthSettings(Base):
+    # Проверенные токены продавцов кэшируются в Redis на token_cache_ttl секунд и в памяти воркера
+    # на token_cache_local_ttl секунд (не больше token_cache_size токенов). Отозванный токен другие
+    # воркеры перестают принимать не позже чем через token_cache_local_ttl.
+    token_cache_ttl: int = 300
+    token_cache_local_ttl: int = 30
+    token_cache_size: int = 10000
+    # Подпись и срок действия токенов проверяются локально ключом APP_SECRET_KEY по алгоритму APP_ALGORITM,
+    # а ID пользователя, телефон и ID продавца берутся из claims. Токены без нужных claims проверяются
+    # в сервисе авторизации, если включён remote_fallback, иначе отклоняются.
+    local_jwt: bool = False
+    remote_fallback: bool = True
+    user_id_claim: str = "user_id"
+    phone_claim: str = "phone"
+    seller_id_claim: str = "seller_id"
+    # Допустимое расхождение часов при проверке срока действия токена, секунд.
+    leeway: float = 30
+    model_config = SettingsConfigDict(env_prefix="AUTH_")
+
+
 class S3Settings(Base):
     url: str = "0.0.0.0"
     region: str | None = None
@@ -190,15 +226,132 @@ class S3Settings(Base):
     secret_key: str | None = None
     bucket_private: str | None = None
     bucket_public: str | None = None
+    executor_size: int = 16
+    request_window: int = 4
+    download_chunk_size: int = 1024 * 1024
+    presigned_url_expires: int = 300
+    multipart_threshold: int = 8 * 1024 * 1024
+    multipart_chunksize: int = 8 * 1024 * 1024
+    multipart_concurrency: int = 4
+    # Пул соединений boto3: каждый поток executor_size может вести multipart_concurrency частей одновременно,
+    # поэтому соединений не меньше executor_size * multipart_concurrency (это и значение по умолчанию).
+    max_pool_connections: int | None = Field(default=None, validate_default=True)
+    # Каталог для хранения файлов на диске вместо s3 (разработка, нагрузочные тесты).
+    local_folder: str | None = None
     model_config = SettingsConfigDict(env_prefix="S3_")
 
-
+    @field_validator("max_pool_connections", mode="before")
+    @classmethod
+    def build_max_pool_connections(
+        cls,
+        value: int | str | None,
+        info: ValidationInfo,
+    ) -> int:
+        min_pool_connections = info.data["executor_size"] * info.data["multipart_concurrency"]
+        if value is None or value == "":
+            return min_pool_connections
+        if int(value) < min_pool_connections:
+            raise ValueError(
+                f"max_pool_connections must be at least executor_size * multipart_concurrency ({min_pool_connections})"
+            )
+        return int(value)
+
+
+class ImageSettings(Base):
+    pool_size: int = 2
+    queue_size: int = 32
+    # Сколько изображений одного запроса одновременно обрабатывается и загружается: буферы миниатюр
+    # держатся в памяти только для них, поэтому пиковая память запроса не растёт с числом изображений.
+    request_window: int = 2
+    # Миниатюры создаются в фоне после ответа, синхронно загружается только оригинал.
+    deferred_thumbnails: bool = False
+    # Лимиты проверяются по заголовку изображения до его декодирования.
+    max_dimension: int = 10000
+    max_pixels: int = 50_000_000
+    max_frames: int = 1
+    # Допустимые ширина и высота вариантов, создаваемых по запросу, и их наибольшее число на одно изображение:
+    # каждый вариант — это ресайз в пуле процессов и постоянный файл в хранилище.
+    variant_sizes: list[int] = [64, 128, 256, 380, 512, 680, 1024, 1280, 1600, 2000]
+    max_variants_per_image: int = 20
+    # Сколько новых вариантов может запросить один клиент за variant_rate_window секунд.
+    variant_rate_limit: int = 30
+    variant_rate_window: int = 60
+    model_config = SettingsConfigDict(env_prefix="IMAGE_")
+
+
+class UploadSettings(Base):
+    # Наибольший размер, байт, файлов продавцов, загружаемых через upload-image и upload-document.
+    # Тело запроса больше лимита прерывается с 413 ещё во время чтения.
+    max_image_size: int = 20 * 1024 * 1024
+    max_document_size: int = 50 * 1024 * 1024
+    model_config = SettingsConfigDict(env_prefix="UPLOAD_")
+
+
+class StorageGCSettings(Base):
+    # Интервалы, секунд, между проходами очистки очереди storage_gc и сверки хранилища с БД.
+    drain_interval: float = 10
+    reconcile_interval: float = 3600
+    # Не больше 1000: ограничение delete_objects.
+    batch_size: int = 1000
+    # Файлы моложе grace_period при сверке не трогаются: запись о них может быть ещё не зафиксирована.
+    grace_period: float = 86400
+    # Через сколько секунд удаляются файлы продавцов, так и не привязанные к товару.
+    uploaded_file_ttl: float = 86400
+    model_config = SettingsConfigDict(env_prefix="STORAGE_GC_")
+
+
+upload_content_types = {
+    "image": ("image/jpeg", "image/png"),
+    "document": ("image/jpeg", "application/pdf"),
+}
+# Сигнатуры в начале файла: тип загруженного файла определяется по содержимому, а не по заголовку клиента.
+upload_signatures = {
+    b"\xff\xd8\xff": "image/jpeg",
+    b"\x89PNG\r\n\x1a\n": "image/png",
+    b"%PDF-": "application/pdf",
+}
+# Запас на заголовки частей multipart сверх размера самого файла.
+multipart_overhead = 64 * 1024
 default_image_url = "https://s3.timeweb.cloud/48111b17-8a18978c-3998-45e6-a5d4-3d47d3e3cc72/default.svg"
 image_sizes = {
     "preview_url": (680, 680),
     "mini_url": (64, 64),
     "small_url": (380, 380),
 }
+image_webp_fields = {
+    "preview_url": "preview_webp_url",
+    "mini_url": "mini_webp_url",
+    "small_url": "small_webp_url",
+}
+image_encoding_profiles = {
+    "preview_url": {
+        "JPEG": {"quality": 85, "optimize": True, "progressive": True},
+        "PNG": {"optimize": True},
+        "WEBP": {"quality": 80, "method": 4},
+    },
+    "mini_url": {
+        "JPEG": {"quality": 75, "optimize": True},
+        "PNG": {"optimize": True},
+        "WEBP": {"quality": 70, "method": 4},
+    },
+    "small_url": {
+        "JPEG": {"quality": 80, "optimize": True, "progressive": True},
+        "PNG": {"optimize": True},
+        "WEBP": {"quality": 75, "method": 4},
+    },
+}
+image_variant_formats = {
+    "jpeg": "JPEG",
+    "png": "PNG",
+    "webp": "WEBP",
+}
+image_variant_encoding_profiles = {
+    "JPEG": {"quality": 85, "optimize": True, "progressive": True},
+    "PNG": {"optimize": True},
+    "WEBP": {"quality": 80, "method": 4},
+}
+# Cache-Control файлов с ключами из отпечатка содержимого: по такому ключу файл никогда не меняется.
+immutable_cache_control = "public, max-age=31536000, immutable"
 
 
 class Settings(BaseSettings):
@@ -206,7 +359,11 @@ class Settings(BaseSettings):
     postgres_settings: PostgresSettings = PostgresSettings()
     mq_settings: MQSettings = MQSettings()
     ecom_settings: ECOMSettings = ECOMSettings()
+    auth_settings: AuthSettings = AuthSettings()
     s3_settings: S3Settings = S3Settings()
+    image_settings: ImageSettings = ImageSettings()
+    upload_settings: UploadSettings = UploadSettings()
+    storage_gc_settings: StorageGCSettings = StorageGCSettings()
     redis_settings: RedisSettings = RedisSettings()
 
 
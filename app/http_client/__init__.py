@@ -0,0 +1,8 @@
+__all__ = (
+    "HTTPClient",
+    "SingleFlight",
+    "get_http_client",
+)
+
+from app.http_client.client import HTTPClient, get_http_client
+from app.http_client.single_flight import SingleFlight
@@ -0,0 +1,95 @@
+import asyncio
+from collections import defaultdict
+
+from httpx import AsyncClient, Limits, Request, Response, Timeout
+
+from app.core.config import settings
+from app.http_client.single_flight import SingleFlight
+
+# Методы, одинаковые одновременные запросы которых по умолчанию выполняются один раз.
+COALESCED_METHODS = frozenset({"GET", "HEAD"})
+
+
+class HTTPClient:
+    """Долгоживущий HTTP-клиент воркера для запросов к сервисам авторизации, продавцов и складов.
+
+    Клиент создаётся один раз (при старте приложения или при первом обращении) и держит пул
+    keep-alive соединений: TCP- и TLS-рукопожатия не повторяются на каждый запрос.
+    Одновременных запросов к одному хосту не больше max_connections_per_host, остальные ждут
+    освобождения соединения. HTTP/2 включается через http2 и требует пакета h2 (httpx[http2]).
+    Одновременные одинаковые запросы (метод, URL, заголовки и тело) объединяются через SingleFlight:
+    например, десяток параллельных запросов кабинета продавца с одним токеном проверяет его один раз.
+    """
+
+    def __init__(
+        self,
+        http2: bool,
+        max_connections: int,
+        max_keepalive_connections: int,
+        max_connections_per_host: int,
+        keepalive_expiry: float,
+        timeout: float,
+        connect_timeout: float,
+    ) -> None:
+        self.http2: bool = http2
+        self.limits: Limits = Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout: Timeout = Timeout(timeout, connect=connect_timeout)
+        self.max_connections_per_host: int = max_connections_per_host
+        self.host_slots: defaultdict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(self.max_connections_per_host)
+        )
+        self.single_flight: SingleFlight = SingleFlight()
+        self._client: AsyncClient | None = None
+
+    @property
+    def client(self) -> AsyncClient:
+        if self._client is None:
+            self._client = AsyncClient(http2=self.http2, limits=self.limits, timeout=self.timeout)
+        return self._client
+
+    def start(self) -> None:
+        self.client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose()
+
+    async def send(self, request: Request, coalesce: bool | None = None) -> Response:
+        """Отправляет запрос через общий пул соединений.
+
+        coalesce — объединять ли запрос с одновременными одинаковыми запросами. По умолчанию объединяются
+        GET и HEAD; для POST, которые только читают данные, передаётся coalesce=True.
+        Объединённые запросы получают один и тот же объект ответа.
+        """
+        if coalesce is None:
+            coalesce = request.method in COALESCED_METHODS
+        if not coalesce:
+            return await self._send(request)
+        key = (request.method, str(request.url), tuple(sorted(request.headers.multi_items())), request.content)
+        return await self.single_flight.do(key, lambda: self._send(request))
+
+    async def _send(self, request: Request) -> Response:
+        # Таймауты клиента AsyncClient.send не применяет к запросам, собранным без build_request.
+        request.extensions.setdefault("timeout", self.timeout.as_dict())
+        async with self.host_slots[request.url.host]:
+            return await self.client.send(request)
+
+
+http_client: HTTPClient = HTTPClient(
+    http2=settings.ecom_settings.http2,
+    max_connections=settings.ecom_settings.max_connections,
+    max_keepalive_connections=settings.ecom_settings.max_keepalive_connections,
+    max_connections_per_host=settings.ecom_settings.max_connections_per_host,
+    keepalive_expiry=settings.ecom_settings.keepalive_expiry,
+    timeout=settings.ecom_settings.timeout,
+    connect_timeout=settings.ecom_settings.connect_timeout,
+)
+
+
+def get_http_client() -> HTTPClient:
+    return http_client
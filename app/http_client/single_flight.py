@@ -0,0 +1,28 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """Объединяет одновременные одинаковые вызовы: пока вызов с ключом key выполняется,
+    остальные вызовы с тем же ключом ждут его результат (или исключение), а не выполняются заново.
+
+    Вызов выполняется в отдельной задаче: отмена одного из ожидающих не отменяет вызов для остальных.
+    Результат не кэшируется — следующий вызов после завершения выполняется снова.
+    """
+
+    def __init__(self) -> None:
+        self.calls: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        if (task := self.calls.get(key)) is None:
+            task = asyncio.ensure_future(func())
+            self.calls[key] = task
+            task.add_done_callback(lambda done_task: self._forget(key, done_task))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self.calls.get(key) is task:
+            del self.calls[key]
+        # Исключение забирается здесь, даже если все ожидающие вызова были отменены.
+        if not task.cancelled():
+            task.exception()
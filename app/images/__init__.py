@@ -0,0 +1,13 @@
+__all__ = (
+    "ImageHeader",
+    "ImageValidationError",
+    "Thumbnail",
+    "ThumbnailEngine",
+    "ThumbnailResult",
+    "get_thumbnail_engine",
+    "validate_image",
+)
+
+from app.images.engine import ThumbnailEngine, get_thumbnail_engine
+from app.images.processing import Thumbnail, ThumbnailResult
+from app.images.validation import ImageHeader, ImageValidationError, validate_image
@@ -0,0 +1,96 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from logging import info
+from multiprocessing import get_context
+from time import perf_counter
+
+from app.core.config import (
+    image_encoding_profiles,
+    image_sizes,
+    image_variant_encoding_profiles,
+    image_webp_fields,
+    settings,
+)
+from app.images.processing import Thumbnail, ThumbnailResult, create_thumbnails, create_variant, get_content_hash
+
+
+class ThumbnailEngine:
+    """Создание миниатюр изображений в пуле процессов.
+
+    CPU-ёмкая работа Pillow выносится из event loop. Количество изображений,
+    находящихся в обработке и в очереди пула, ограничено pool_size + queue_size:
+    остальные запросы ждут освобождения места.
+    """
+
+    def __init__(self, pool_size: int, queue_size: int) -> None:
+        self.pool_size: int = pool_size
+        self.queue_size: int = queue_size
+        self.executor: ProcessPoolExecutor | None = None
+        self.slots: asyncio.Semaphore = asyncio.Semaphore(pool_size + queue_size)
+
+    def start(self) -> None:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.pool_size,
+                mp_context=get_context("spawn"),
+            )
+
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    def get_content_hash(self, image: bytes) -> str:
+        """Ключ вариантов изображения: одинаковые байты с одинаковыми профилями дают одинаковые миниатюры."""
+        return get_content_hash(image, image_sizes, image_encoding_profiles, image_webp_fields)
+
+    def get_variant_profile_hash(self, image_format: str) -> str:
+        """Отпечаток профиля кодирования вариантов: после смены профиля варианты получают новые ключи."""
+        return get_content_hash(b"", image_format, image_variant_encoding_profiles.get(image_format, {}))[:12]
+
+    async def create_thumbnails(self, image: bytes) -> ThumbnailResult:
+        """Создаёт миниатюры изображения для всех image_sizes, включая WebP-варианты."""
+        self.start()
+        queued_at = perf_counter()
+        async with self.slots:
+            queue_wait_time = perf_counter() - queued_at
+            result: ThumbnailResult = await asyncio.get_running_loop().run_in_executor(
+                self.executor,
+                create_thumbnails,
+                image,
+                image_sizes,
+                image_encoding_profiles,
+                image_webp_fields,
+            )
+        result.queue_wait_time = queue_wait_time
+        info(
+            f"Thumbnails: format={result.image_format} bytes={len(image)}"
+            f" queue_wait={result.queue_wait_time:.3f}s process={result.process_time:.3f}s"
+        )
+        return result
+
+    async def create_variant(self, image: bytes, size_value: tuple[int, int], image_format: str) -> Thumbnail:
+        """Создаёт вариант изображения произвольного размера и формата."""
+        self.start()
+        async with self.slots:
+            started = perf_counter()
+            thumbnail: Thumbnail = await asyncio.get_running_loop().run_in_executor(
+                self.executor,
+                create_variant,
+                image,
+                size_value,
+                image_format,
+                image_variant_encoding_profiles.get(image_format, {}),
+            )
+        info(f"Variant: size={size_value} format={image_format} time={perf_counter() - started:.3f}s")
+        return thumbnail
+
+
+thumbnail_engine: ThumbnailEngine = ThumbnailEngine(
+    pool_size=settings.image_settings.pool_size,
+    queue_size=settings.image_settings.queue_size,
+)
+
+
+def get_thumbnail_engine() -> ThumbnailEngine:
+    return thumbnail_engine
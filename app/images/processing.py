@@ -0,0 +1,137 @@
+import json
+from dataclasses import dataclass, field
+from hashlib import sha256
+from io import BytesIO
+from time import perf_counter
+from typing import Any
+
+from PIL import Image, ImageOps
+from PIL.Image import Image as OpenImage
+
+
+@dataclass
+class Thumbnail:
+    """Закодированная миниатюра изображения."""
+
+    image_format: str
+    content: bytes
+
+
+@dataclass
+class ThumbnailResult:
+    """Результат создания миниатюр изображения.
+
+    thumbnails: миниатюры по именам полей ProductImageInDB (preview_url, preview_webp_url, ...).
+    """
+
+    image_format: str
+    thumbnails: dict[str, Thumbnail]
+    process_time: float
+    queue_wait_time: float = field(default=0.0)
+
+
+def get_content_hash(image: bytes, *profiles: Any) -> str:
+    """Хэш исходных байт изображения и параметров, с которыми из него создаются миниатюры."""
+    content_hash = sha256(image)
+    content_hash.update(json.dumps(profiles, sort_keys=True).encode())
+    return content_hash.hexdigest()
+
+
+def _get_thumbnail_width(source_size: tuple[int, int], size_value: tuple[int, int]) -> int:
+    """Ширина, которую получит исходное изображение после thumbnail(size_value)."""
+    width, height = source_size
+    scale = min(size_value[0] / width, size_value[1] / height, 1)
+    return max(round(width * scale), 1)
+
+
+def _resize(
+    intermediates: list[OpenImage],
+    source_size: tuple[int, int],
+    size_value: tuple[int, int],
+) -> OpenImage:
+    """Уменьшает наименьшее из подходящих промежуточных изображений до size_value."""
+    target_width = _get_thumbnail_width(source_size, size_value)
+    intermediate = min(
+        (image for image in intermediates if image.width >= target_width),
+        key=lambda image: image.width,
+    )
+    image_resize = intermediate.copy()
+    image_resize.thumbnail(size_value)
+    return image_resize
+
+
+def _encode(image: OpenImage, image_format: str, encoding_profile: dict[str, Any]) -> Thumbnail:
+    """Кодирует изображение в формат с параметрами профиля. EXIF не сохраняется."""
+    if image_format == "WEBP" and image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+    elif image_format == "JPEG" and image.mode not in ("RGB", "L", "CMYK"):
+        image = image.convert("RGB")
+    in_mem_resize_image = BytesIO()
+    image.save(
+        in_mem_resize_image,
+        format=image_format,
+        icc_profile=image.info.get("icc_profile"),
+        **encoding_profile,
+    )
+    return Thumbnail(image_format=image_format, content=in_mem_resize_image.getvalue())
+
+
+def create_thumbnails(
+    image: bytes,
+    sizes: dict[str, tuple[int, int]],
+    encoding_profiles: dict[str, dict[str, dict[str, Any]]],
+    webp_fields: dict[str, str],
+) -> ThumbnailResult:
+    """Создаёт миниатюры изображения для всех размеров.
+
+    Изображение декодируется один раз: для JPEG через draft() сразу в уменьшенном
+    масштабе, достаточном для наибольшего размера. Размеры обрабатываются от большего
+    к меньшему, и каждый получается из наименьшего подходящего промежуточного изображения.
+    Каждый размер кодируется в исходном формате и, если для него задано поле в webp_fields,
+    дополнительно в WebP, с параметрами из encoding_profiles.
+    Выполняется в дочернем процессе, поэтому принимает и возвращает только байты.
+    """
+    started = perf_counter()
+    source = Image.open(BytesIO(image))
+    image_format = source.format
+    largest_size = max(sizes.values(), key=lambda size_value: size_value[0] * size_value[1])
+    source.draft(source.mode, largest_size)
+    # Ориентация из EXIF применяется к пикселям, так как сами EXIF-данные в миниатюры не переносятся.
+    ImageOps.exif_transpose(source, in_place=True)
+    source_size = source.size
+
+    intermediates = [source]
+    thumbnails = {}
+    for size_title, size_value in sorted(
+        sizes.items(),
+        key=lambda item: _get_thumbnail_width(source_size, item[1]),
+        reverse=True,
+    ):
+        image_resize = _resize(intermediates, source_size, size_value)
+        intermediates.append(image_resize)
+        encoding_profile = encoding_profiles.get(size_title, {})
+        thumbnails[size_title] = _encode(image_resize, image_format, encoding_profile.get(image_format, {}))
+        if webp_field := webp_fields.get(size_title):
+            thumbnails[webp_field] = _encode(image_resize, "WEBP", encoding_profile.get("WEBP", {}))
+    return ThumbnailResult(
+        image_format=image_format,
+        thumbnails=thumbnails,
+        process_time=perf_counter() - started,
+    )
+
+
+def create_variant(
+    image: bytes,
+    size_value: tuple[int, int],
+    image_format: str,
+    encoding_profile: dict[str, Any],
+) -> Thumbnail:
+    """Создаёт один вариант изображения произвольного размера и формата.
+
+    Как и create_thumbnails, выполняется в дочернем процессе.
+    """
+    source = Image.open(BytesIO(image))
+    source.draft(source.mode, size_value)
+    ImageOps.exif_transpose(source, in_place=True)
+    source.thumbnail(size_value)
+    return _encode(source, image_format, encoding_profile)
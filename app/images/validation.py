@@ -0,0 +1,80 @@
+import warnings
+from dataclasses import dataclass
+from io import BytesIO
+from typing import BinaryIO
+
+from PIL import Image, UnidentifiedImageError
+
+from app.core.config import settings
+
+# Сигнатуры в начале файла для форматов, которые принимаются к обработке.
+image_signatures = {
+    b"\xff\xd8\xff": "JPEG",
+    b"\x89PNG\r\n\x1a\n": "PNG",
+}
+signature_length = max(len(signature) for signature in image_signatures)
+
+
+class ImageValidationError(ValueError):
+    """Изображение не прошло проверку заголовка."""
+
+
+@dataclass
+class ImageHeader:
+    """Сведения из заголовка изображения."""
+
+    image_format: str
+    width: int
+    height: int
+    frames: int
+
+
+def sniff_image_format(prefix: bytes) -> str:
+    """Определяет формат изображения по первым байтам."""
+    for signature, image_format in image_signatures.items():
+        if prefix.startswith(signature):
+            return image_format
+    raise ImageValidationError("unsupported image format")
+
+
+def read_image_header(image: bytes | BinaryIO) -> ImageHeader:
+    """Читает формат, размеры и количество кадров изображения без декодирования пикселей.
+
+    Pillow при открытии читает только заголовок, пиксели декодируются при первом обращении к ним.
+    Файловый объект после чтения возвращается в начало.
+    """
+    file = BytesIO(image) if isinstance(image, bytes) else image
+    position = file.tell()
+    image_format = sniff_image_format(file.read(signature_length))
+    file.seek(position)
+    try:
+        with warnings.catch_warnings():
+            # Размеры проверяются ниже по своим лимитам, предупреждение Pillow здесь не нужно.
+            warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+            with Image.open(file, formats=(image_format,)) as source:
+                header = ImageHeader(
+                    image_format=image_format,
+                    width=source.width,
+                    height=source.height,
+                    frames=getattr(source, "n_frames", 1),
+                )
+    except Image.DecompressionBombError:
+        raise ImageValidationError("the image has too many pixels")
+    except (UnidentifiedImageError, OSError, SyntaxError):
+        raise ImageValidationError("the image header is damaged")
+    finally:
+        file.seek(position)
+    return header
+
+
+def validate_image(image: bytes | BinaryIO) -> ImageHeader:
+    """Проверяет заголовок изображения по лимитам IMAGE_* до полного декодирования."""
+    header = read_image_header(image)
+    image_settings = settings.image_settings
+    if max(header.width, header.height) > image_settings.max_dimension:
+        raise ImageValidationError(f"the image side must not exceed {image_settings.max_dimension} pixels")
+    if header.width * header.height > image_settings.max_pixels:
+        raise ImageValidationError(f"the image must not exceed {image_settings.max_pixels} pixels")
+    if header.frames > image_settings.max_frames:
+        raise ImageValidationError(f"the image must not have more than {image_settings.max_frames} frames")
+    return header
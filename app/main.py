@@ -14,8 +14,11 @@ from app.api.v3.api import routers as v3_routers
 from app.core.config import settings
 from app.core.logger import get_logging_config
 from app.db import close_connection, get_session, init_db
+from app.http_client import HTTPClient, get_http_client
+from app.images import ThumbnailEngine, get_thumbnail_engine
 from app.middlewares import middleware
 from app.mq import RabbitMQ, get_rabbitmq
+from app.storage import StorageBackend, StorageGarbageCollector, get_storage, get_storage_gc
 
 IS_DEBUG: bool = settings.app_settings.is_debug or False
 LOG_LEVEL: str = settings.app_settings.log_level or "INFO"
@@ -83,15 +86,31 @@ async def unicorn_exception_handler(
 
 async def startup() -> None:
     rabbitmq: RabbitMQ = get_rabbitmq()
+    thumbnail_engine: ThumbnailEngine = get_thumbnail_engine()
+    storage: StorageBackend = get_storage()
+    storage_gc: StorageGarbageCollector = get_storage_gc()
+    http_client: HTTPClient = get_http_client()
 
     await init_db()
     await rabbitmq.connect()
+    thumbnail_engine.start()
+    storage.start()
+    storage_gc.start()
+    http_client.start()
 
 
 async def shutdown() -> None:
     rabbitmq: RabbitMQ = get_rabbitmq()
+    thumbnail_engine: ThumbnailEngine = get_thumbnail_engine()
+    storage: StorageBackend = get_storage()
+    storage_gc: StorageGarbageCollector = get_storage_gc()
+    http_client: HTTPClient = get_http_client()
 
     await rabbitmq.close_connections()
+    thumbnail_engine.shutdown()
+    await storage_gc.shutdown()
+    storage.close()
+    await http_client.close()
     await close_connection()
 
 
@@ -1,14 +1,23 @@
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.gzip import GZipMiddleware
 from msgpack_asgi import MessagePackMiddleware
 from starlette.middleware import Middleware
 
+from app.core.config import multipart_overhead, settings
+from app.middlewares.body_size_limit import BodySizeLimitMiddleware
+from app.middlewares.gzip import SelectiveGZipMiddleware
 from app.middlewares.http_log import HTTPLogMiddleware
 
 middleware = [
     Middleware(
         HTTPLogMiddleware,
     ),
+    Middleware(
+        BodySizeLimitMiddleware,
+        max_sizes={
+            "/products/upload-image": settings.upload_settings.max_image_size + multipart_overhead,
+            "/products/upload-document": settings.upload_settings.max_document_size + multipart_overhead,
+        },
+    ),
     Middleware(
         CORSMiddleware,
         allow_methods=["*"],
@@ -17,8 +26,9 @@ middleware = [
         allow_credentials=True,
     ),
     Middleware(
-        GZipMiddleware,
+        SelectiveGZipMiddleware,
         minimum_size=50,
+        exclude_paths=[r"/products/get-document/[^/]+$"],
     ),
     Middleware(
         MessagePackMiddleware,
@@ -1,15 +1,18 @@
 from logging import error
 from typing import Any
 
-from fastapi import status
+from fastapi import Depends, status
 from fastapi.exceptions import HTTPException
 from fastapi.param_functions import Security
 from fastapi.requests import Request as IncomingRequest
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from fastapi.security.api_key import APIKeyHeader
-from httpx import AsyncClient, Request, Response
+from httpx import Request, Response
 
+from app.cache import Cache, get_cache, get_token_cache
 from app.core.config import settings
+from app.http_client import get_http_client
+from app.middlewares.jwt import JWTError, decode_jwt
 
 
 def api_key_auth(
@@ -26,6 +29,29 @@ def api_key_auth(
         )
 
 
+def get_local_claims(token: str, *claim_names: str) -> dict[str, Any] | None:
+    """Проверяет токен локально (AUTH_LOCAL_JWT) и отдаёт значения claim_names из его claims.
+
+    None — токен нужно проверить в сервисе авторизации: локальная проверка выключена
+    или в токене нет нужных claims при включённом AUTH_REMOTE_FALLBACK.
+    Недействительный токен и токен без нужных claims без remote_fallback поднимают JWTError.
+    """
+    auth_settings = settings.auth_settings
+    if not auth_settings.local_jwt:
+        return None
+    claims = decode_jwt(
+        token,
+        secret_key=settings.app_settings.secret_key,
+        algorithm=settings.app_settings.algoritm,
+        leeway=auth_settings.leeway,
+    )
+    if all(claims.get(claim_name) for claim_name in claim_names):
+        return {claim_name: claims[claim_name] for claim_name in claim_names}
+    if auth_settings.remote_fallback:
+        return None
+    raise JWTError(f"в токене нет {', '.join(claim_names)}")
+
+
 class JWTBearer(HTTPBearer):
     def __init__(
         self,
@@ -76,28 +102,32 @@ class JWTBearer(HTTPBearer):
     async def verify_jwt(self, token: str, request: IncomingRequest) -> bool:
 
         try:
-            async with AsyncClient() as client:
-                response: Response = await client.send(
-                    request=Request(
-                        method="GET", url=settings.ecom_settings.auth_url, headers={"Authorization": f"Bearer {token}"}
-                    )
+            user_id_claim, phone_claim = settings.auth_settings.user_id_claim, settings.auth_settings.phone_claim
+            if claims := get_local_claims(token, user_id_claim, phone_claim):
+                setattr(request, "user_id", claims[user_id_claim])
+                setattr(request, "phone", claims[phone_claim])
+                return True
+            response: Response = await get_http_client().send(
+                request=Request(
+                    method="GET", url=settings.ecom_settings.auth_url, headers={"Authorization": f"Bearer {token}"}
                 )
+            )
 
-                response.raise_for_status()
+            response.raise_for_status()
 
-                result: dict[str, Any] = response.json()
+            result: dict[str, Any] = response.json()
 
-                user_id: str | None = result.get("user_id")
-                phone: str | None = result.get("phone")
+            user_id: str | None = result.get("user_id")
+            phone: str | None = result.get("phone")
 
-                if not user_id or not phone:
-                    raise HTTPException(
-                        status_code=status.HTTP_403_FORBIDDEN,
-                        detail="Не удалось получить ID пользователя или телефон по переданному токену",
-                    )
+            if not user_id or not phone:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Не удалось получить ID пользователя или телефон по переданному токену",
+                )
 
-                setattr(request, "user_id", user_id)
-                setattr(request, "phone", phone)
+            setattr(request, "user_id", user_id)
+            setattr(request, "phone", phone)
             return True
         except Exception as err:
             error(f"Ошибка проверки токена: {err}")
@@ -117,6 +147,7 @@ class SellerCheck(HTTPBearer):
     async def __call__(
         self,
         request: IncomingRequest,
+        cache: Cache = Depends(dependency=get_cache),
     ) -> None:
         credentials: HTTPAuthorizationCredentials | None = await super(
             SellerCheck,
@@ -133,7 +164,7 @@ class SellerCheck(HTTPBearer):
                     detail="Invalid authentication scheme",
                 )
 
-            await self.verify_seller(token=credentials.credentials, request=request)
+            await self.verify_seller(token=credentials.credentials, request=request, cache=cache)
         else:
             raise HTTPException(
                 status_code=403,
@@ -144,22 +175,42 @@ class SellerCheck(HTTPBearer):
         self,
         token: str,
         request: IncomingRequest,
+        cache: Cache | None = None,
     ) -> bool:
+        """Проверяет токен продавца локально (см. get_local_claims) или в сервисе продавцов.
+
+        Проверенные сервисом токены кэшируются (см. TokenCache): повторные запросы с тем же токеном
+        не обращаются к сервису продавцов, пока токен не истёк в кэше или не отозван.
+        """
+        seller_id_claim = settings.auth_settings.seller_id_claim
         try:
-            async with AsyncClient() as client:
-                response: Response = await client.send(
-                    request=Request(
-                        method="GET",
-                        url=settings.ecom_settings.seller_check_url,
-                        headers={"Authorization": f"Bearer {token}"},
-                    )
-                )
-                if not response.is_success:
-                    error_detail: str | None = response.json().get("detail")
-                    raise Exception(error_detail)
-                seller_id: str | None = response.json()
-                setattr(request, "seller_id", seller_id)
-                setattr(request, "user_token", token)
+            claims = get_local_claims(token, seller_id_claim)
+        except JWTError as err:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Ошибка проверки токена: {err}")
+        if claims:
+            setattr(request, "seller_id", str(claims[seller_id_claim]))
+            setattr(request, "user_token", token)
+            return True
+        if cache is not None and (seller_id := await get_token_cache().get(cache, token)):
+            setattr(request, "seller_id", seller_id)
+            setattr(request, "user_token", token)
             return True
+        try:
+            response: Response = await get_http_client().send(
+                request=Request(
+                    method="GET",
+                    url=settings.ecom_settings.seller_check_url,
+                    headers={"Authorization": f"Bearer {token}"},
+                )
+            )
+            if not response.is_success:
+                error_detail: str | None = response.json().get("detail")
+                raise Exception(error_detail)
+            seller_id: str | None = response.json()
+            setattr(request, "seller_id", seller_id)
+            setattr(request, "user_token", token)
         except Exception as err:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Ошибка проверки токена: {err}")
+        if cache is not None and seller_id:
+            await get_token_cache().add(cache, token, str(seller_id))
+        return True
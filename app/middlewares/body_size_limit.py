@@ -0,0 +1,51 @@
+from fastapi import HTTPException, status
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class BodySizeLimitMiddleware:
+    """Ограничивает размер тела запросов к путям, оканчивающимся на ключи max_sizes.
+
+    Размер проверяется по Content-Length и по мере чтения тела: запрос больше лимита прерывается
+    с 413 до того, как multipart-парсер допишет файл на диск целиком.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_sizes: dict[str, int],
+    ) -> None:
+        self.app: ASGIApp = app
+        self.max_sizes: dict[str, int] = max_sizes
+
+    def _get_max_size(self, path: str) -> int | None:
+        for path_suffix, max_size in self.max_sizes.items():
+            if path.endswith(path_suffix):
+                return max_size
+        return None
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        if scope["type"] != "http" or (max_size := self._get_max_size(scope["path"])) is None:
+            return await self.app(scope, receive, send)
+        content_length = Headers(scope=scope).get("content-length")
+        received = int(content_length) if content_length and content_length.isdigit() else 0
+
+        async def receive_limited() -> Message:
+            nonlocal received
+            if received <= max_size:
+                message = await receive()
+                if message["type"] == "http.request" and not content_length:
+                    received += len(message.get("body", b""))
+            if received > max_size:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"the request body must not exceed {max_size} bytes",
+                )
+            return message
+
+        return await self.app(scope, receive_limited, send)
@@ -0,0 +1,33 @@
+import re
+from typing import Iterable
+
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware, не сжимающий ответы на пути, подходящие под регулярные выражения exclude_paths.
+
+    Нужен для потоковых ответов, которые отдаются как есть: например, документов с Content-Length
+    и Content-Range, которые после сжатия перестали бы соответствовать передаваемым байтам.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 500,
+        compresslevel: int = 9,
+        exclude_paths: Iterable[str] = (),
+    ) -> None:
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.exclude_paths: list[re.Pattern] = [re.compile(path) for path in exclude_paths]
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        if scope["type"] == "http" and any(path.search(scope["path"]) for path in self.exclude_paths):
+            return await self.app(scope, receive, send)
+        return await super().__call__(scope, receive, send)
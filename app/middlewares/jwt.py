@@ -0,0 +1,53 @@
+import hmac
+import json
+from base64 import urlsafe_b64decode
+from hashlib import sha256, sha384, sha512
+from time import time
+from typing import Any
+
+HMAC_ALGORITHMS = {
+    "HS256": sha256,
+    "HS384": sha384,
+    "HS512": sha512,
+}
+
+
+class JWTError(ValueError):
+    """Токен не прошёл локальную проверку."""
+
+
+def _base64url_decode(segment: str) -> bytes:
+    return urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def decode_jwt(token: str, secret_key: str, algorithm: str, leeway: float = 0) -> dict[str, Any]:
+    """Проверяет подпись (HMAC) и срок действия JWT и отдаёт его claims.
+
+    Токен без exp считается недействительным. leeway — допустимое расхождение часов, секунд.
+    """
+    try:
+        header_segment, payload_segment, signature_segment = token.split(".")
+        header = json.loads(_base64url_decode(header_segment))
+        claims = json.loads(_base64url_decode(payload_segment))
+        signature = _base64url_decode(signature_segment)
+    except ValueError as err:
+        raise JWTError("некорректный токен") from err
+    if not isinstance(header, dict) or not isinstance(claims, dict):
+        raise JWTError("некорректный токен")
+    if algorithm not in HMAC_ALGORITHMS or header.get("alg") != algorithm:
+        raise JWTError(f"неподдерживаемый алгоритм подписи {header.get('alg')}")
+    expected_signature = hmac.new(
+        secret_key.encode(), f"{header_segment}.{payload_segment}".encode(), HMAC_ALGORITHMS[algorithm]
+    ).digest()
+    if not hmac.compare_digest(signature, expected_signature):
+        raise JWTError("неверная подпись токена")
+    now = time()
+    expires_at = claims.get("exp")
+    if not isinstance(expires_at, (int, float)):
+        raise JWTError("в токене нет срока действия")
+    if expires_at + leeway < now:
+        raise JWTError("срок действия токена истёк")
+    not_before = claims.get("nbf")
+    if isinstance(not_before, (int, float)) and not_before - leeway > now:
+        raise JWTError("токен ещё не действителен")
+    return claims
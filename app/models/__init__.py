@@ -1,4 +1,5 @@
 from app.models.fields_extensions_models import (
+    ImageVariantsInDB,
     ProductBrandInDB,
     ProductColorInDB,
     ProductDocumentInDB,
@@ -8,6 +9,8 @@ from app.models.fields_extensions_models import (
     ProductPackInDB,
     ProductPriceInDB,
     ProductSizeInDB,
+    StorageGarbageInDB,
+    UploadedFileInDB,
 )
 from app.models.products_models import ProductCategoryInDB, ProductInDB, ProductSubCategoryInDB
 from app.models.requests import RequestInfo
@@ -26,4 +29,7 @@ __all__: list[str] = [
     "ProductColorInDB",
     "ProductMessageInDB",
     "ProductBrandInDB",
+    "ImageVariantsInDB",
+    "UploadedFileInDB",
+    "StorageGarbageInDB",
 ]
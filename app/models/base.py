@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Any, ClassVar
 from uuid import UUID, uuid4
 
 from sqlalchemy import DateTime, Uuid
@@ -28,6 +29,10 @@ class IDMixin(SQLModel):
 
 
 class TimestampsMixin(SQLModel):
+    # Серверные значения created_at/updated_at возвращаются через RETURNING в том же INSERT/UPDATE,
+    # поэтому после commit не нужен повторный SELECT (session.refresh).
+    __mapper_args__: ClassVar[dict[str, Any]] = {"eager_defaults": True}
+
     created_at: datetime | None = Field(
         sa_type=DateTime(timezone=True),
         sa_column_kwargs={"server_default": func.now()},
@@ -3,7 +3,19 @@ from typing import TYPE_CHECKING, Any, Callable, ClassVar
 from uuid import UUID
 
 from pydantic import ConfigDict
-from sqlalchemy import JSON, Boolean, Column, Float, ForeignKey, Integer, String, Text, UniqueConstraint, Uuid
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Boolean,
+    Column,
+    Float,
+    ForeignKey,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+    Uuid,
+)
 from sqlalchemy.dialects.postgresql import ENUM as psEnum
 from sqlalchemy.orm import RelationshipProperty
 from sqlmodel import Field, Relationship
@@ -54,6 +66,29 @@ class ProductStatus(str, Enum):
     deleted = "Удалён"
 
 
+class ImageProcessingStatus(str, Enum):
+    """Статус создания миниатюр изображения товара"""
+
+    processing = "В обработке"
+    ready = "Готово"
+    failed = "Ошибка обработки"
+
+
+class UploadedFileKind(str, Enum):
+    """Назначение загруженного файла"""
+
+    image = "Изображение"
+    document = "Документ"
+
+
+class DocumentDelivery(str, Enum):
+    """Способ выдачи документа товара"""
+
+    stream = "stream"
+    redirect = "redirect"
+    url = "url"
+
+
 class ProductImageInDB(IDMixin, TimestampsMixin, table=True):
     """Изображение товара в БД"""
 
@@ -70,6 +105,44 @@ class ProductImageInDB(IDMixin, TimestampsMixin, table=True):
         description="URL изображения товара среднего размера",
         sa_column=Column(String, nullable=False, default=default_image_url),
     )
+    preview_webp_url: str | None = Field(
+        default=None,
+        description="URL превью изображения товара в формате WebP",
+        sa_column=Column(String, nullable=True),
+    )
+    mini_webp_url: str | None = Field(
+        default=None,
+        description="URL изображения товара маленького размера в формате WebP",
+        sa_column=Column(String, nullable=True),
+    )
+    small_webp_url: str | None = Field(
+        default=None,
+        description="URL изображения товара среднего размера в формате WebP",
+        sa_column=Column(String, nullable=True),
+    )
+    original_url: str | None = Field(
+        default=None,
+        description="URL оригинала изображения товара",
+        sa_column=Column(String, nullable=True),
+    )
+    content_hash: str | None = Field(
+        default=None,
+        description="Хэш исходного изображения и параметров миниатюр, ключ в image_variants",
+        sa_column=Column(String(64), nullable=True, index=True),
+    )
+    processing_status: ImageProcessingStatus = Field(
+        default=ImageProcessingStatus.ready,
+        description="Статус создания миниатюр изображения",
+        sa_column=Column(
+            psEnum(
+                ImageProcessingStatus,
+                name="image_processing_status_enum",
+                schema=metadata.schema,
+            ),
+            nullable=False,
+            server_default=ImageProcessingStatus.ready.name,
+        ),
+    )
     order_num: int = Field(
         description="Порядковый номер изображения",
         sa_column=Column(
@@ -91,6 +164,57 @@ class ProductImageInDB(IDMixin, TimestampsMixin, table=True):
     )
 
 
+class ImageVariantsInDB(IDMixin, TimestampsMixin, table=True):
+    """Файлы вариантов изображения в хранилище, общие для всех изображений с одним content_hash"""
+
+    __tablename__: ClassVar[str | Callable[..., str]] = "image_variants"
+    __table_args__: dict[str, str | None] = {"schema": metadata.schema}
+    content_hash: str = Field(
+        description="Хэш исходного изображения и параметров миниатюр",
+        sa_column=Column(String(64), nullable=False, unique=True),
+    )
+    variants: dict[str, str] = Field(
+        description="URL файлов по именам полей изображения товара (preview_url, preview_webp_url, ...)",
+        sa_column=Column(JSON, nullable=False),
+    )
+
+
+class UploadedFileInDB(IDMixin, TimestampsMixin, table=True):
+    """Файл, загруженный продавцом в хранилище и ещё не привязанный к товару"""
+
+    __tablename__: ClassVar[str | Callable[..., str]] = "uploaded_file"
+    __table_args__: dict[str, str | None] = {"schema": metadata.schema}
+    seller_id: UUID = Field(description="ID продавца", sa_column=Column(Uuid, nullable=False, index=True))
+    kind: UploadedFileKind = Field(
+        description="Назначение файла",
+        sa_column=Column(
+            psEnum(
+                UploadedFileKind,
+                name="uploaded_file_kind_enum",
+                schema=metadata.schema,
+            ),
+            nullable=False,
+        ),
+    )
+    key: str = Field(description="Ключ файла в хранилище", sa_column=Column(String, nullable=False))
+    name: str = Field(description="Исходное имя файла", sa_column=Column(String, nullable=False))
+    extension: str = Field(description="Расширение файла", sa_column=Column(String, nullable=False))
+    content_type: str = Field(description="MIME-тип файла", sa_column=Column(String, nullable=False))
+    size: int = Field(description="Размер файла, байт", sa_column=Column(BigInteger, nullable=False))
+
+
+class StorageGarbageInDB(IDMixin, TimestampsMixin, table=True):
+    """Файл хранилища, ожидающий удаления фоновой сборкой мусора"""
+
+    __tablename__: ClassVar[str | Callable[..., str]] = "storage_gc"
+    __table_args__: tuple = (
+        UniqueConstraint("bucket", "key"),
+        {"schema": metadata.schema},
+    )
+    bucket: str = Field(description="Бакет хранилища", sa_column=Column(String, nullable=False))
+    key: str = Field(description="Ключ файла в хранилище", sa_column=Column(String, nullable=False))
+
+
 class ProductDocumentInDB(IDMixin, TimestampsMixin, table=True):
     """Документ на товар в БД"""
 
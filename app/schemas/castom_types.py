@@ -1,11 +1,14 @@
 import base64
 import re
 from dataclasses import dataclass
+from math import ceil
 from typing import Any
 
 from pydantic import GetCoreSchemaHandler
 from pydantic_core.core_schema import CoreSchema, no_info_wrap_validator_function, str_schema
 
+from app.images.validation import signature_length, sniff_image_format, validate_image
+
 
 @dataclass
 class Base64File:
@@ -48,7 +51,12 @@ class ImageBase64File(Base64File):
         """Валидирует данные."""
         pattern = r"data:(image/jpeg|image/png);base64,"
         cls.check_type_and_pattern_matching(value, pattern)
-        return cls.create_obj(value)
+        # Сигнатура проверяется по первым байтам до декодирования всей строки.
+        image_base64 = value.split(";base64,")[1]
+        sniff_image_format(base64.b64decode(image_base64[: ceil(signature_length / 3) * 4]))
+        obj = cls.create_obj(value)
+        validate_image(obj.file)
+        return obj
 
 
 class DocumentBase64File(Base64File):
@@ -6,17 +6,69 @@ from uuid import UUID, uuid4
 from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 from typing_extensions import Self
 
-from app.models.fields_extensions_models import SizeGroup, ValueAddedTax, default_image_url
+from app.models.fields_extensions_models import (
+    ImageProcessingStatus,
+    SizeGroup,
+    UploadedFileKind,
+    ValueAddedTax,
+    default_image_url,
+)
 from app.schemas.castom_types import DocumentBase64File, ImageBase64File
 
 
 class FileObject(BaseModel):
     storage_path: str = Field(description="Путь к файлу в хранилище")
     file_object: BytesIO | SpooledTemporaryFile = Field(description="Поток байтов файла в памяти")
+    immutable: bool = Field(
+        default=False,
+        description="Ключ файла строится из отпечатка содержимого, и файл по нему никогда не меняется",
+    )
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
 
+class UploadedFile(BaseModel):
+    """Схема вывода загруженного файла."""
+
+    id: UUID = Field(description="ID загруженного файла")
+    kind: UploadedFileKind = Field(description="Назначение файла")
+    name: str = Field(description="Исходное имя файла")
+    extension: str = Field(description="Расширение файла")
+    size: int = Field(description="Размер файла, байт")
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "id": str(uuid4()),
+                    "kind": UploadedFileKind.image,
+                    "name": "photo.jpeg",
+                    "extension": "jpeg",
+                    "size": 204800,
+                }
+            ]
+        }
+    }
+
+
+class DocumentUrl(BaseModel):
+    """Схема вывода временной ссылки на документ."""
+
+    url: str = Field(description="Подписанная ссылка на документ в хранилище")
+    expires_in: int = Field(description="Время жизни ссылки, секунд")
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "url": (
+                        "https://storage.example.com/bucket/temp/products/documents/document.pdf?X-Amz-Signature=..."
+                    ),
+                    "expires_in": 300,
+                }
+            ]
+        }
+    }
+
+
 class ProductImageBase(BaseModel):
     """Базовая схема изображения продукта."""
 
@@ -33,6 +85,17 @@ class ProductImage(ProductImageBase):
     preview_url: str = Field(description="URL превью изображения товара", default=default_image_url)
     mini_url: str = Field(description="URL изображения товара маленького размера", default=default_image_url)
     small_url: str = Field(description="URL изображения товара среднего размера", default=default_image_url)
+    preview_webp_url: str | None = Field(description="URL превью изображения товара в формате WebP", default=None)
+    mini_webp_url: str | None = Field(
+        description="URL изображения товара маленького размера в формате WebP", default=None
+    )
+    small_webp_url: str | None = Field(
+        description="URL изображения товара среднего размера в формате WebP", default=None
+    )
+    original_url: str | None = Field(description="URL оригинала изображения товара", default=None)
+    processing_status: ImageProcessingStatus = Field(
+        description="Статус создания миниатюр изображения", default=ImageProcessingStatus.ready
+    )
     model_config = {
         "json_schema_extra": {
             "examples": [
@@ -41,6 +104,11 @@ class ProductImage(ProductImageBase):
                     "image_preview": default_image_url,
                     "image_mini": default_image_url,
                     "image_small": default_image_url,
+                    "preview_webp_url": None,
+                    "mini_webp_url": None,
+                    "small_webp_url": None,
+                    "original_url": None,
+                    "processing_status": ImageProcessingStatus.ready,
                     "order_num": 0,
                 }
             ]
@@ -51,7 +119,8 @@ class ProductImage(ProductImageBase):
 class ProductImageCreate(BaseModel):
     """Схема создания изображения продукта."""
 
-    image: ImageBase64File = Field(description="Изображение в base64 кодировке")
+    image: ImageBase64File | None = Field(default=None, description="Изображение в base64 кодировке")
+    file_id: UUID | None = Field(default=None, description="ID изображения, загруженного через multipart")
     order_num: int = Field(description="Порядковый номер изображения")
     model_config = {
         "json_schema_extra": {
@@ -64,11 +133,18 @@ class ProductImageCreate(BaseModel):
         }
     }
 
+    @model_validator(mode="after")
+    def validation_presence_image_or_file_id(self) -> Self:
+        if bool(self.image) == bool(self.file_id):
+            raise ValueError("exactly one of the image and file_id must be specified")
+        return self
+
 
 class ProductImageUpdate(ProductImageBase):
     """Схема обновления изображения продукта."""
 
     image: ImageBase64File | None = Field(default=None, description="Изображение в base64 кодировке")
+    file_id: UUID | None = Field(default=None, description="ID изображения, загруженного через multipart")
     model_config = {
         "json_schema_extra": {
             "examples": [
@@ -83,8 +159,10 @@ class ProductImageUpdate(ProductImageBase):
 
     @model_validator(mode="after")
     def validation_presence_image_or_id(self) -> Self:
-        if not any((self.image, self.id)):
+        if not any((self.image, self.file_id, self.id)):
             raise ValueError("the image and id cannot be missing at the same time")
+        if self.image and self.file_id:
+            raise ValueError("the image and file_id cannot be specified at the same time")
         return self
 
 
@@ -126,7 +204,8 @@ class ProductDocumentCreate(BaseModel):
     name: str = Field(
         description="Имя документа",
     )
-    document: DocumentBase64File = Field(description="Документ в base64 кодировке")
+    document: DocumentBase64File | None = Field(default=None, description="Документ в base64 кодировке")
+    file_id: UUID | None = Field(default=None, description="ID документа, загруженного через multipart")
     model_config = {
         "json_schema_extra": {
             "examples": [
@@ -138,6 +217,12 @@ class ProductDocumentCreate(BaseModel):
         }
     }
 
+    @model_validator(mode="after")
+    def validation_presence_document_or_file_id(self) -> Self:
+        if bool(self.document) == bool(self.file_id):
+            raise ValueError("exactly one of the document and file_id must be specified")
+        return self
+
 
 class ProductMessage(BaseModel):
     message: str = Field(
@@ -166,6 +251,10 @@ class ProductDocumentUpdate(ProductDocumentBase):
         default=None,
         description="Документ в base64 кодировке",
     )
+    file_id: UUID | None = Field(
+        default=None,
+        description="ID документа, загруженного через multipart",
+    )
     model_config = {
         "json_schema_extra": {
             "examples": [
@@ -180,7 +269,7 @@ class ProductDocumentUpdate(ProductDocumentBase):
 
     @model_validator(mode="after")
     def validation_presence_document_or_id(self) -> Self:
-        if not any((self.document, self.id)):
+        if not any((self.document, self.file_id, self.id)):
             raise ValueError("the document and id cannot be missing at the same time")
         elif self.document and not self.name:
             raise ValueError("the name is a required field")
@@ -447,3 +536,16 @@ class ProductStorageQuantity(BaseModel):
             ]
         }
     }
+
+
+class TokenRevocation(BaseModel):
+    """Схема отзыва токена продавца или всех его токенов из кэша проверенных токенов."""
+
+    token: str | None = Field(default=None, description="Токен продавца")
+    seller_id: UUID | None = Field(default=None, description="ID продавца, все токены которого отзываются")
+
+    @model_validator(mode="after")
+    def validation_presence_token_or_seller_id(self) -> Self:
+        if self.token is None and self.seller_id is None:
+            raise ValueError("at least one of the token and seller_id must be specified")
+        return self
@@ -3,13 +3,13 @@ import json
 from abc import ABC
 from datetime import datetime
 from logging import ERROR
+from mimetypes import guess_type
+from posixpath import join
 from typing import Any, Coroutine, Mapping
 from uuid import UUID
 
-import boto3
 from backoff import expo, on_exception
 from fastapi import HTTPException, status
-from httpx import AsyncClient
 from httpx import Request as httpx_Request
 from httpx import Response as httpx_Response
 from sqlalchemy.engine import Result
@@ -19,9 +19,11 @@ from sqlalchemy.sql.elements import TextClause
 from sqlmodel.sql.expression import SelectOfScalar
 
 from app.cache import Cache
-from app.core.config import settings
+from app.core.config import immutable_cache_control, settings
+from app.http_client import HTTPClient, get_http_client
 from app.mq.rabbitmq import RabbitMQ
 from app.schemas.fields_extensions_schemas import FileObject
+from app.storage import StorageBackend, StoredFile, enqueue_storage_garbage, get_storage
 
 
 class Base(ABC):
@@ -36,8 +38,9 @@ class Base(ABC):
         self.rabbit_mq: RabbitMQ = rabbit_mq
 
     @property
-    def client(self) -> AsyncClient:
-        return AsyncClient()
+    def client(self) -> HTTPClient:
+        """Общий HTTP-клиент воркера с пулом keep-alive соединений."""
+        return get_http_client()
 
     async def _get_response_from_external_service(
         self,
@@ -48,7 +51,8 @@ class Base(ABC):
     ) -> dict[str, Any]:
         """Совершает запрос к внешнему сервису,
         получает от него данные в виде json и
-        преобразует их в соответветствующий тип данных Python
+        преобразует их в соответветствующий тип данных Python.
+        Запрос только читает данные, поэтому одновременные одинаковые запросы выполняются один раз.
 
         Args:
             service_url (str): URL внешнего сервиса
@@ -62,32 +66,31 @@ class Base(ABC):
         Returns:
             Any: ответ от внешнего сервиса в виде json, преобразованный в соответвтвующий тип данных Python
         """
-        async with self.client as client:
-            try:
-                response: httpx_Response = await client.send(
-                    request=httpx_Request(
-                        url=service_url,
-                        method=method,
-                        headers=headers,
-                        json=json,
-                    )
-                )
-            except Exception as exc:
-                raise HTTPException(
-                    status_code=status.HTTP_502_BAD_GATEWAY,
-                    detail=f"Ошибка в получении данных от внешнего сервиса ({service_url}): {str(exc)}",
-                )
+        try:
+            response: httpx_Response = await self.client.send(
+                request=httpx_Request(
+                    url=service_url,
+                    method=method,
+                    headers=headers,
+                    json=json,
+                ),
+                coalesce=True,
+            )
+        except Exception as exc:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Ошибка в получении данных от внешнего сервиса ({service_url}): {str(exc)}",
+            )
 
-            if not response.is_success:
-                raise HTTPException(
-                    status_code=status.HTTP_502_BAD_GATEWAY,
-                    detail=(
-                        f"Ошибка в получении данных от внешнего сервиса ({service_url}): status code"
-                        f" {response.status_code}"
-                    ),
-                )
+        if not response.is_success:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=(
+                    f"Ошибка в получении данных от внешнего сервиса ({service_url}): status code {response.status_code}"
+                ),
+            )
 
-            return response.json()
+        return response.json()
 
     @on_exception(wait_gen=expo, exception=Exception, max_tries=5, backoff_log_level=ERROR)
     async def _get_count(
@@ -168,11 +171,6 @@ class Base(ABC):
 
         await self.session.commit()
 
-        for instance in instances:
-            await self.session.refresh(
-                instance=instance,
-            )
-
         return instances
 
     @on_exception(
@@ -184,7 +182,6 @@ class Base(ABC):
     async def _create_one(self, instance: Any) -> Any:
         self.session.add(instance=instance)
         await self.session.commit()
-        await self.session.refresh(instance=instance)
         return instance
 
     @on_exception(
@@ -211,9 +208,6 @@ class Base(ABC):
             )
 
             await self.session.commit()
-            await self.session.refresh(
-                instance=instance_in_db,
-            )
 
             return instance_in_db
         else:
@@ -231,12 +225,7 @@ class Base(ABC):
 
         await self.session.commit()
 
-        for instance in instances:
-            for key, value in vars(instance).items():
-                setattr(instance, key, value)
-        await self.session.refresh(
-            instance=instance,
-        )
+        return instances
 
     async def _delete(
         self,
@@ -323,55 +312,61 @@ class Base(ABC):
         return cache_data
 
     @property
-    def s3_client(self):
-        """Геттер клиента s3."""
-        return boto3.client(
-            "s3",
-            endpoint_url=settings.s3_settings.url,
-            aws_access_key_id=settings.s3_settings.access_key,
-            aws_secret_access_key=settings.s3_settings.secret_key,
-        )
+    def storage(self) -> StorageBackend:
+        """Хранилище файлов воркера: s3 или каталог на диске."""
+        return get_storage()
 
     async def _delete_file_to_s3(self, file_url: str, bucket: str) -> None:
         """Удаление файла из объектного хранилища."""
         try:
             key = file_url.split(f"{bucket}/")[1]
-            await asyncio.to_thread(
-                self.s3_client.delete_object,
-                Bucket=bucket,
-                Key=key,
-            )
+            failed = await self.storage.delete_many(bucket, [key])
         except Exception as err:
             raise HTTPException(500, detail=f"Ошибка при удалении файла: {str(err)}")
+        if failed:
+            raise HTTPException(500, detail=f"Ошибка при удалении файла: {key}")
 
     async def _multi_delete_files_to_s3(self, file_urls: list[str], bucket: str) -> None:
         """Удаление файлов из объектного хранилища."""
-        keys = [{"Key": file_url.split(f"{bucket}/")[-1]} for file_url in file_urls]
+        keys = [file_url.split(f"{bucket}/")[-1] for file_url in file_urls]
         try:
-            if keys:
-                await asyncio.to_thread(
-                    self.s3_client.delete_objects,
-                    Bucket=bucket,
-                    Delete={"Objects": keys},
-                )
+            failed = await self.storage.delete_many(bucket, keys) if keys else set()
         except Exception as err:
             raise HTTPException(500, detail=f"Ошибка при удалении файлов: {str(err)}")
+        if failed:
+            raise HTTPException(500, detail=f"Ошибка при удалении файлов: {', '.join(sorted(failed))}")
+
+    async def _delete_files_later(self, file_urls: list[str], bucket: str) -> None:
+        """Ставит файлы в очередь на удаление из хранилища в транзакции сессии запроса.
+
+        Сами файлы удаляет фоновая сборка мусора после фиксации транзакции.
+        """
+        await enqueue_storage_garbage(
+            self.session,
+            bucket,
+            (file_url.split(f"{bucket}/")[-1] for file_url in file_urls),
+        )
 
     async def _upload_file_to_s3(
         self,
         file_object: FileObject,
         bucket: str,
         public: bool,
+        temp: bool = True,
     ) -> FileObject:
-        """Создание файла в объектном хранилище."""
-        extra_args = {"ACL": "public-read"} if public else {"ACL": "private"}
+        """Создание файла в объектном хранилище. Большие файлы загружаются в s3 параллельными частями.
+
+        Content-Type файла определяется по расширению ключа, неизменяемые файлы кэшируются клиентами на год.
+        Файл загружается в temp/, если temp=False — сразу в постоянное хранилище.
+        """
         try:
-            await asyncio.to_thread(
-                self.s3_client.upload_fileobj,
-                file_object.file_object,
+            await self.storage.put(
                 bucket,
-                f"temp/{file_object.storage_path}",
-                ExtraArgs=extra_args,
+                join("temp", file_object.storage_path) if temp else file_object.storage_path,
+                file_object.file_object,
+                public,
+                content_type=guess_type(file_object.storage_path)[0],
+                cache_control=immutable_cache_control if file_object.immutable else None,
             )
         except Exception as err:
             raise HTTPException(500, detail=f"Ошибка при загрузке файла: {str(err)}")
@@ -383,23 +378,45 @@ class Base(ABC):
         bucket: str,
         public: bool = True,
     ) -> list[FileObject]:
-        """Создание файлов в объектном хранилище."""
-        tasks = [
-            asyncio.create_task(
+        """Создание файлов в объектном хранилище, не больше S3_REQUEST_WINDOW загрузок одновременно."""
+        return await self._gather_in_window(
+            [
                 self._upload_file_to_s3(
                     file_object=file_object,
                     bucket=bucket,
                     public=public,
                 )
-            )
-            for file_object in file_objects
-        ]
-        return await asyncio.gather(*tasks)
-
-    async def _get_file_in_s3(self, key: str, bucket: str) -> dict[str, Any]:
-        """Получение файла из хранилища."""
-        return await asyncio.to_thread(
-            self.s3_client.get_object,
-            Bucket=bucket,
-            Key=key,
+                for file_object in file_objects
+            ],
+            window=settings.s3_settings.request_window,
         )
+
+    async def _gather_in_window(
+        self,
+        coroutines: list[Coroutine],
+        window: int,
+        return_exceptions: bool = False,
+    ) -> list[Any]:
+        """Выполняет корутины конкурентно, но не больше window одновременно. Результаты — в порядке корутин."""
+        semaphore = asyncio.Semaphore(window)
+
+        async def run_in_window(coroutine: Coroutine) -> Any:
+            async with semaphore:
+                return await coroutine
+
+        return await asyncio.gather(
+            *(run_in_window(coroutine) for coroutine in coroutines),
+            return_exceptions=return_exceptions,
+        )
+
+    async def _get_file_in_s3(self, key: str, bucket: str, byte_range: str | None = None) -> StoredFile:
+        """Открывает файл хранилища для чтения потоком. byte_range — значение заголовка Range (bytes=start-end)."""
+        return await self.storage.get(bucket, key, settings.s3_settings.download_chunk_size, byte_range)
+
+    async def _get_presigned_url_in_s3(self, key: str, bucket: str, expires_in: int, **params: Any) -> str:
+        """Подписанная ссылка на чтение файла из хранилища. params — дополнительные параметры GetObject."""
+        return await self.storage.presign(bucket, key, expires_in, **params)
+
+    async def _read_file_in_s3(self, key: str, bucket: str) -> bytes:
+        """Чтение содержимого файла из хранилища."""
+        return await self.storage.read(bucket, key)
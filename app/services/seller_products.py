@@ -1,26 +1,41 @@
+import asyncio
 from functools import lru_cache
 from io import BytesIO
+from logging import error
 from math import ceil
+from mimetypes import guess_type
 from posixpath import join
-from typing import Any
+from typing import Any, BinaryIO, Iterable
+from urllib.parse import quote
 from uuid import UUID, uuid4
 
 import orjson
 from dotenv import load_dotenv
-from fastapi import BackgroundTasks, Depends, HTTPException, Response, status
-from fastapi.encoders import jsonable_encoder
-from PIL import Image
-from PIL.Image import Image as OpenImage
+from fastapi import BackgroundTasks, Depends, HTTPException, Response, UploadFile, status
+from fastapi.responses import RedirectResponse, StreamingResponse
 from slugify.slugify import slugify
-from sqlalchemy import func, select
+from sqlalchemy import JSON, Text, case, cast, func, or_, select, update
+from sqlalchemy.dialects.postgresql import JSONB, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 from sqlmodel import SQLModel, select
 
-from app.cache import Cache, get_cache
-from app.core.config import image_sizes, settings
-from app.db import get_session
+from app.cache import Cache, get_cache, get_image_variant_rate_limiter, get_seller_profile_cache
+from app.core.config import (
+    default_image_url,
+    image_sizes,
+    image_variant_formats,
+    image_webp_fields,
+    settings,
+    upload_content_types,
+    upload_signatures,
+)
+from app.db import async_session, get_session
+from app.images import ImageValidationError, ThumbnailEngine, ThumbnailResult, get_thumbnail_engine, validate_image
 from app.models.fields_extensions_models import (
+    DocumentDelivery,
+    ImageProcessingStatus,
+    ImageVariantsInDB,
     ProductBrandInDB,
     ProductColorInDB,
     ProductDocumentInDB,
@@ -31,12 +46,14 @@ from app.models.fields_extensions_models import (
     ProductSizeInDB,
     ProductStatus,
     ProductStatusForChange,
+    UploadedFileInDB,
+    UploadedFileKind,
 )
 from app.models.products_models import ProductCategoryInDB, ProductInDB, ProductSubCategoryInDB
 from app.models.requests import RequestInfo
 from app.mq import get_rabbitmq
 from app.mq.rabbitmq import RabbitMQ
-from app.schemas.fields_extensions_schemas import FileObject, ProductStorageQuantity, SellerData
+from app.schemas.fields_extensions_schemas import DocumentUrl, FileObject, ProductStorageQuantity, SellerData
 from app.schemas.products_schemas import (
     ProductCreate,
     ProductForElastic,
@@ -46,6 +63,7 @@ from app.schemas.products_schemas import (
     ReadProductName,
 )
 from app.services.base import Base
+from app.storage import StorageRangeError, byte_range_pattern, dequeue_storage_garbage
 
 load_dotenv()
 
@@ -137,149 +155,658 @@ class Service(Base):
         self._validation_order_num(order_num)
         return delete_product_images, update_product_images, create_product_images
 
-    async def _delete_product_images(self, delete_product_images: list[UUID]) -> None:
+    async def _delete_product_images(self, product_in_db: ProductInDB, delete_product_images: list[UUID]) -> None:
         """Удаляет изображения продукта."""
-        product_images_in_db: list[ProductImageInDB] = await self._get_all(
-            statement=select(ProductImageInDB).where(
-                ProductImageInDB.id.in_(delete_product_images),
-            ),
-            count=1,
-        )
-        images_delete = []
+        product_images_in_db = [image for image in product_in_db.images if image.id in delete_product_images]
+        released_images = []
         for product_image_in_db in product_images_in_db:
-            images_delete.extend(
-                [
-                    product_image_in_db.preview_url,
-                    product_image_in_db.mini_url,
-                    product_image_in_db.small_url,
-                ]
+            released_images.append(
+                (product_image_in_db.content_hash, self._get_product_image_urls(product_image_in_db))
             )
+            product_in_db.images.remove(product_image_in_db)
             await self.session.delete(
                 instance=product_image_in_db,
             )
-        await self._multi_delete_files_to_s3(
+        await self._delete_released_image_files(released_images)
+
+    def _get_product_image_urls(self, product_image_in_db: ProductImageInDB) -> list[str]:
+        """Отдаёт URL всех вариантов изображения продукта."""
+        image_fields = [*image_sizes, *image_webp_fields.values(), "original_url"]
+        return [
+            url
+            for image_field in image_fields
+            if (url := getattr(product_image_in_db, image_field)) and url != default_image_url
+        ]
+
+    async def _delete_released_image_files(self, released_images: list[tuple[str | None, list[str]]]) -> None:
+        """Удаляет файлы изображений, которые больше не нужны.
+
+        Файлы изображения с content_hash общие для всех изображений с этим хэшем и удаляются
+        вместе с записью image_variants, только когда ни одно изображение на хэш не ссылается.
+        """
+        content_hashes = {content_hash for content_hash, _ in released_images if content_hash}
+        referenced_hashes = set()
+        image_variants_in_db = []
+        if content_hashes:
+            await self.session.flush()
+            result = await self.session.execute(
+                select(ProductImageInDB.content_hash)
+                .where(ProductImageInDB.content_hash.in_(content_hashes))
+                .distinct()
+            )
+            referenced_hashes = set(result.scalars().all())
+            result = await self.session.execute(
+                select(ImageVariantsInDB).where(ImageVariantsInDB.content_hash.in_(content_hashes - referenced_hashes))
+            )
+            image_variants_in_db = result.scalars().all()
+        images_delete = []
+        for content_hash, image_urls in released_images:
+            if content_hash not in referenced_hashes:
+                images_delete.extend(image_urls)
+        for image_variants_in_db_item in image_variants_in_db:
+            images_delete.extend(image_variants_in_db_item.variants.values())
+            await self.session.delete(
+                instance=image_variants_in_db_item,
+            )
+        await self._delete_files_later(
             file_urls=images_delete,
             bucket=settings.s3_settings.bucket_public,
         )
 
-    def _thumbnail_images(
+    @property
+    def thumbnail_engine(self) -> ThumbnailEngine:
+        """Движок создания миниатюр изображений."""
+        return get_thumbnail_engine()
+
+    def _get_thumbnail_files(
         self,
-        size_value: tuple[int, int],
-        image_format: str,
-        image_resize: OpenImage,
-    ) -> BytesIO:
-        """Изменяет масштаб изображения."""
-        in_mem_resize_image = BytesIO()
-        image_resize.thumbnail(size_value)
-        image_resize.save(in_mem_resize_image, format=image_format)
-        in_mem_resize_image.seek(0)
-        return in_mem_resize_image
-
-    async def _update_product_images(self, update_product_images: list[dict]) -> None:
-        """Обновляет изображения продукта."""
-        images_resize = []
-        images_delete = []
+        thumbnail_result: ThumbnailResult,
+        content_hash: str,
+    ) -> tuple[dict[str, str], list[FileObject]]:
+        """Отдаёт URL миниатюр по полям ProductImageInDB и файлы для загрузки в хранилище.
+
+        Ключи файлов строятся из content_hash, поэтому одинаковые изображения хранятся один раз.
+        """
         url = settings.s3_settings.url
         bucket_public = settings.s3_settings.bucket_public
-        for update_product_image in update_product_images:
-            product_image_in_db: ProductImageInDB = await self._get_one(
-                statement=select(ProductImageInDB).where(
-                    ProductImageInDB.id == update_product_image["id"],
+        thumbnail_urls = {}
+        thumbnail_files = []
+        for size_title, thumbnail in thumbnail_result.thumbnails.items():
+            storage_path = f"products/images/{size_title}/{content_hash}.{thumbnail.image_format.lower()}"
+            thumbnail_urls[size_title] = join(url, bucket_public, "temp", storage_path)
+            thumbnail_files.append(
+                FileObject(
+                    storage_path=storage_path,
+                    file_object=BytesIO(thumbnail.content),
+                    immutable=True,
                 )
             )
-            order_num = update_product_image["order_num"]
-            image = update_product_image.get("image")
-            if product_image_in_db.order_num == order_num and not image:
-                continue
-            product_image_in_db.order_num = order_num
-            if image:
-                image_resize = Image.open(BytesIO(image["file"]))
-                image_format = image_resize.format.lower()
-                old_image_format = product_image_in_db.preview_url.split(".")[-1]
-                for size_title, size_value in image_sizes.items():
-                    in_mem_resize_image = self._thumbnail_images(size_value, image_format, image_resize)
-                    old_image_url: str = getattr(product_image_in_db, size_title)
-                    storage_path = old_image_url.split("temp/")[1]
-                    if image_format != old_image_format:
-                        storage_path = f"products/images/{size_title}/{str(uuid4())}.{image_format.lower()}"
-                        image_url = join(url, bucket_public, "temp", storage_path)
-                        setattr(product_image_in_db, size_title, image_url)
-                        images_delete.append(old_image_url)
-                    images_resize.append(
-                        FileObject(
-                            storage_path=storage_path,
-                            file_object=in_mem_resize_image,
-                        )
-                    )
-            self.session.add(
-                instance=product_image_in_db,
+        return thumbnail_urls, thumbnail_files
+
+    async def _create_image_variants(
+        self,
+        content_hash: str,
+        image: bytes,
+        original_url: str | None = None,
+    ) -> dict[str, str]:
+        """Создаёт миниатюры изображения в пуле процессов и загружает их в хранилище.
+
+        Буферы миниатюр живут только до окончания загрузки этого изображения. Оригинал сохраняется
+        рядом с миниатюрами (если не был загружен раньше): из него по запросу создаются варианты
+        произвольного размера.
+        """
+        thumbnail_result = await self.thumbnail_engine.create_thumbnails(image)
+        thumbnail_urls, thumbnail_files = self._get_thumbnail_files(thumbnail_result, content_hash)
+        if original_url is None:
+            storage_path = f"products/images/original_url/{content_hash}.{thumbnail_result.image_format.lower()}"
+            original_url = join(settings.s3_settings.url, settings.s3_settings.bucket_public, "temp", storage_path)
+            thumbnail_files.append(
+                FileObject(
+                    storage_path=storage_path,
+                    file_object=BytesIO(image),
+                    immutable=True,
+                )
             )
-        await self._multi_upload_files_to_s3(file_objects=images_resize, bucket=bucket_public)
-        await self._multi_delete_files_to_s3(
-            file_urls=images_delete,
-            bucket=settings.s3_settings.bucket_public,
+        await self._multi_upload_files_to_s3(file_objects=thumbnail_files, bucket=settings.s3_settings.bucket_public)
+        return thumbnail_urls | {"original_url": original_url}
+
+    async def _find_image_variants(
+        self,
+        session: AsyncSession,
+        content_hashes: Iterable[str],
+    ) -> dict[str, dict[str, str]]:
+        """Отдаёт уже созданные варианты изображений по content_hash."""
+        result = await session.execute(
+            select(ImageVariantsInDB).where(ImageVariantsInDB.content_hash.in_(content_hashes)),
         )
+        return {image_variants.content_hash: image_variants.variants for image_variants in result.scalars().all()}
+
+    async def _save_image_variants(self, session: AsyncSession, image_variants: dict[str, dict[str, str]]) -> None:
+        """Сохраняет варианты изображений. Варианты, параллельно сохранённые другим запросом, не перезаписываются."""
+        if image_variants:
+            await session.execute(
+                insert(ImageVariantsInDB)
+                .values(
+                    [
+                        {"content_hash": content_hash, "variants": variants}
+                        for content_hash, variants in image_variants.items()
+                    ]
+                )
+                .on_conflict_do_nothing(index_elements=["content_hash"])
+            )
+
+    async def _get_image_variants(self, images: dict[str, bytes]) -> dict[str, dict[str, str]]:
+        """Отдаёт варианты изображений по content_hash, создавая отсутствующие.
+
+        Для уже известных хэшей декодирование, ресайз и загрузка в хранилище не выполняются.
+        """
+        if not images:
+            return {}
+        image_variants = await self._find_image_variants(self.session, images)
+        new_images = {
+            content_hash: image for content_hash, image in images.items() if content_hash not in image_variants
+        }
+        await dequeue_storage_garbage(self.session, settings.s3_settings.bucket_public, new_images)
+        created_image_variants = dict(
+            zip(
+                new_images,
+                await self._gather_in_window(
+                    [self._create_image_variants(content_hash, image) for content_hash, image in new_images.items()],
+                    window=settings.image_settings.request_window,
+                ),
+            )
+        )
+        await self._save_image_variants(self.session, created_image_variants)
+        return image_variants | created_image_variants
+
+    def _set_image_variants(
+        self,
+        product_image_in_db: ProductImageInDB,
+        content_hash: str,
+        variants: dict[str, str],
+    ) -> None:
+        """Проставляет изображению продукта URL готовых вариантов."""
+        product_image_in_db.content_hash = content_hash
+        for size_title in image_sizes:
+            setattr(product_image_in_db, size_title, variants.get(size_title, default_image_url))
+        for webp_field in image_webp_fields.values():
+            setattr(product_image_in_db, webp_field, variants.get(webp_field))
+        product_image_in_db.original_url = variants.get("original_url")
+        product_image_in_db.processing_status = ImageProcessingStatus.ready
+
+    async def _update_product_images(self, product_in_db: ProductInDB, update_product_images: list[dict]) -> None:
+        """Обновляет изображения продукта."""
+        product_images_in_db = {product_image.id: product_image for product_image in product_in_db.images}
+        content_hashes = {}
+        images = {}
+        for update_product_image in update_product_images:
+            if image := update_product_image.get("image"):
+                content_hash = self.thumbnail_engine.get_content_hash(image["file"])
+                content_hashes[update_product_image["id"]] = content_hash
+                images[content_hash] = image["file"]
+        image_variants = await self._get_image_variants(images)
+        released_images = []
+        for update_product_image in update_product_images:
+            product_image_in_db: ProductImageInDB = product_images_in_db[update_product_image["id"]]
+            product_image_in_db.order_num = update_product_image["order_num"]
+            if content_hash := content_hashes.get(update_product_image["id"]):
+                released_images.append(
+                    (product_image_in_db.content_hash, self._get_product_image_urls(product_image_in_db))
+                )
+                self._set_image_variants(product_image_in_db, content_hash, image_variants[content_hash])
+        await self._delete_released_image_files(released_images)
 
     async def _create_product_images(
         self,
         create_product_images: list[dict],
         product_id: UUID,
-    ) -> None:
-        """Создаёт изображения продукта."""
+        background_tasks: BackgroundTasks | None = None,
+    ) -> list[ProductImageInDB]:
+        """Создаёт изображения продукта.
+
+        При включённом IMAGE_DEFERRED_THUMBNAILS и переданных background_tasks миниатюры создаются в фоне.
+        """
+        if settings.image_settings.deferred_thumbnails and background_tasks is not None:
+            return await self._create_deferred_product_images(create_product_images, product_id, background_tasks)
+        content_hashes = [
+            self.thumbnail_engine.get_content_hash(create_product_image["image"]["file"])
+            for create_product_image in create_product_images
+        ]
+        image_variants = await self._get_image_variants(
+            {
+                content_hash: create_product_image["image"]["file"]
+                for content_hash, create_product_image in zip(content_hashes, create_product_images)
+            }
+        )
         product_images = []
-        images_resize = []
+        for create_product_image, content_hash in zip(create_product_images, content_hashes):
+            product_image = ProductImageInDB(order_num=create_product_image["order_num"], product_id=product_id)
+            self._set_image_variants(product_image, content_hash, image_variants[content_hash])
+            product_images.append(product_image)
+        return product_images
+
+    async def _create_deferred_product_images(
+        self,
+        create_product_images: list[dict],
+        product_id: UUID,
+        background_tasks: BackgroundTasks,
+    ) -> list[ProductImageInDB]:
+        """Загружает оригиналы изображений и ставит создание миниатюр в фоновую задачу.
+
+        Изображения с уже известным content_hash сразу получают готовые варианты. Остальные до окончания
+        обработки имеют статус processing и URL изображения по умолчанию.
+        """
+        content_hashes = [
+            self.thumbnail_engine.get_content_hash(create_product_image["image"]["file"])
+            for create_product_image in create_product_images
+        ]
+        image_variants = await self._find_image_variants(self.session, content_hashes)
+        product_images = []
+        originals = {}
+        deferred_images = []
         url = settings.s3_settings.url
         bucket_public = settings.s3_settings.bucket_public
-        for create_product_image in create_product_images:
+        for create_product_image, content_hash in zip(create_product_images, content_hashes):
             image = create_product_image["image"]
-            image_resize = Image.open(BytesIO(image["file"]))
-            image_format = image_resize.format
-            data_product_image = {
-                "order_num": create_product_image["order_num"],
-                "product_id": product_id,
+            product_image = ProductImageInDB(order_num=create_product_image["order_num"], product_id=product_id)
+            product_images.append(product_image)
+            if content_hash in image_variants:
+                self._set_image_variants(product_image, content_hash, image_variants[content_hash])
+                continue
+            storage_path = f"products/images/original_url/{content_hash}.{image['file_format'].lower()}"
+            product_image.content_hash = content_hash
+            product_image.original_url = join(url, bucket_public, "temp", storage_path)
+            product_image.processing_status = ImageProcessingStatus.processing
+            originals[storage_path] = FileObject(
+                storage_path=storage_path,
+                file_object=BytesIO(image["file"]),
+                immutable=True,
+            )
+            deferred_images.append((product_image.id, content_hash, image["file"]))
+        await dequeue_storage_garbage(
+            self.session, bucket_public, {content_hash for _, content_hash, _ in deferred_images}
+        )
+        await self._multi_upload_files_to_s3(file_objects=list(originals.values()), bucket=bucket_public)
+        if deferred_images:
+            background_tasks.add_task(self._process_deferred_product_images, deferred_images)
+        return product_images
+
+    async def _process_deferred_product_images(self, images: list[tuple[UUID, str, bytes]]) -> None:
+        """Создаёт миниатюры отложенных изображений и сохраняет их URL.
+
+        Выполняется после отправки ответа, когда сессия запроса уже закрыта, поэтому использует свою сессию.
+        При любой ошибке изображения, оставшиеся в статусе processing, получают статус failed.
+        """
+        try:
+            await self._create_deferred_image_variants(images)
+        except Exception as err:
+            error("Ошибка при обработке отложенных изображений", exc_info=err)
+            await self._fail_deferred_product_images([image_id for image_id, _, _ in images])
+
+    async def _fail_deferred_product_images(self, image_ids: list[UUID]) -> None:
+        """Переводит необработанные отложенные изображения в статус failed."""
+        try:
+            async with async_session() as session:
+                await session.execute(
+                    update(ProductImageInDB)
+                    .where(
+                        ProductImageInDB.id.in_(image_ids),
+                        ProductImageInDB.processing_status == ImageProcessingStatus.processing,
+                    )
+                    .values(processing_status=ImageProcessingStatus.failed)
+                )
+                await session.commit()
+        except Exception as err:
+            error(f"Не удалось отметить отложенные изображения {image_ids} как failed", exc_info=err)
+
+    async def _create_deferred_image_variants(self, images: list[tuple[UUID, str, bytes]]) -> None:
+        """Создаёт и сохраняет варианты отложенных изображений в отдельной сессии."""
+        async with async_session() as session:
+            result = await session.execute(
+                select(ProductImageInDB).where(ProductImageInDB.id.in_([image_id for image_id, _, _ in images]))
+            )
+            product_images_in_db = {product_image.id: product_image for product_image in result.scalars().all()}
+            # Изображения, удалённые до начала обработки, пропускаются.
+            deferred_images = [
+                (product_images_in_db[image_id], content_hash, image)
+                for image_id, content_hash, image in images
+                if image_id in product_images_in_db
+            ]
+            image_variants = await self._find_image_variants(
+                session, {content_hash for _, content_hash, _ in deferred_images}
+            )
+            new_images = {
+                content_hash: (image, product_image_in_db.original_url)
+                for product_image_in_db, content_hash, image in deferred_images
+                if content_hash not in image_variants
             }
-            for size_title, size_value in image_sizes.items():
-                in_mem_resize_image = self._thumbnail_images(size_value, image_format, image_resize)
-                storage_path = f"products/images/{size_title}/{str(uuid4())}.{image_format.lower()}"
-                data_product_image[size_title] = join(url, bucket_public, "temp", storage_path)
-                images_resize.append(
-                    FileObject(
-                        storage_path=storage_path,
-                        file_object=in_mem_resize_image,
+            await dequeue_storage_garbage(session, settings.s3_settings.bucket_public, new_images)
+            results = await self._gather_in_window(
+                [
+                    self._create_image_variants(content_hash, image, original_url)
+                    for content_hash, (image, original_url) in new_images.items()
+                ],
+                window=settings.image_settings.request_window,
+                return_exceptions=True,
+            )
+            created_image_variants = {}
+            for content_hash, variants in zip(new_images, results):
+                if isinstance(variants, Exception):
+                    error(f"Ошибка при создании миниатюр изображения {content_hash}", exc_info=variants)
+                    continue
+                created_image_variants[content_hash] = variants
+            await self._save_image_variants(session, created_image_variants)
+            image_variants |= created_image_variants
+            for product_image_in_db, content_hash, _ in deferred_images:
+                if content_hash in image_variants:
+                    self._set_image_variants(product_image_in_db, content_hash, image_variants[content_hash])
+                else:
+                    product_image_in_db.processing_status = ImageProcessingStatus.failed
+            await session.commit()
+            # Изображения товара в продаже пропускались при переносе, пока создавались их миниатюры.
+            result = await session.execute(
+                select(ProductInDB).where(
+                    ProductInDB.id.in_(
+                        {product_image_in_db.product_id for product_image_in_db, _, _ in deferred_images}
+                    ),
+                    ProductInDB.status == ProductStatus.on_sale,
+                )
+            )
+            for product_in_db in result.scalars().all():
+                await self._promote_product_files(session, product_in_db)
+            await session.commit()
+
+    async def upload_file(self, seller_id: UUID, kind: UploadedFileKind, file: UploadFile) -> UploadedFileInDB:
+        """Загружает файл продавца в хранилище потоком, не читая его целиком в память.
+
+        Загруженный файл привязывается к товару по ID при создании или изменении товара.
+        Тип файла определяется по его содержимому, заголовок Content-Type клиента не учитывается.
+        """
+        max_size = getattr(settings.upload_settings, f"max_{kind.name}_size")
+        if (file.size or 0) > max_size:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail={"file": f"the file must not exceed {max_size} bytes"},
+            )
+        content_type = self._get_upload_content_type(file.file)
+        if content_type not in upload_content_types[kind.name]:
+            raise HTTPException(
+                status_code=422, detail={"file": f"unsupported content type {content_type or file.content_type}"}
+            )
+        if kind == UploadedFileKind.image:
+            try:
+                validate_image(file.file)
+            except ImageValidationError as err:
+                raise HTTPException(status_code=422, detail={"file": str(err)})
+        extension = content_type.split("/")[1]
+        uploaded_file_in_db = UploadedFileInDB(
+            seller_id=seller_id,
+            kind=kind,
+            name=file.filename or f"{kind.name}.{extension}",
+            extension=extension,
+            content_type=content_type,
+            size=file.size or 0,
+        )
+        # Документы сразу кладутся по своему итоговому ключу, изображения — только как исходники для миниатюр.
+        if kind == UploadedFileKind.document:
+            storage_path = f"products/documents/{uploaded_file_in_db.id}.{extension}"
+        else:
+            storage_path = f"uploads/images/{uploaded_file_in_db.id}.{extension}"
+        uploaded_file_in_db.key = join("temp", storage_path)
+        await self._upload_file_to_s3(
+            file_object=FileObject(storage_path=storage_path, file_object=file.file),
+            bucket=settings.s3_settings.bucket_private,
+            public=False,
+        )
+        return await self._create_one(uploaded_file_in_db)
+
+    def _get_upload_content_type(self, file: BinaryIO) -> str | None:
+        """Определяет тип загруженного файла по сигнатуре в его начале."""
+        position = file.tell()
+        prefix = file.read(max(len(signature) for signature in upload_signatures))
+        file.seek(position)
+        for signature, content_type in upload_signatures.items():
+            if prefix.startswith(signature):
+                return content_type
+        return None
+
+    async def _get_uploaded_files(
+        self,
+        seller_id: UUID,
+        kind: UploadedFileKind,
+        file_ids: list[UUID],
+    ) -> dict[UUID, UploadedFileInDB]:
+        """Отдаёт загруженные продавцом файлы по ID."""
+        if not file_ids:
+            return {}
+        result = await self.session.execute(
+            select(UploadedFileInDB).where(
+                UploadedFileInDB.id.in_(file_ids),
+                UploadedFileInDB.seller_id == seller_id,
+                UploadedFileInDB.kind == kind,
+            )
+        )
+        uploaded_files = {uploaded_file.id: uploaded_file for uploaded_file in result.scalars().all()}
+        list_errors = [
+            {"file_id": self.does_not_exist_message.format(file_id)}
+            for file_id in file_ids
+            if file_id not in uploaded_files
+        ]
+        if list_errors:
+            raise HTTPException(status_code=422, detail=list_errors)
+        return uploaded_files
+
+    async def _read_uploaded_images(self, seller_id: UUID, images: list[dict]) -> None:
+        """Подставляет изображениям с file_id содержимое загруженных файлов.
+
+        Загруженные файлы расходуются: запись удаляется вместе с изменениями товара, исходник — из хранилища.
+        """
+        images_with_file_id = [image for image in images if image.get("file_id")]
+        uploaded_files = await self._get_uploaded_files(
+            seller_id, UploadedFileKind.image, [image["file_id"] for image in images_with_file_id]
+        )
+        bucket_private = settings.s3_settings.bucket_private
+        contents = dict(
+            zip(
+                uploaded_files,
+                await asyncio.gather(
+                    *(
+                        self._read_file_in_s3(uploaded_file.key, bucket_private)
+                        for uploaded_file in uploaded_files.values()
                     )
+                ),
+            )
+        )
+        for image in images_with_file_id:
+            uploaded_file = uploaded_files[image["file_id"]]
+            image["image"] = {
+                "file": contents[uploaded_file.id],
+                "content_type": uploaded_file.content_type,
+                "file_format": uploaded_file.extension,
+            }
+        for uploaded_file in uploaded_files.values():
+            await self.session.delete(
+                instance=uploaded_file,
+            )
+        await self._delete_files_later(
+            file_urls=[uploaded_file.key for uploaded_file in uploaded_files.values()],
+            bucket=bucket_private,
+        )
+
+    async def get_image_variant(
+        self,
+        image_id: UUID,
+        width: int,
+        height: int,
+        image_format: str,
+        client_host: str | None = None,
+    ) -> RedirectResponse:
+        """Перенаправляет на вариант изображения заданного размера и формата.
+
+        Вариант создаётся из оригинала при первом запросе, сохраняется в хранилище и в variants
+        записи image_variants (и удаляется вместе с ней), а его URL кэшируется.
+        Ширина и высота берутся из IMAGE_VARIANT_SIZES, новых вариантов на изображение не больше
+        IMAGE_MAX_VARIANTS_PER_IMAGE, а один клиент создаёт не больше IMAGE_VARIANT_RATE_LIMIT вариантов
+        за IMAGE_VARIANT_RATE_WINDOW секунд.
+        """
+        image_settings = settings.image_settings
+        if image_format not in image_variant_formats:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+        if width not in image_settings.variant_sizes or height not in image_settings.variant_sizes:
+            raise HTTPException(
+                status_code=422,
+                detail={"size": f"the width and height must be one of {image_settings.variant_sizes}"},
+            )
+        # Отпечаток профиля кодирования в имени: после его смены вариант перекодируется под новым ключом.
+        profile_hash = self.thumbnail_engine.get_variant_profile_hash(image_variant_formats[image_format])
+        variant_name = f"{width}x{height}.{profile_hash}.{image_format}"
+        cache_key = f"image_variant:{image_id}:{variant_name}"
+        if variant_url := await self.cache.get_value(cache_key):
+            return RedirectResponse(url=variant_url.decode() if isinstance(variant_url, bytes) else variant_url)
+        product_image_in_db: ProductImageInDB = await self._get_one(
+            statement=select(ProductImageInDB).where(
+                ProductImageInDB.id == image_id,
+                ProductImageInDB.processing_status == ImageProcessingStatus.ready,
+                ProductImageInDB.content_hash.is_not(None),
+            )
+        )
+        content_hash = product_image_in_db.content_hash
+        image_variants_in_db: ImageVariantsInDB = await self._get_one(
+            statement=select(ImageVariantsInDB).where(ImageVariantsInDB.content_hash == content_hash)
+        )
+        variant_url = image_variants_in_db.variants.get(variant_name)
+        if variant_url is None:
+            original_url = image_variants_in_db.variants.get("original_url")
+            if original_url is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+            if self._count_on_demand_variants(image_variants_in_db.variants) >= image_settings.max_variants_per_image:
+                raise HTTPException(
+                    status_code=422,
+                    detail={"size": f"no more than {image_settings.max_variants_per_image} sizes of an image"},
                 )
-            product_images.append(ProductImageInDB(**data_product_image))
-        await self._multi_upload_files_to_s3(file_objects=images_resize, bucket=bucket_public)
-        self.session.add_all(
-            instances=product_images,
+            if not await get_image_variant_rate_limiter().hit(self.cache, client_host or "unknown"):
+                raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS)
+            variant_url = await self._create_image_variant(
+                content_hash, original_url, variant_name, (width, height), image_format
+            )
+        await self.cache.set_value(cache_key, variant_url)
+        return RedirectResponse(url=variant_url)
+
+    async def _create_image_variant(
+        self,
+        content_hash: str,
+        original_url: str,
+        variant_name: str,
+        size_value: tuple[int, int],
+        image_format: str,
+    ) -> str:
+        """Создаёт вариант изображения из оригинала, сохраняет его в хранилище и в image_variants.
+
+        Отдаёт URL варианта.
+        """
+        bucket_public = settings.s3_settings.bucket_public
+        original = await self._read_file_in_s3(original_url.split(f"{bucket_public}/")[-1], bucket_public)
+        thumbnail = await self.thumbnail_engine.create_variant(
+            original, size_value, image_variant_formats[image_format]
+        )
+        storage_path = f"products/images/variants/{content_hash}/{variant_name}"
+        temp_url = join(settings.s3_settings.url, bucket_public, "temp/")
+        # Варианты перенесённого в постоянное хранилище изображения сразу создаются рядом с ним.
+        temp = original_url.startswith(temp_url)
+        await self._upload_file_to_s3(
+            file_object=FileObject(
+                storage_path=storage_path,
+                file_object=BytesIO(thumbnail.content),
+                immutable=True,
+            ),
+            bucket=bucket_public,
+            public=True,
+            temp=temp,
         )
+        # Перенос изображения мог завершиться, пока создавался вариант. Под блокировкой записи перенос
+        # не идёт, поэтому расположение оригинала перечитывается и вариант при необходимости переносится.
+        image_variants_in_db: ImageVariantsInDB = await self._get_one(
+            statement=select(ImageVariantsInDB)
+            .where(ImageVariantsInDB.content_hash == content_hash)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        if temp and not image_variants_in_db.variants.get("original_url", "").startswith(temp_url):
+            try:
+                await self.storage.copy(bucket_public, join("temp", storage_path), storage_path, public=True)
+            except Exception as err:
+                raise HTTPException(500, detail=f"Ошибка при переносе варианта изображения: {str(err)}")
+            temp = False
+        variant_url = join(settings.s3_settings.url, bucket_public, "temp" if temp else "", storage_path)
+        # Вариант дописывается к JSON одним UPDATE: параллельные запросы других размеров не затирают друг друга.
+        await self.session.execute(
+            update(ImageVariantsInDB)
+            .where(ImageVariantsInDB.content_hash == content_hash)
+            .values(
+                variants=cast(
+                    cast(ImageVariantsInDB.variants, JSONB).op("||")(
+                        func.jsonb_build_object(variant_name, variant_url)
+                    ),
+                    JSON,
+                )
+            )
+        )
+        await self.session.commit()
+        return variant_url
+
+    def _count_on_demand_variants(self, variants: dict[str, str]) -> int:
+        """Отдаёт количество вариантов изображения, созданных по запросу."""
+        thumbnail_fields = {*image_sizes, *image_webp_fields.values(), "original_url"}
+        return sum(1 for variant_name in variants if variant_name not in thumbnail_fields)
 
     async def _upload_product_images(
         self,
         product_in_db: ProductInDB,
         images: list[dict],
+        background_tasks: BackgroundTasks | None = None,
     ) -> None:
         """Обновляет изображения продукта."""
         list_link_fields = [(("id", ProductImageInDB, image.get("id")),) for image in images]
         await self._list_validation_link_fields(list_link_fields)
-        product_images = product_in_db.images
+        await self._read_uploaded_images(product_in_db.seller_id, images)
         delete_product_images, update_product_images, create_product_images = self._get_delete_update_create_images(
-            product_images, images
+            product_in_db.images, images
+        )
+        # Новые изображения добавляются до освобождения старых: файлы с их content_hash, повторно
+        # загруженные в этом же запросе, остаются в использовании и не удаляются.
+        product_in_db.images.extend(
+            await self._create_product_images(create_product_images, product_in_db.id, background_tasks)
         )
-        await self._create_product_images(create_product_images, product_in_db.id)
-        await self._update_product_images(update_product_images)
-        await self._delete_product_images(delete_product_images)
+        await self._update_product_images(product_in_db, update_product_images)
+        await self._delete_product_images(product_in_db, delete_product_images)
 
     async def _create_product_documents(
         self,
         create_product_documents: list[dict],
         product_id: UUID,
-    ) -> None:
+        seller_id: UUID,
+    ) -> list[ProductDocumentInDB]:
         """Создаёт документы продукта."""
         product_documents = []
         documents_objects = []
         bucket_private = settings.s3_settings.bucket_private
+        uploaded_files = await self._get_uploaded_files(
+            seller_id,
+            UploadedFileKind.document,
+            [document["file_id"] for document in create_product_documents if document.get("file_id")],
+        )
         for create_product_document in create_product_documents:
+            if file_id := create_product_document.get("file_id"):
+                uploaded_file = uploaded_files[file_id]
+                product_documents.append(
+                    ProductDocumentInDB(
+                        product_id=product_id,
+                        key=uploaded_file.key,
+                        extension=uploaded_file.extension,
+                        name=create_product_document["name"] or uploaded_file.name,
+                    )
+                )
+                continue
             document = create_product_document["document"]
             data_product_document = {
                 "product_id": product_id,
@@ -296,30 +823,34 @@ class Service(Base):
                 )
             )
             product_documents.append(ProductDocumentInDB(**data_product_document))
+        for uploaded_file in uploaded_files.values():
+            await self.session.delete(
+                instance=uploaded_file,
+            )
         await self._multi_upload_files_to_s3(
             file_objects=documents_objects,
             bucket=bucket_private,
             public=False,
         )
-        self.session.add_all(
-            instances=product_documents,
-        )
+        return product_documents
 
-    async def _delete_product_documents(self, delete_product_documents: list[UUID]) -> None:
+    async def _delete_product_documents(
+        self,
+        product_in_db: ProductInDB,
+        delete_product_documents: list[UUID],
+    ) -> None:
         """Удаляет документы продукта."""
-        product_documents_in_db: list[ProductDocumentInDB] = await self._get_all(
-            statement=select(ProductDocumentInDB).where(
-                ProductDocumentInDB.id.in_(delete_product_documents),
-            ),
-            count=1,
-        )
+        product_documents_in_db = [
+            document for document in product_in_db.documents if document.id in delete_product_documents
+        ]
         documents_delete = []
         for product_document_in_db in product_documents_in_db:
             documents_delete.append(product_document_in_db.key)
+            product_in_db.documents.remove(product_document_in_db)
             await self.session.delete(
                 instance=product_document_in_db,
             )
-        await self._multi_delete_files_to_s3(
+        await self._delete_files_later(
             file_urls=documents_delete,
             bucket=settings.s3_settings.bucket_private,
         )
@@ -360,16 +891,18 @@ class Service(Base):
             product_documents,
             documents,
         )
-        await self._create_product_documents(create_product_documents, product_in_db.id)
-        await self._delete_product_documents(delete_product_documents)
+        await self._delete_product_documents(product_in_db, delete_product_documents)
+        product_in_db.documents.extend(
+            await self._create_product_documents(create_product_documents, product_in_db.id, product_in_db.seller_id)
+        )
 
     async def create_product(
         self,
         seller_id: UUID,
         product: ProductCreate,
+        background_tasks: BackgroundTasks | None = None,
     ) -> ProductInDB:
-        product_dict_without_nested_schemas: dict[str:Any] = jsonable_encoder(
-            product,
+        product_dict_without_nested_schemas: dict[str:Any] = product.model_dump(
             exclude={"images", "manually_filled_specification", "pack", "price", "documents", "messages"},
             exclude_unset=True,
         )
@@ -389,6 +922,11 @@ class Service(Base):
         product_in_db = ProductInDB(**product_dict_without_nested_schemas)
         self.session.add(product_in_db)
 
+        # Коллекции нового товара заполняются сразу, чтобы ответ собирался без повторного чтения из БД.
+        product_in_db.images = []
+        product_in_db.documents = []
+        product_in_db.messages = []
+
         product_in_db.manually_filled_specification = ProductManuallyFilledSpecificationInDB(
             **product.manually_filled_specification.model_dump()
         )
@@ -400,14 +938,14 @@ class Service(Base):
         if images:
             images = [image.model_dump() for image in images]
             self._validation_order_num([image["order_num"] for image in images])
-            await self._create_product_images(images, product_in_db.id)
+            await self._read_uploaded_images(seller_id, images)
+            product_in_db.images = await self._create_product_images(images, product_in_db.id, background_tasks)
         if documents:
             documents = [document.model_dump() for document in documents]
-            await self._create_product_documents(documents, product_in_db.id)
+            product_in_db.documents = await self._create_product_documents(documents, product_in_db.id, seller_id)
 
         try:
             await self.session.commit()
-            await self.session.refresh(product_in_db)
         except Exception as exc:
             raise HTTPException(status_code=422, detail=f"{exc}")
 
@@ -417,8 +955,17 @@ class Service(Base):
         self,
         document_id: UUID,
         seller_id: UUID,
-    ) -> Response:
-        """Отдаёт документ по продукту."""
+        byte_range: str | None = None,
+        delivery: DocumentDelivery = DocumentDelivery.stream,
+    ) -> StreamingResponse | RedirectResponse | DocumentUrl:
+        """Отдаёт документ по продукту.
+
+        stream: потоком через сервис. Поддерживается один диапазон заголовка Range
+        (bytes=start-end, bytes=start-, bytes=-suffix): тогда из хранилища читается только он
+        и возвращается ответ 206. Остальные формы Range игнорируются.
+        redirect, url: после проверки доступа возвращает редирект 307 или JSON с короткоживущей
+        подписанной ссылкой, и файл скачивается клиентом напрямую из хранилища.
+        """
         document_in_db: ProductDocumentInDB = await self._get_one(
             select(ProductDocumentInDB)
             .options(joinedload(ProductDocumentInDB.product))
@@ -427,9 +974,43 @@ class Service(Base):
             ),
         )
         self._check_access_to_product(document_in_db.product, seller_id)
+        filename = document_in_db.name
+        if not filename.lower().endswith(f".{document_in_db.extension.lower()}"):
+            filename = f"{filename}.{document_in_db.extension}"
+        content_type = guess_type(filename)[0] or "application/octet-stream"
+        content_disposition = f"attachment; filename*=UTF-8''{quote(filename)}"
         bucket_private = settings.s3_settings.bucket_private
-        file = await self._get_file_in_s3(document_in_db.key, bucket_private)
-        return Response(content=file["Body"].read(), status_code=status.HTTP_200_OK)
+        if delivery != DocumentDelivery.stream:
+            expires_in = settings.s3_settings.presigned_url_expires
+            url = await self._get_presigned_url_in_s3(
+                document_in_db.key,
+                bucket_private,
+                expires_in,
+                ResponseContentType=content_type,
+                ResponseContentDisposition=content_disposition,
+            )
+            if delivery == DocumentDelivery.redirect:
+                return RedirectResponse(url=url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+            return DocumentUrl(url=url, expires_in=expires_in)
+        if byte_range and not byte_range_pattern.match(byte_range):
+            byte_range = None
+        try:
+            file = await self._get_file_in_s3(document_in_db.key, bucket_private, byte_range)
+        except StorageRangeError:
+            raise HTTPException(status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        headers = {
+            "Accept-Ranges": "bytes",
+            "Content-Length": str(file.content_length),
+            "Content-Disposition": content_disposition,
+        }
+        if file.content_range:
+            headers["Content-Range"] = file.content_range
+        return StreamingResponse(
+            content=file.body,
+            status_code=status.HTTP_206_PARTIAL_CONTENT if file.content_range else status.HTTP_200_OK,
+            media_type=content_type,
+            headers=headers,
+        )
 
     async def delete(
         self,
@@ -577,22 +1158,16 @@ class Service(Base):
         for field_name, field_value in values.items():
             setattr(obj, field_name, field_value)
 
-    async def _update_values_to_objects_link_product(
+    def _update_values_to_objects_link_product(
         self,
-        data_objects: tuple[tuple[SQLModel, dict[str, Any]]],
-        product_id: UUID,
+        data_objects: tuple[tuple[str, dict[str, Any]]],
+        product_in_db: ProductInDB,
     ) -> None:
         """Обновляет значения объектам, ссылающие на продукт."""
-        for model, values in data_objects:
+        for relationship_name, values in data_objects:
             if not values:
                 continue
-            obj_in_db: SQLModel = await self._get_one(
-                statement=select(
-                    model,
-                ).where(
-                    model.product_id == product_id,
-                )
-            )
+            obj_in_db: SQLModel = getattr(product_in_db, relationship_name)
             self._update_values_to_fields_model_object(obj_in_db, values)
 
     async def _update_values_to_product(
@@ -631,25 +1206,29 @@ class Service(Base):
         seller_id: UUID,
         product_id: UUID,
         product: ProductUpdate,
+        background_tasks: BackgroundTasks | None = None,
     ) -> ProductInDB:
         product: dict[str, Any] = product.model_dump(exclude_unset=True)
         data_objects_link_product = (
-            (ProductPriceInDB, product.pop("price", None)),
-            (ProductPackInDB, product.pop("pack", None)),
-            (ProductManuallyFilledSpecificationInDB, product.pop("manually_filled_specification", None)),
+            ("price", product.pop("price", None)),
+            ("pack", product.pop("pack", None)),
+            ("manually_filled_specification", product.pop("manually_filled_specification", None)),
         )
         images = product.pop("images", None)
         documents = product.pop("documents", None)
         product_in_db = await self._update_values_to_product(product_id, seller_id, product)
-        await self._update_values_to_objects_link_product(data_objects_link_product, product_id)
+        self._update_values_to_objects_link_product(data_objects_link_product, product_in_db)
         if documents is not None:
             await self._upload_product_documents(product_in_db, documents)
         if images is not None:
-            await self._upload_product_images(product_in_db, images)
+            await self._upload_product_images(product_in_db, images, background_tasks)
 
         self.session.add(instance=product_in_db)
+        if product_in_db.status == ProductStatus.on_sale and (images is not None or documents is not None):
+            # Файлы, добавленные к товару в продаже, сразу переносятся в постоянное хранилище.
+            await self.session.flush()
+            await self._promote_product_files(self.session, product_in_db)
         await self.session.commit()
-        await self.session.refresh(instance=product_in_db)
         return product_in_db
 
     async def get_products_prices(
@@ -664,6 +1243,97 @@ class Service(Base):
         )
         return prices_in_db
 
+    async def _promote_product_files(self, session: AsyncSession, product_in_db: ProductInDB) -> None:
+        """Переносит файлы товара из temp/ в постоянное хранилище.
+
+        Файлы копируются на стороне хранилища параллельно, не больше S3_REQUEST_WINDOW копий одновременно,
+        затем ссылки на них переписываются одним UPDATE на таблицу в транзакции session.
+        Файлы изображений общие для всех изображений с одним content_hash, поэтому ссылки переписываются
+        у всех таких изображений и в их вариантах. Копии в temp/ без ссылок удаляет сверка storage_gc.
+        Изображения, миниатюры которых ещё создаются, переносятся по окончании их обработки.
+        """
+        url = settings.s3_settings.url
+        bucket_public = settings.s3_settings.bucket_public
+        bucket_private = settings.s3_settings.bucket_private
+        temp_url = join(url, bucket_public, "temp/")
+        permanent_url = join(url, bucket_public, "")
+        product_images = [
+            product_image
+            for product_image in product_in_db.images
+            if product_image.processing_status != ImageProcessingStatus.processing
+        ]
+        content_hashes = {product_image.content_hash for product_image in product_images if product_image.content_hash}
+        image_urls = {
+            image_url for product_image in product_images for image_url in self._get_product_image_urls(product_image)
+        }
+        if content_hashes:
+            # Блокировка вариантов не даёт параллельно созданному варианту потерять ссылку при переписывании JSON.
+            result = await session.execute(
+                select(ImageVariantsInDB).where(ImageVariantsInDB.content_hash.in_(content_hashes)).with_for_update()
+            )
+            for image_variants_in_db in result.scalars().all():
+                image_urls.update(image_variants_in_db.variants.values())
+        image_urls = {image_url for image_url in image_urls if image_url.startswith(temp_url)}
+        documents = [document for document in product_in_db.documents if document.key.startswith("temp/")]
+        if not image_urls and not documents:
+            return
+        copies = [
+            self.storage.copy(bucket_public, key, key.removeprefix("temp/"), public=True)
+            for key in (image_url.split(f"{bucket_public}/")[-1] for image_url in image_urls)
+        ] + [
+            self.storage.copy(bucket_private, document.key, document.key.removeprefix("temp/"), public=False)
+            for document in documents
+        ]
+        try:
+            await self._gather_in_window(copies, window=settings.s3_settings.request_window)
+        except Exception as err:
+            raise HTTPException(500, detail=f"Ошибка при переносе файлов товара: {str(err)}")
+        if image_urls:
+            image_fields = [*image_sizes, *image_webp_fields.values(), "original_url"]
+            await session.execute(
+                update(ProductImageInDB)
+                .where(
+                    or_(
+                        ProductImageInDB.id.in_([product_image.id for product_image in product_images]),
+                        ProductImageInDB.content_hash.in_(content_hashes),
+                    )
+                )
+                .values(
+                    {
+                        image_field: case(
+                            (
+                                getattr(ProductImageInDB, image_field).in_(image_urls),
+                                func.replace(getattr(ProductImageInDB, image_field), temp_url, permanent_url),
+                            ),
+                            else_=getattr(ProductImageInDB, image_field),
+                        )
+                        for image_field in image_fields
+                    }
+                )
+                .execution_options(synchronize_session=False)
+            )
+        if content_hashes:
+            await session.execute(
+                update(ImageVariantsInDB)
+                .where(ImageVariantsInDB.content_hash.in_(content_hashes))
+                .values(
+                    variants=cast(func.replace(cast(ImageVariantsInDB.variants, Text), temp_url, permanent_url), JSON)
+                )
+                .execution_options(synchronize_session=False)
+            )
+        if documents:
+            await session.execute(
+                update(ProductDocumentInDB)
+                .where(ProductDocumentInDB.id.in_([document.id for document in documents]))
+                .values(key=func.substr(ProductDocumentInDB.key, len("temp/") + 1))
+                .execution_options(synchronize_session=False)
+            )
+        # Загруженные в сессию изображения и документы товара перечитываются с новыми ссылками.
+        for model in (ProductImageInDB, ProductDocumentInDB):
+            await session.execute(
+                select(model).where(model.product_id == product_in_db.id).execution_options(populate_existing=True)
+            )
+
     async def change_product_status(
         self, product_id: UUID, seller_id: UUID, user_token: str, product_status: ProductStatusForChange
     ) -> Response:
@@ -686,6 +1356,7 @@ class Service(Base):
         product_in_db.is_active = False
         match product_status, product_in_db.status:
             case ProductStatusForChange.on_sale, ProductStatus.ready_for_sale:
+                await self._promote_product_files(self.session, product_in_db)
                 product_info: dict[str, Any] = await self.create_product_info_for_ETL(
                     product_in_db=product_in_db, user_token=user_token
                 )
@@ -724,7 +1395,6 @@ class Service(Base):
 
         self.session.add(product_in_db)
         await self.session.commit()
-        await self.session.refresh(product_in_db)
         return Response()
 
     async def _get_seller_data(self, user_token: str) -> dict[str, Any]:
@@ -784,16 +1454,39 @@ class Service(Base):
             product_in_db (ProductInDB): инстанс товара из базы данных
             user_token (str): токен пользователя
 
+        Данные о продавце берутся из кэша продавцов, если они там есть (см. SellerProfileCache).
+
+        Raises:
+            HTTPException: если внешние сервисы не ответили за ECOM_ETL_DEADLINE секунд
+
         Returns:
             dict[str, Any]: массив данных о товаре в json-сериализируемом формате
         """
-        seller_data: dict[str, Any] = await self._get_seller_data(user_token=user_token)
-        storage_quantity_data: int = await self._get_product_storage_quantity(product_id=product_in_db.id)
+        # Данные о продавце и количество на складе запрашиваются одновременно с общим сроком ожидания.
+        # При ошибке одного из запросов второй отменяется.
+        try:
+            async with asyncio.timeout(settings.ecom_settings.etl_deadline), asyncio.TaskGroup() as task_group:
+                seller_task = task_group.create_task(
+                    get_seller_profile_cache().get(
+                        cache=self.cache,
+                        seller_id=str(product_in_db.seller_id),
+                        fetch=lambda: self._get_seller_data(user_token=user_token),
+                    )
+                )
+                storage_quantity_task = task_group.create_task(
+                    self._get_product_storage_quantity(product_id=product_in_db.id)
+                )
+        except TimeoutError:
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="Внешние сервисы не ответили вовремя при подготовке данных о товаре",
+            )
+        except ExceptionGroup as err:
+            raise err.exceptions[0]
+        seller_data, storage_quantity_data = seller_task.result(), storage_quantity_task.result()
         fields_to_exclude = ["products", "created_at", "updated_at", "category_id"]
-        subcategory_in_db: ProductSubCategoryInDB = product_in_db.subcategory
-        category_in_db: ProductCategoryInDB = await self._get_one(
-            statement=select(ProductCategoryInDB).where(ProductCategoryInDB.id == subcategory_in_db.category_id)
-        )
+        # Категория загружается вместе с подкатегорией товара (lazy="joined").
+        category_in_db: ProductCategoryInDB = product_in_db.subcategory.category
         product_data_schema: ProductForElastic = ProductForElastic.model_validate(product_in_db, from_attributes=True)
         product_data_schema.is_active = True
         product_data: dict[str, Any] = product_data_schema.model_dump(
@@ -0,0 +1,21 @@
+__all__ = (
+    "LocalStorage",
+    "S3",
+    "StorageBackend",
+    "StorageGarbageCollector",
+    "StorageRangeError",
+    "StoredFile",
+    "StoredObject",
+    "byte_range_pattern",
+    "dequeue_storage_garbage",
+    "enqueue_storage_garbage",
+    "get_s3",
+    "get_storage",
+    "get_storage_gc",
+)
+
+from app.storage.backend import StorageBackend, StorageRangeError, StoredFile, StoredObject, byte_range_pattern
+from app.storage.gc import StorageGarbageCollector, dequeue_storage_garbage, enqueue_storage_garbage, get_storage_gc
+from app.storage.local import LocalStorage
+from app.storage.s3 import S3, get_s3
+from app.storage.storage import get_storage
@@ -0,0 +1,100 @@
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, AsyncIterator, BinaryIO, Iterable
+
+byte_range_pattern = re.compile(r"^bytes=(\d+-\d*|-\d+)$")
+
+
+class StorageRangeError(ValueError):
+    """Запрошенный диапазон байт не пересекается с файлом."""
+
+
+def parse_byte_range(byte_range: str, size: int) -> tuple[int, int]:
+    """Отдаёт первый и последний байт диапазона bytes=start-end, bytes=start- или bytes=-suffix."""
+    match = byte_range_pattern.match(byte_range)
+    if match is None:
+        raise StorageRangeError(byte_range)
+    start, end = match.group(1).split("-")
+    if not start:
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start, end = int(start), min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise StorageRangeError(byte_range)
+    return start, end
+
+
+@dataclass
+class StoredFile:
+    """Файл хранилища, читаемый потоком.
+
+    content_range: значение Content-Range, если был запрошен диапазон байт.
+    """
+
+    body: AsyncIterator[bytes]
+    content_length: int
+    content_range: str | None = None
+
+
+@dataclass
+class StoredObject:
+    """Файл в листинге хранилища."""
+
+    key: str
+    last_modified: datetime
+
+
+class StorageBackend(ABC):
+    """Хранилище файлов сервиса: бакеты с файлами по ключам.
+
+    Реализации: S3 (объектное хранилище) и LocalStorage (каталог на диске для разработки
+    и нагрузочных тестов без сетевого хранилища).
+    """
+
+    def start(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    @abstractmethod
+    async def put(
+        self,
+        bucket: str,
+        key: str,
+        file_object: BinaryIO,
+        public: bool,
+        content_type: str | None = None,
+        cache_control: str | None = None,
+    ) -> None:
+        """Сохраняет файл. content_type и cache_control отдаются клиентам в заголовках файла."""
+
+    @abstractmethod
+    async def get(self, bucket: str, key: str, chunk_size: int, byte_range: str | None = None) -> StoredFile:
+        """Открывает файл для чтения потоком частями по chunk_size байт.
+
+        byte_range — значение заголовка Range в форме bytes=start-end, bytes=start- или bytes=-suffix.
+        Если диапазон не пересекается с файлом, поднимает StorageRangeError.
+        """
+
+    @abstractmethod
+    async def copy(self, bucket: str, source_key: str, key: str, public: bool) -> None:
+        """Копирует файл внутри бакета на стороне хранилища вместе с его заголовками."""
+
+    @abstractmethod
+    async def read(self, bucket: str, key: str) -> bytes:
+        """Читает файл целиком."""
+
+    @abstractmethod
+    async def delete_many(self, bucket: str, keys: Iterable[str]) -> set[str]:
+        """Удаляет файлы. Отдаёт ключи, которые удалить не удалось."""
+
+    @abstractmethod
+    async def presign(self, bucket: str, key: str, expires_in: int, **params: Any) -> str:
+        """Временная ссылка на чтение файла. params — параметры ответа (ResponseContentType, ...)."""
+
+    @abstractmethod
+    def list_objects(self, bucket: str, prefix: str) -> AsyncIterator[list[StoredObject]]:
+        """Постранично отдаёт файлы бакета с ключами, начинающимися с prefix."""
@@ -0,0 +1,232 @@
+import asyncio
+import re
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from logging import error, info
+from posixpath import join
+from typing import Awaitable, Callable, Iterable
+
+from sqlalchemy import delete, func, or_, select, union
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import image_sizes, image_webp_fields, settings
+from app.db import async_session
+from app.models import ImageVariantsInDB, ProductDocumentInDB, ProductImageInDB, StorageGarbageInDB, UploadedFileInDB
+from app.storage.backend import StorageBackend
+from app.storage.storage import get_storage
+
+# Ключ advisory-блокировки сверки: сверку выполняет только один воркер одновременно.
+RECONCILE_LOCK_ID = 0x53334743
+# Префиксы файлов сервиса: временные и перенесённые из temp/ в постоянное хранилище. Копии в products/
+# остаются без ссылок, если транзакция переноса откатилась после копирования.
+RECONCILE_PREFIXES = ("temp/", "products/")
+# Хэш содержимого в ключах файлов изображений: products/images/<поле>/<хэш>.<формат>
+# и products/images/variants/<хэш>/<вариант>, в том числе под temp/.
+IMAGE_KEY_CONTENT_HASH = re.compile(r"^(?:temp/)?products/images/[^/]+/([0-9a-f]{64})[./]")
+
+
+async def enqueue_storage_garbage(session: AsyncSession, bucket: str, keys: Iterable[str]) -> None:
+    """Ставит файлы хранилища в очередь на удаление в текущей транзакции сессии.
+
+    Файлы удаляются фоновой сборкой мусора только после фиксации транзакции: если она
+    откатится, файлы останутся на месте вместе со ссылающимися на них записями.
+    """
+    if keys := set(keys):
+        await session.execute(
+            insert(StorageGarbageInDB)
+            .values([{"bucket": bucket, "key": key} for key in keys])
+            .on_conflict_do_nothing(index_elements=["bucket", "key"])
+        )
+
+
+async def dequeue_storage_garbage(session: AsyncSession, bucket: str, content_hashes: Iterable[str]) -> None:
+    """Убирает из очереди на удаление файлы изображений с хэшами content_hashes в текущей транзакции сессии.
+
+    Вызывается перед повторной загрузкой файлов с этими хэшами. Удалённые строки очереди остаются
+    заблокированными до фиксации транзакции, а drain пропускает заблокированные строки, поэтому не удаляет
+    файлы, ссылки на которые ещё не зафиксированы. Если drain уже удаляет эти файлы, вызов ждёт его окончания.
+    """
+    if content_hashes := set(content_hashes):
+        await session.execute(
+            delete(StorageGarbageInDB).where(
+                StorageGarbageInDB.bucket == bucket,
+                or_(*(StorageGarbageInDB.key.like(f"%/{content_hash}%") for content_hash in content_hashes)),
+            )
+        )
+
+
+class StorageGarbageCollector:
+    """Фоновая сборка мусора в хранилище.
+
+    drain удаляет файлы из очереди storage_gc пачками до batch_size ключей.
+    Строки очереди выбираются с FOR UPDATE SKIP LOCKED, поэтому воркеры не удаляют одно и то же.
+    Ключи изображений строятся из хэша содержимого, поэтому перед удалением пачка ещё раз сверяется с БД:
+    файл, на который снова ссылается зафиксированная запись, убирается из очереди без удаления. Запрос,
+    загружающий файлы хэша заново, до загрузки убирает их из очереди сам (dequeue_storage_garbage).
+    reconcile постранично обходит файлы сервиса в бакетах и ставит в очередь файлы
+    старше grace_period, на которые не ссылается ни одна запись в БД, а также файлы продавцов,
+    не привязанные к товару дольше uploaded_file_ttl.
+    """
+
+    def __init__(
+        self,
+        drain_interval: float,
+        reconcile_interval: float,
+        batch_size: int,
+        grace_period: float,
+        uploaded_file_ttl: float,
+    ) -> None:
+        self.drain_interval: float = drain_interval
+        self.reconcile_interval: float = reconcile_interval
+        self.batch_size: int = batch_size
+        self.grace_period: timedelta = timedelta(seconds=grace_period)
+        self.uploaded_file_ttl: timedelta = timedelta(seconds=uploaded_file_ttl)
+        self.tasks: list[asyncio.Task] = []
+
+    @property
+    def storage(self) -> StorageBackend:
+        return get_storage()
+
+    def start(self) -> None:
+        if not self.tasks:
+            self.tasks = [
+                asyncio.create_task(self._run_periodically(self.drain, self.drain_interval)),
+                asyncio.create_task(self._run_periodically(self.reconcile, self.reconcile_interval)),
+            ]
+
+    async def shutdown(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def _run_periodically(self, func: Callable[[], Awaitable[int]], interval: float) -> None:
+        while True:
+            try:
+                await func()
+            except Exception as err:
+                error(f"Storage GC: ошибка в {func.__name__}", exc_info=err)
+            await asyncio.sleep(interval)
+
+    async def drain(self) -> int:
+        """Удаляет файлы из очереди storage_gc. Отдаёт количество удалённых файлов."""
+        deleted = 0
+        # Файлы, которые не удалось удалить, остаются в очереди до следующего прохода.
+        failed_ids = set()
+        while True:
+            async with async_session() as session:
+                result = await session.execute(
+                    select(StorageGarbageInDB)
+                    .where(StorageGarbageInDB.id.not_in(failed_ids))
+                    .order_by(StorageGarbageInDB.created_at)
+                    .limit(self.batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+                garbage = result.scalars().all()
+                keys = defaultdict(set)
+                for garbage_item in garbage:
+                    keys[garbage_item.bucket].add(garbage_item.key)
+                failed_keys = set()
+                for bucket, bucket_keys in keys.items():
+                    # Строки очереди снова используемых файлов удаляются без удаления самих файлов.
+                    bucket_keys -= await self._get_referenced_keys(session, bucket, bucket_keys)
+                    if not bucket_keys:
+                        continue
+                    bucket_failed_keys = await self.storage.delete_many(bucket, bucket_keys)
+                    for key in bucket_failed_keys:
+                        error(f"Storage GC: не удалось удалить {bucket}/{key}")
+                        failed_keys.add((bucket, key))
+                    deleted += len(bucket_keys) - len(bucket_failed_keys)
+                failed_ids.update(item.id for item in garbage if (item.bucket, item.key) in failed_keys)
+                done_ids = [item.id for item in garbage if item.id not in failed_ids]
+                if done_ids:
+                    await session.execute(delete(StorageGarbageInDB).where(StorageGarbageInDB.id.in_(done_ids)))
+                await session.commit()
+            if len(garbage) < self.batch_size:
+                break
+        if deleted:
+            info(f"Storage GC: удалено файлов {deleted}")
+        return deleted
+
+    async def reconcile(self) -> int:
+        """Ставит в очередь на удаление файлы, на которые не ссылается БД. Отдаёт их количество."""
+        orphans = 0
+        async with async_session() as session:
+            if not await session.scalar(select(func.pg_try_advisory_xact_lock(RECONCILE_LOCK_ID))):
+                return orphans
+            now = datetime.now(timezone.utc)
+            result = await session.execute(
+                delete(UploadedFileInDB)
+                .where(UploadedFileInDB.created_at < now - self.uploaded_file_ttl)
+                .returning(UploadedFileInDB.key)
+            )
+            expired_keys = result.scalars().all()
+            await enqueue_storage_garbage(session, settings.s3_settings.bucket_private, expired_keys)
+            orphans += len(expired_keys)
+            for bucket in {settings.s3_settings.bucket_public, settings.s3_settings.bucket_private}:
+                for prefix in RECONCILE_PREFIXES:
+                    async for objects in self.storage.list_objects(bucket, prefix):
+                        keys = {obj.key for obj in objects if obj.last_modified < now - self.grace_period}
+                        orphan_keys = keys - await self._get_referenced_keys(session, bucket, keys)
+                        await enqueue_storage_garbage(session, bucket, orphan_keys)
+                        orphans += len(orphan_keys)
+            await session.commit()
+        if orphans:
+            info(f"Storage GC: поставлено в очередь на удаление файлов без ссылок {orphans}")
+        return orphans
+
+    async def _get_referenced_keys(self, session: AsyncSession, bucket: str, keys: set[str]) -> set[str]:
+        """Отдаёт ключи из keys, на которые ссылаются записи БД.
+
+        Файлы изображений с хэшем содержимого в ключе используются, пока есть изображение или запись
+        image_variants с этим хэшем: они ищутся по индексам content_hash. Изображения без хэша хранят
+        полные URL файлов, документы и загруженные файлы — ключи.
+        """
+        if not keys:
+            return set()
+        key_hashes = {key: match.group(1) for key in keys if (match := IMAGE_KEY_CONTENT_HASH.match(key))}
+        referenced = set()
+        if key_hashes:
+            content_hashes = set(key_hashes.values())
+            result = await session.execute(
+                union(
+                    select(ProductImageInDB.content_hash).where(ProductImageInDB.content_hash.in_(content_hashes)),
+                    select(ImageVariantsInDB.content_hash).where(ImageVariantsInDB.content_hash.in_(content_hashes)),
+                )
+            )
+            referenced_hashes = set(result.scalars().all())
+            referenced = {key for key, content_hash in key_hashes.items() if content_hash in referenced_hashes}
+        if urls := {join(settings.s3_settings.url, bucket, key): key for key in keys - key_hashes.keys()}:
+            image_fields = [*image_sizes, *image_webp_fields.values(), "original_url"]
+            result = await session.execute(
+                union(
+                    *(
+                        select(getattr(ProductImageInDB, image_field)).where(
+                            ProductImageInDB.content_hash.is_(None), getattr(ProductImageInDB, image_field).in_(urls)
+                        )
+                        for image_field in image_fields
+                    )
+                )
+            )
+            referenced |= {urls[url] for url in result.scalars().all()}
+        result = await session.execute(
+            union(
+                select(ProductDocumentInDB.key).where(ProductDocumentInDB.key.in_(keys)),
+                select(UploadedFileInDB.key).where(UploadedFileInDB.key.in_(keys)),
+            )
+        )
+        return referenced | set(result.scalars().all())
+
+
+storage_gc: StorageGarbageCollector = StorageGarbageCollector(
+    drain_interval=settings.storage_gc_settings.drain_interval,
+    reconcile_interval=settings.storage_gc_settings.reconcile_interval,
+    batch_size=settings.storage_gc_settings.batch_size,
+    grace_period=settings.storage_gc_settings.grace_period,
+    uploaded_file_ttl=settings.storage_gc_settings.uploaded_file_ttl,
+)
+
+
+def get_storage_gc() -> StorageGarbageCollector:
+    return storage_gc
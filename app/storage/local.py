@@ -0,0 +1,126 @@
+import asyncio
+import mmap
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from posixpath import join
+from shutil import copyfileobj
+from tempfile import NamedTemporaryFile
+from typing import Any, AsyncIterator, BinaryIO, Iterable
+
+from app.storage.backend import StorageBackend, StoredFile, StoredObject, parse_byte_range
+
+LIST_PAGE_SIZE = 1000
+
+
+class LocalStorage(StorageBackend):
+    """Хранилище в каталоге на диске: файл с ключом key бакета bucket лежит в root/bucket/key.
+
+    Используется в разработке и нагрузочных тестах, чтобы измерять код сервиса без сетевого хранилища.
+    Файлы отдаются потоком из mmap: части берутся прямо из page cache без промежуточного read().
+    presign ничего не подписывает и отдаёт URL файла от url: каталог раздаётся статическим сервером.
+    """
+
+    def __init__(self, root: str, url: str) -> None:
+        self.root: Path = Path(root).resolve()
+        self.url: str = url
+
+    def _get_path(self, bucket: str, key: str) -> Path:
+        path = (self.root / bucket / key).resolve()
+        if not path.is_relative_to(self.root / bucket):
+            raise ValueError(f"Ключ вне бакета: {key}")
+        return path
+
+    async def put(
+        self,
+        bucket: str,
+        key: str,
+        file_object: BinaryIO,
+        public: bool,
+        content_type: str | None = None,
+        cache_control: str | None = None,
+    ) -> None:
+        # Заголовки файлов отдаёт раздающий каталог веб-сервер, поэтому content_type и cache_control не сохраняются.
+        await asyncio.to_thread(self._write, self._get_path(bucket, key), file_object)
+
+    def _write(self, path: Path, file_object: BinaryIO) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Файл пишется во временный и переименовывается: читатели не увидят его частично записанным.
+        with NamedTemporaryFile(dir=path.parent, delete=False) as temp_file:
+            copyfileobj(file_object, temp_file)
+        os.replace(temp_file.name, path)
+
+    async def get(self, bucket: str, key: str, chunk_size: int, byte_range: str | None = None) -> StoredFile:
+        mapped_file = await asyncio.to_thread(self._map, self._get_path(bucket, key))
+        size = len(mapped_file) if mapped_file is not None else 0
+        start, end, content_range = 0, size - 1, None
+        if byte_range:
+            try:
+                start, end = parse_byte_range(byte_range, size)
+            except ValueError:
+                if mapped_file is not None:
+                    mapped_file.close()
+                raise
+            content_range = f"bytes {start}-{end}/{size}"
+        return StoredFile(
+            body=self._iter_mapped_file(mapped_file, start, end, chunk_size),
+            content_length=end - start + 1,
+            content_range=content_range,
+        )
+
+    def _map(self, path: Path) -> mmap.mmap | None:
+        with path.open("rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return None
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    async def _iter_mapped_file(
+        self, mapped_file: mmap.mmap | None, start: int, end: int, chunk_size: int
+    ) -> AsyncIterator[bytes]:
+        if mapped_file is None:
+            return
+        try:
+            for offset in range(start, end + 1, chunk_size):
+                yield mapped_file[offset : min(offset + chunk_size, end + 1)]
+        finally:
+            mapped_file.close()
+
+    async def copy(self, bucket: str, source_key: str, key: str, public: bool) -> None:
+        await asyncio.to_thread(self._copy, self._get_path(bucket, source_key), self._get_path(bucket, key))
+
+    def _copy(self, source_path: Path, path: Path) -> None:
+        with source_path.open("rb") as source_file:
+            self._write(path, source_file)
+
+    async def read(self, bucket: str, key: str) -> bytes:
+        return await asyncio.to_thread(self._get_path(bucket, key).read_bytes)
+
+    async def delete_many(self, bucket: str, keys: Iterable[str]) -> set[str]:
+        return await asyncio.to_thread(self._delete_many, bucket, list(keys))
+
+    def _delete_many(self, bucket: str, keys: list[str]) -> set[str]:
+        failed = set()
+        for key in keys:
+            try:
+                self._get_path(bucket, key).unlink(missing_ok=True)
+            except (OSError, ValueError):
+                failed.add(key)
+        return failed
+
+    async def presign(self, bucket: str, key: str, expires_in: int, **params: Any) -> str:
+        return join(self.url, bucket, key)
+
+    async def list_objects(self, bucket: str, prefix: str) -> AsyncIterator[list[StoredObject]]:
+        objects = await asyncio.to_thread(self._list, bucket, prefix)
+        for start in range(0, len(objects), LIST_PAGE_SIZE):
+            yield objects[start : start + LIST_PAGE_SIZE]
+
+    def _list(self, bucket: str, prefix: str) -> list[StoredObject]:
+        bucket_path = self.root / bucket
+        objects = []
+        for path in sorted(bucket_path.rglob("*")):
+            key = path.relative_to(bucket_path).as_posix()
+            if path.is_file() and key.startswith(prefix):
+                last_modified = datetime.fromtimestamp(path.stat().st_mtime, tz=timezone.utc)
+                objects.append(StoredObject(key=key, last_modified=last_modified))
+        return objects
@@ -0,0 +1,202 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from logging import info
+from threading import Lock
+from time import perf_counter
+from typing import Any, AsyncIterator, BinaryIO, Callable, Iterable
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from app.core.config import settings
+from app.storage.backend import StorageBackend, StorageRangeError, StoredFile, StoredObject
+
+# Ограничение delete_objects на количество ключей в одном запросе.
+DELETE_OBJECTS_LIMIT = 1000
+
+
+class S3(StorageBackend):
+    """Хранилище в s3 с долгоживущим клиентом воркера.
+
+    Клиент создаётся один раз (при старте приложения или при первом обращении)
+    и переиспользуется всеми запросами: построение клиента, разрешение endpoint
+    и пул keep-alive соединений не повторяются на каждую загрузку или удаление.
+
+    Блокирующие вызовы boto3 выполняются через run() в отдельном пуле из executor_size
+    потоков, а не в пуле asyncio.to_thread по умолчанию, поэтому операции с хранилищем
+    не вытесняют другую работу в потоках. Вызовы сверх executor_size ждут освобождения
+    потока, время ожидания пишется в лог.
+
+    transfer_config задаёт загрузку файлов больше multipart_threshold параллельными
+    частями по multipart_chunksize байт в multipart_concurrency потоков. При ошибке
+    загрузки s3transfer прерывает multipart upload (AbortMultipartUpload), и
+    незавершённые части не остаются в хранилище.
+    """
+
+    def __init__(
+        self,
+        max_pool_connections: int,
+        executor_size: int,
+        multipart_threshold: int,
+        multipart_chunksize: int,
+        multipart_concurrency: int,
+    ) -> None:
+        self.max_pool_connections: int = max_pool_connections
+        self.executor_size: int = executor_size
+        self.transfer_config: TransferConfig = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunksize,
+            max_concurrency=multipart_concurrency,
+        )
+        self.slots: asyncio.Semaphore = asyncio.Semaphore(executor_size)
+        self.executor: ThreadPoolExecutor | None = None
+        self._client: Any | None = None
+        self._lock: Lock = Lock()
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            self.start()
+        return self._client
+
+    def start(self) -> None:
+        with self._lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.executor_size, thread_name_prefix="s3")
+            if self._client is None:
+                self._client = boto3.client(
+                    "s3",
+                    endpoint_url=settings.s3_settings.url,
+                    aws_access_key_id=settings.s3_settings.access_key,
+                    aws_secret_access_key=settings.s3_settings.secret_key,
+                    config=Config(max_pool_connections=self.max_pool_connections),
+                )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+            if self.executor is not None:
+                self.executor.shutdown(cancel_futures=True)
+                self.executor = None
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Выполняет блокирующий вызов boto3 в пуле потоков s3."""
+        self.start()
+        queued_at = perf_counter()
+        async with self.slots:
+            queue_wait_time = perf_counter() - queued_at
+            started = perf_counter()
+            result = await asyncio.get_running_loop().run_in_executor(self.executor, partial(func, *args, **kwargs))
+        info(
+            f"S3: {getattr(func, '__name__', func)} queue_wait={queue_wait_time:.3f}s"
+            f" time={perf_counter() - started:.3f}s"
+        )
+        return result
+
+    async def put(
+        self,
+        bucket: str,
+        key: str,
+        file_object: BinaryIO,
+        public: bool,
+        content_type: str | None = None,
+        cache_control: str | None = None,
+    ) -> None:
+        extra_args = {"ACL": "public-read"} if public else {"ACL": "private"}
+        if content_type:
+            extra_args["ContentType"] = content_type
+        if cache_control:
+            extra_args["CacheControl"] = cache_control
+        await self.run(
+            self.client.upload_fileobj,
+            file_object,
+            bucket,
+            key,
+            ExtraArgs=extra_args,
+            Config=self.transfer_config,
+        )
+
+    async def get(self, bucket: str, key: str, chunk_size: int, byte_range: str | None = None) -> StoredFile:
+        params = {"Range": byte_range} if byte_range else {}
+        try:
+            file = await self.run(self.client.get_object, Bucket=bucket, Key=key, **params)
+        except ClientError as err:
+            if err.response.get("Error", {}).get("Code") == "InvalidRange":
+                raise StorageRangeError(byte_range) from err
+            raise
+        return StoredFile(
+            body=self._iter_body(file["Body"], chunk_size),
+            content_length=file["ContentLength"],
+            content_range=file.get("ContentRange"),
+        )
+
+    async def _iter_body(self, body: Any, chunk_size: int) -> AsyncIterator[bytes]:
+        """Читает тело файла частями, не загружая его в память целиком."""
+        try:
+            while chunk := await self.run(body.read, chunk_size):
+                yield chunk
+        finally:
+            body.close()
+
+    async def copy(self, bucket: str, source_key: str, key: str, public: bool) -> None:
+        # CopyObject копирует данные внутри s3 и сохраняет Content-Type и Cache-Control источника, но не его ACL.
+        await self.run(
+            self.client.copy_object,
+            Bucket=bucket,
+            Key=key,
+            CopySource={"Bucket": bucket, "Key": source_key},
+            ACL="public-read" if public else "private",
+        )
+
+    async def read(self, bucket: str, key: str) -> bytes:
+        file = await self.run(self.client.get_object, Bucket=bucket, Key=key)
+        return await self.run(file["Body"].read)
+
+    async def delete_many(self, bucket: str, keys: Iterable[str]) -> set[str]:
+        keys = list(keys)
+        failed = set()
+        for start in range(0, len(keys), DELETE_OBJECTS_LIMIT):
+            response = await self.run(
+                self.client.delete_objects,
+                Bucket=bucket,
+                Delete={"Objects": [{"Key": key} for key in keys[start : start + DELETE_OBJECTS_LIMIT]], "Quiet": True},
+            )
+            failed.update(delete_error["Key"] for delete_error in response.get("Errors", []))
+        return failed
+
+    async def presign(self, bucket: str, key: str, expires_in: int, **params: Any) -> str:
+        return await self.run(
+            self.client.generate_presigned_url,
+            "get_object",
+            Params={"Bucket": bucket, "Key": key, **params},
+            ExpiresIn=expires_in,
+        )
+
+    async def list_objects(self, bucket: str, prefix: str) -> AsyncIterator[list[StoredObject]]:
+        params: dict[str, Any] = {"Bucket": bucket, "Prefix": prefix}
+        while True:
+            response = await self.run(self.client.list_objects_v2, **params)
+            yield [
+                StoredObject(key=obj["Key"], last_modified=obj["LastModified"]) for obj in response.get("Contents", [])
+            ]
+            if not response.get("IsTruncated"):
+                break
+            params["ContinuationToken"] = response["NextContinuationToken"]
+
+
+s3: S3 = S3(
+    max_pool_connections=settings.s3_settings.max_pool_connections,
+    executor_size=settings.s3_settings.executor_size,
+    multipart_threshold=settings.s3_settings.multipart_threshold,
+    multipart_chunksize=settings.s3_settings.multipart_chunksize,
+    multipart_concurrency=settings.s3_settings.multipart_concurrency,
+)
+
+
+def get_s3() -> S3:
+    return s3
@@ -0,0 +1,15 @@
+from app.core.config import settings
+from app.storage.backend import StorageBackend
+from app.storage.local import LocalStorage
+from app.storage.s3 import get_s3
+
+# При заданном S3_LOCAL_FOLDER файлы хранятся в каталоге на диске вместо s3.
+storage: StorageBackend = (
+    LocalStorage(root=settings.s3_settings.local_folder, url=settings.s3_settings.url)
+    if settings.s3_settings.local_folder
+    else get_s3()
+)
+
+
+def get_storage() -> StorageBackend:
+    return storage
@@ -14,14 +14,16 @@ from app.api.setup import docs_basic_auth
 from app.api.v3.routers.seller_products import seller_check
 from app.core.config import settings as app_settings
 from app.db import create_schema
+from app.http_client import get_http_client
 from app.main import app
 from app.models.fields_extensions_models import ProductBrandInDB, ProductColorInDB, ProductSizeInDB
 from app.models.products_models import ProductCategoryInDB, ProductSubCategoryInDB
 from app.mq.rabbitmq import RabbitMQ
 from app.schemas.products_schemas import ProductCreate
 from app.services.seller_products import Service
+from app.storage import get_s3
 from tests import crud
-from tests.mocks import SELLER_ID, MockSellerCheck, mock_s3_client, override_sessions
+from tests.mocks import SELLER_ID, MockAsyncClient, MockSellerCheck, mock_s3_client, override_sessions
 from tests.settings import settings as test_settings
 
 from . import data as d
@@ -164,7 +166,7 @@ def get_product_create_data(patch_s3, get_brand, get_color, get_size, get_subcat
         "price": d.PRICE,
         #
         "documents": [d.DOCUMENT],
-        "images": [d.IMAGE],
+        "images": [dict(d.IMAGE)],
     }
 
 
@@ -180,8 +182,21 @@ def get_product_update_data() -> dict[str, Any]:
 
 
 @pytest.fixture
-def patch_s3(monkeypatch) -> None:
+def patch_s3(monkeypatch) -> Generator:
+    s3 = get_s3()
+    s3.close()
     monkeypatch.setattr("boto3.client", mock_s3_client)
+    yield
+    s3.close()
+
+
+@pytest_asyncio.fixture
+async def patch_http_client(monkeypatch) -> AsyncGenerator:
+    http_client = get_http_client()
+    await http_client.close()
+    monkeypatch.setattr("app.http_client.client.AsyncClient", MockAsyncClient)
+    yield
+    await http_client.close()
 
 
 @pytest.fixture
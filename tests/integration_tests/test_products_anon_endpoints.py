@@ -5,7 +5,13 @@ import pytest
 from fastapi import status
 from httpx import AsyncClient
 
+from app.api.v3.routers.seller_products import router
+from app.cache import RateLimiter
+from app.core.config import image_variant_encoding_profiles, settings
+from app.images import get_thumbnail_engine
+from app.models.fields_extensions_models import ImageVariantsInDB
 from app.models.products_models import ProductInDB
+from tests import crud
 from tests.mocks import UUID_ID
 from tests.utils import compare, request_get, request_post
 
@@ -103,3 +109,120 @@ async def test__post__returns_objs_list(
         else {"price_without_discount": 119.99, "price_with_discount": 99.99, "vat": "20%"}
     )
     compare(response_json, [expected])
+
+
+async def test__get_image_variant__creates_and_caches_variant(
+    async_client_unauthorized: AsyncClient, get_product: ProductInDB, get_test_session
+) -> None:
+    image = get_product.images[0]
+    url = router.url_path_for("product:get_image_variant", image_id=image.id, width=128, height=64, image_format="webp")
+    response = await async_client_unauthorized.get(url)
+    assert response.status_code == status.HTTP_307_TEMPORARY_REDIRECT
+    variant_url = response.headers["location"]
+    variant_name = f"128x64.{get_thumbnail_engine().get_variant_profile_hash('WEBP')}.webp"
+    assert variant_url.endswith(f"/temp/products/images/variants/{image.content_hash}/{variant_name}")
+    image_variants = await crud.get(get_test_session, ImageVariantsInDB, fetch_one=True)
+    await get_test_session.refresh(image_variants)
+    assert image_variants.variants[variant_name] == variant_url
+
+    response = await async_client_unauthorized.get(url)
+    assert response.headers["location"] == variant_url
+
+
+async def test__get_image_variant__promoted_while_creating(
+    async_client_unauthorized: AsyncClient, get_product: ProductInDB, get_test_session, monkeypatch
+) -> None:
+    image_variants = await crud.get(get_test_session, ImageVariantsInDB, fetch_one=True)
+    thumbnail_engine = get_thumbnail_engine()
+    create_variant = thumbnail_engine.create_variant
+
+    async def create_variant_and_promote(*args, **kwargs):
+        thumbnail = await create_variant(*args, **kwargs)
+        # Изображение переносится из temp/, пока создаётся вариант.
+        image_variants.variants = {
+            name: variant_url.replace("/temp/", "/") for name, variant_url in image_variants.variants.items()
+        }
+        await get_test_session.commit()
+        return thumbnail
+
+    monkeypatch.setattr(thumbnail_engine, "create_variant", create_variant_and_promote)
+    image = get_product.images[0]
+    url = router.url_path_for("product:get_image_variant", image_id=image.id, width=128, height=64, image_format="webp")
+    response = await async_client_unauthorized.get(url)
+    assert response.status_code == status.HTTP_307_TEMPORARY_REDIRECT
+    variant_url = response.headers["location"]
+    assert "/temp/" not in variant_url
+    await get_test_session.refresh(image_variants)
+    assert variant_url in image_variants.variants.values()
+
+
+async def test__get_image_variant__new_key_after_encoding_profile_change(
+    async_client_unauthorized: AsyncClient, get_product: ProductInDB, monkeypatch
+) -> None:
+    image = get_product.images[0]
+    url = router.url_path_for("product:get_image_variant", image_id=image.id, width=128, height=64, image_format="webp")
+    response = await async_client_unauthorized.get(url)
+    variant_url = response.headers["location"]
+
+    monkeypatch.setitem(image_variant_encoding_profiles, "WEBP", {"quality": 60, "method": 4})
+    response = await async_client_unauthorized.get(url)
+    assert response.status_code == status.HTTP_307_TEMPORARY_REDIRECT
+    assert response.headers["location"] != variant_url
+
+
+@pytest.mark.parametrize(
+    "width, height, image_format, status_code",
+    (
+        (100, 100, "gif", status.HTTP_404_NOT_FOUND),
+        (0, 128, "jpeg", status.HTTP_422_UNPROCESSABLE_ENTITY),
+        (100, 128, "jpeg", status.HTTP_422_UNPROCESSABLE_ENTITY),
+        (128, 100_000, "jpeg", status.HTTP_422_UNPROCESSABLE_ENTITY),
+    ),
+)
+async def test__get_image_variant__returns_error(
+    async_client_unauthorized: AsyncClient,
+    get_product: ProductInDB,
+    width: int,
+    height: int,
+    image_format: str,
+    status_code: int,
+) -> None:
+    image_id = get_product.images[0].id
+    url = router.url_path_for(
+        "product:get_image_variant", image_id=image_id, width=width, height=height, image_format=image_format
+    )
+    response = await async_client_unauthorized.get(url)
+    assert response.status_code == status_code
+
+
+def get_image_variant_url(image_id, width: int) -> str:
+    return router.url_path_for(
+        "product:get_image_variant", image_id=image_id, width=width, height=64, image_format="jpeg"
+    )
+
+
+async def test__get_image_variant__limits_variants_per_image(
+    async_client_unauthorized: AsyncClient, get_product: ProductInDB, monkeypatch
+) -> None:
+    monkeypatch.setattr(settings.image_settings, "max_variants_per_image", 1)
+    image_id = get_product.images[0].id
+    response = await async_client_unauthorized.get(get_image_variant_url(image_id, 64))
+    assert response.status_code == status.HTTP_307_TEMPORARY_REDIRECT
+    response = await async_client_unauthorized.get(get_image_variant_url(image_id, 128))
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    response = await async_client_unauthorized.get(get_image_variant_url(image_id, 64))
+    assert response.status_code == status.HTTP_307_TEMPORARY_REDIRECT
+
+
+async def test__get_image_variant__limits_new_variants_per_client(
+    async_client_unauthorized: AsyncClient, get_product: ProductInDB, monkeypatch
+) -> None:
+    rate_limiter = RateLimiter(prefix="test_image_variant_rate", limit=1, window=60)
+    monkeypatch.setattr("app.services.seller_products.get_image_variant_rate_limiter", lambda: rate_limiter)
+    image_id = get_product.images[0].id
+    response = await async_client_unauthorized.get(get_image_variant_url(image_id, 64))
+    assert response.status_code == status.HTTP_307_TEMPORARY_REDIRECT
+    response = await async_client_unauthorized.get(get_image_variant_url(image_id, 128))
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    response = await async_client_unauthorized.get(get_image_variant_url(image_id, 64))
+    assert response.status_code == status.HTTP_307_TEMPORARY_REDIRECT
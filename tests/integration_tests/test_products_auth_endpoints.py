@@ -1,15 +1,29 @@
 import base64
+from contextlib import asynccontextmanager
+from uuid import UUID
 
 import pytest
 from fastapi import status
 from httpx import AsyncClient
 
+from app.core.config import default_image_url, settings
 from app.main import app
-from app.models.fields_extensions_models import ProductStatus, ProductStatusForChange
+from app.models.fields_extensions_models import (
+    ImageProcessingStatus,
+    ImageVariantsInDB,
+    ProductDocumentInDB,
+    ProductImageInDB,
+    ProductStatus,
+    ProductStatusForChange,
+    StorageGarbageInDB,
+    UploadedFileInDB,
+)
 from app.models.products_models import ProductInDB
+from app.storage import LocalStorage
 from tests import crud, mocks
+from tests.fixtures import data as d
 from tests.mocks import S3_IMAGE, UUID_ID
-from tests.utils import check_response_json, compare, request_get, request_patch, request_post, reverse
+from tests.utils import check_response_json, compare, get_content, request_get, request_patch, request_post, reverse
 
 
 @pytest.mark.parametrize(
@@ -19,6 +33,8 @@ from tests.utils import check_response_json, compare, request_get, request_patch
         ("product:get_name_by_id", "get"),
         ("product:get_document", "get"),
         ("product:create", "post"),
+        ("product:upload_image", "post"),
+        ("product:upload_document", "post"),
         ("product:update", "patch"),
         ("product:change_status", "patch"),
     ),
@@ -87,6 +103,192 @@ async def test__get_document__returns_obj(async_client_authorized: AsyncClient,
         response_json=False,
     )
     assert base64.b64decode(response._content) == S3_IMAGE
+    assert response.headers["content-type"] == "image/jpeg"
+    assert response.headers["content-length"] == str(len(response._content))
+    assert (
+        response.headers["content-disposition"] == f"attachment; filename*=UTF-8''{document.name}.{document.extension}"
+    )
+    assert response.headers["accept-ranges"] == "bytes"
+    assert "content-encoding" not in response.headers
+
+
+@pytest.mark.parametrize(
+    "byte_range, expected_slice",
+    (
+        ("bytes=0-9", slice(0, 10)),
+        ("bytes=10-", slice(10, None)),
+        ("bytes=-5", slice(-5, None)),
+    ),
+)
+async def test__get_document__returns_range(
+    async_client_authorized: AsyncClient, get_product: ProductInDB, byte_range, expected_slice
+) -> None:
+    data = base64.b64encode(S3_IMAGE)
+    url = reverse(app, "product:get_document").format(document_id=get_product.documents[0].id)
+    response = await async_client_authorized.get(url, headers={"Range": byte_range})
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert "content-encoding" not in response.headers
+    assert response.content == data[expected_slice]
+    start = expected_slice.start % len(data)
+    assert response.headers["content-range"] == f"bytes {start}-{start + len(response.content) - 1}/{len(data)}"
+
+
+async def test__get_document__ignores_unsupported_range(
+    async_client_authorized: AsyncClient, get_product: ProductInDB
+) -> None:
+    url = reverse(app, "product:get_document").format(document_id=get_product.documents[0].id)
+    response = await async_client_authorized.get(url, headers={"Range": "bytes=0-1,5-6"})
+    assert response.status_code == status.HTTP_200_OK
+    assert base64.b64decode(response.content) == S3_IMAGE
+
+
+async def test__get_document__redirects_to_presigned_url(
+    async_client_authorized: AsyncClient, get_product: ProductInDB
+) -> None:
+    document = get_product.documents[0]
+    url = reverse(app, "product:get_document").format(document_id=document.id)
+    response = await async_client_authorized.get(url, params={"delivery": "redirect"})
+    assert response.status_code == status.HTTP_307_TEMPORARY_REDIRECT
+    assert document.key in response.headers["location"]
+    assert f"X-Amz-Expires={settings.s3_settings.presigned_url_expires}" in response.headers["location"]
+
+
+async def test__get_document__returns_presigned_url(
+    async_client_authorized: AsyncClient, get_product: ProductInDB
+) -> None:
+    document = get_product.documents[0]
+    url = reverse(app, "product:get_document").format(document_id=document.id)
+    response = await async_client_authorized.get(url, params={"delivery": "url"})
+    assert response.status_code == status.HTTP_200_OK
+    response_json = response.json()
+    assert document.key in response_json["url"]
+    assert response_json["expires_in"] == settings.s3_settings.presigned_url_expires
+
+
+async def test__get_document__local_storage(
+    monkeypatch, tmp_path, async_client_authorized: AsyncClient, get_product_create_data
+) -> None:
+    monkeypatch.setattr("app.storage.storage.storage", LocalStorage(root=str(tmp_path), url=settings.s3_settings.url))
+    response_json = await request_post(
+        async_client_authorized,
+        view_name="product:create",
+        payload=get_product_create_data,
+    )
+    bucket_public = settings.s3_settings.bucket_public
+    preview_key = response_json["images"][0]["preview_url"].split(f"{bucket_public}/")[-1]
+    assert (tmp_path / bucket_public / preview_key).is_file()
+    url = reverse(app, "product:get_document").format(document_id=response_json["documents"][0]["id"])
+    response = await async_client_authorized.get(url, headers={"Range": "bytes=0-9"})
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert response.content == S3_IMAGE[:10]
+
+
+async def test__change_product_status__promotes_files(
+    monkeypatch, tmp_path, async_client_authorized: AsyncClient, get_product_create_data, get_test_session
+) -> None:
+    monkeypatch.setattr("app.storage.storage.storage", LocalStorage(root=str(tmp_path), url=settings.s3_settings.url))
+    monkeypatch.setattr("app.services.seller_products.Service", mocks.MockServiceETL)
+    response_json = await request_post(
+        async_client_authorized,
+        view_name="product:create",
+        payload=get_product_create_data,
+    )
+    product_id = UUID(response_json["id"])
+    await crud.update(get_test_session, ProductInDB, product_id, status=ProductStatus.ready_for_sale)
+    await request_patch(
+        async_client_authorized,
+        view_name="product:change_status",
+        product_id=product_id,
+        query_params=f"?product_status={ProductStatusForChange.on_sale.value}",
+        response_json=False,
+    )
+    bucket_public = settings.s3_settings.bucket_public
+    bucket_private = settings.s3_settings.bucket_private
+    permanent_url = f"{settings.s3_settings.url}/{bucket_public}/products/"
+    product_in_db: ProductInDB = await crud.get_or_404(get_test_session, ProductInDB, product_id)
+    await get_test_session.refresh(product_in_db)
+    image_variants = await crud.get(get_test_session, ImageVariantsInDB, fetch_one=True)
+    await get_test_session.refresh(image_variants)
+    for product_image in product_in_db.images:
+        await get_test_session.refresh(product_image)
+        assert product_image.preview_url.startswith(permanent_url)
+        assert product_image.original_url.startswith(permanent_url)
+    assert all(variant_url.startswith(permanent_url) for variant_url in image_variants.variants.values())
+    for variant_url in image_variants.variants.values():
+        assert (tmp_path / bucket_public / variant_url.split(f"{bucket_public}/")[-1]).is_file()
+    for document in product_in_db.documents:
+        await get_test_session.refresh(document)
+        assert document.key.startswith("products/documents/")
+        assert (tmp_path / bucket_private / document.key).is_file()
+
+    url = reverse(app, "product:get_document").format(document_id=product_in_db.documents[0].id)
+    response = await async_client_authorized.get(url, headers={"Range": "bytes=0-9"})
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+
+
+async def test__update_product__promotes_files_on_sale(
+    monkeypatch, tmp_path, async_client_authorized: AsyncClient, get_product_create_data, get_test_session
+) -> None:
+    monkeypatch.setattr("app.storage.storage.storage", LocalStorage(root=str(tmp_path), url=settings.s3_settings.url))
+    response_json = await request_post(
+        async_client_authorized,
+        view_name="product:create",
+        payload=get_product_create_data,
+    )
+    product_id = UUID(response_json["id"])
+    await crud.update(get_test_session, ProductInDB, product_id, status=ProductStatus.on_sale)
+    payload = {"images": [{"order_num": 0, "image": get_content(data_size=2)}], "documents": [d.DOCUMENT]}
+    response_json = await request_patch(
+        async_client_authorized, view_name="product:update", payload=payload, product_id=product_id
+    )
+    permanent_url = f"{settings.s3_settings.url}/{settings.s3_settings.bucket_public}/products/"
+    assert response_json["images"][0]["preview_url"].startswith(permanent_url)
+    assert response_json["images"][0]["original_url"].startswith(permanent_url)
+    document_in_db = await crud.get_or_404(
+        get_test_session, ProductDocumentInDB, UUID(response_json["documents"][0]["id"])
+    )
+    assert document_in_db.key.startswith("products/documents/")
+    assert (tmp_path / settings.s3_settings.bucket_private / document_in_db.key).is_file()
+
+
+async def test__update_product__promotes_deferred_images_on_sale(
+    monkeypatch, tmp_path, async_client_authorized: AsyncClient, get_product_create_data, get_test_session
+) -> None:
+    @asynccontextmanager
+    async def test_session():
+        yield get_test_session
+
+    monkeypatch.setattr("app.storage.storage.storage", LocalStorage(root=str(tmp_path), url=settings.s3_settings.url))
+    response_json = await request_post(
+        async_client_authorized,
+        view_name="product:create",
+        payload=get_product_create_data,
+    )
+    product_id = UUID(response_json["id"])
+    await crud.update(get_test_session, ProductInDB, product_id, status=ProductStatus.on_sale)
+    monkeypatch.setattr(settings.image_settings, "deferred_thumbnails", True)
+    monkeypatch.setattr("app.services.seller_products.async_session", test_session)
+    payload = {"images": [{"order_num": 0, "image": get_content(data_size=2)}]}
+    response_json = await request_patch(
+        async_client_authorized, view_name="product:update", payload=payload, product_id=product_id
+    )
+    assert response_json["images"][0]["processing_status"] == ImageProcessingStatus.processing
+    image_in_db = await get_test_session.get(ProductImageInDB, response_json["images"][0]["id"])
+    await get_test_session.refresh(image_in_db)
+    bucket_public = settings.s3_settings.bucket_public
+    permanent_url = f"{settings.s3_settings.url}/{bucket_public}/products/"
+    assert image_in_db.processing_status == ImageProcessingStatus.ready
+    for image_url in (image_in_db.original_url, image_in_db.preview_url):
+        assert image_url.startswith(permanent_url)
+        assert (tmp_path / bucket_public / image_url.split(f"{bucket_public}/")[-1]).is_file()
+
+
+async def test__get_document__unsatisfiable_range(
+    async_client_authorized: AsyncClient, get_product: ProductInDB
+) -> None:
+    url = reverse(app, "product:get_document").format(document_id=get_product.documents[0].id)
+    response = await async_client_authorized.get(url, headers={"Range": "bytes=100000000-"})
+    assert response.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
 
 
 async def test__create_product__without_media(
@@ -111,6 +313,102 @@ async def test__create_product__with_media(async_client_authorized, get_product_
     await check_response_json(response_json, get_test_session, ProductInDB)
 
 
+async def test__create_product__deferred_thumbnails(
+    monkeypatch, async_client_authorized, get_product_create_data, get_test_session
+) -> None:
+    @asynccontextmanager
+    async def test_session():
+        yield get_test_session
+
+    monkeypatch.setattr(settings.image_settings, "deferred_thumbnails", True)
+    monkeypatch.setattr("app.services.seller_products.async_session", test_session)
+    response_json = await request_post(
+        async_client_authorized,
+        view_name="product:create",
+        payload=get_product_create_data,
+    )
+    response_image = response_json["images"][0]
+    assert response_image["processing_status"] == ImageProcessingStatus.processing
+    assert response_image["preview_url"] == default_image_url
+    assert "/temp/products/images/original_url/" in response_image["original_url"]
+    image_in_db = await get_test_session.get(ProductImageInDB, response_image["id"])
+    assert image_in_db.processing_status == ImageProcessingStatus.ready
+    assert image_in_db.preview_url.endswith(".jpeg")
+    assert image_in_db.preview_webp_url.endswith(".webp")
+
+
+async def test__create_product__deferred_thumbnails_fail_on_error(
+    monkeypatch, async_client_authorized, get_product_create_data, get_test_session
+) -> None:
+    @asynccontextmanager
+    async def test_session():
+        yield get_test_session
+
+    async def save_image_variants(*args, **kwargs) -> None:
+        raise RuntimeError("database is unavailable")
+
+    monkeypatch.setattr(settings.image_settings, "deferred_thumbnails", True)
+    monkeypatch.setattr("app.services.seller_products.async_session", test_session)
+    monkeypatch.setattr("app.services.seller_products.Service._save_image_variants", save_image_variants)
+    response_json = await request_post(
+        async_client_authorized,
+        view_name="product:create",
+        payload=get_product_create_data,
+    )
+    image_in_db = await get_test_session.get(ProductImageInDB, response_json["images"][0]["id"])
+    await get_test_session.refresh(image_in_db)
+    assert image_in_db.processing_status == ImageProcessingStatus.failed
+
+
+async def test__create_product__uploaded_files(
+    async_client_authorized: AsyncClient, get_product_create_data, get_test_session
+) -> None:
+    files = {"file": ("photo.jpeg", S3_IMAGE, "image/jpeg")}
+    image_response = await async_client_authorized.post(reverse(app, "product:upload_image"), files=files)
+    assert image_response.status_code == status.HTTP_201_CREATED
+    document_response = await async_client_authorized.post(reverse(app, "product:upload_document"), files=files)
+    assert document_response.status_code == status.HTTP_201_CREATED
+    assert document_response.json()["name"] == "photo.jpeg"
+    assert len(await crud.get_all(get_test_session, UploadedFileInDB)) == 2
+
+    payload = get_product_create_data | {
+        "images": [{"file_id": image_response.json()["id"], "order_num": 0}],
+        "documents": [{"file_id": document_response.json()["id"], "name": "document"}],
+    }
+    response_json = await request_post(async_client_authorized, view_name="product:create", payload=payload)
+    assert response_json["images"][0]["preview_url"].endswith(".jpeg")
+    assert response_json["documents"][0]["name"] == "document"
+    assert not await crud.get_all(get_test_session, UploadedFileInDB)
+    await check_response_json(response_json, get_test_session, ProductInDB)
+
+
+async def test__upload_image__unsupported_content_type(async_client_authorized: AsyncClient) -> None:
+    files = {"file": ("document.pdf", b"%PDF-1.4", "application/pdf")}
+    response = await async_client_authorized.post(reverse(app, "product:upload_image"), files=files)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    files = {"file": ("photo.jpeg", b"%PDF-1.4", "image/jpeg")}
+    response = await async_client_authorized.post(reverse(app, "product:upload_image"), files=files)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+async def test__upload_file__content_type_from_content(
+    patch_s3, async_client_authorized: AsyncClient, get_test_session
+) -> None:
+    files = {"file": ("photo.png", S3_IMAGE, "image/png")}
+    response = await async_client_authorized.post(reverse(app, "product:upload_document"), files=files)
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json()["extension"] == "jpeg"
+    uploaded_file_in_db = (await crud.get_all(get_test_session, UploadedFileInDB))[0]
+    assert uploaded_file_in_db.content_type == "image/jpeg"
+
+
+async def test__upload_file__too_large(monkeypatch, async_client_authorized: AsyncClient) -> None:
+    monkeypatch.setattr(settings.upload_settings, "max_image_size", len(S3_IMAGE) - 1)
+    files = {"file": ("photo.jpeg", S3_IMAGE, "image/jpeg")}
+    response = await async_client_authorized.post(reverse(app, "product:upload_image"), files=files)
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+
 async def test__update_product(
     async_client_authorized: AsyncClient,
     get_product,
@@ -126,6 +424,87 @@ async def test__update_product(
     await check_response_json(response_json, get_test_session, ProductInDB, get_product_update_data)
 
 
+async def test__update_product__images_and_documents(
+    async_client_authorized: AsyncClient,
+    get_product: ProductInDB,
+    get_test_session,
+) -> None:
+    old_image, old_document = get_product.images[0], get_product.documents[0]
+    payload = {
+        "images": [{"id": old_image.id, "order_num": 1}, d.IMAGE],
+        "documents": [d.DOCUMENT],
+    }
+    response_json = await request_patch(
+        async_client_authorized,
+        view_name="product:update",
+        payload=payload,
+        product_id=get_product.id,
+    )
+    assert sorted(image["order_num"] for image in response_json["images"]) == [0, 1]
+    assert len(response_json["documents"]) == 1
+    assert response_json["documents"][0]["id"] != str(old_document.id)
+    await check_response_json(response_json, get_test_session, ProductInDB)
+
+
+async def test__update_product__identical_images_share_variants(
+    async_client_authorized: AsyncClient,
+    get_product: ProductInDB,
+    get_test_session,
+) -> None:
+    old_image = get_product.images[0]
+    payload = {"images": [{"id": old_image.id, "order_num": 0}, d.IMAGE | {"order_num": 1}]}
+    response_json = await request_patch(
+        async_client_authorized,
+        view_name="product:update",
+        payload=payload,
+        product_id=get_product.id,
+    )
+    assert len({image["preview_url"] for image in response_json["images"]}) == 1
+    assert len(await crud.get_all(get_test_session, ImageVariantsInDB)) == 1
+
+    payload = {"images": [d.IMAGE | {"id": old_image.id}]}
+    await request_patch(async_client_authorized, view_name="product:update", payload=payload, product_id=get_product.id)
+    assert len(await crud.get_all(get_test_session, ImageVariantsInDB)) == 1
+
+    await request_patch(
+        async_client_authorized, view_name="product:update", payload={"images": []}, product_id=get_product.id
+    )
+    assert not await crud.get_all(get_test_session, ImageVariantsInDB)
+    garbage_keys = {garbage.key for garbage in await crud.get_all(get_test_session, StorageGarbageInDB)}
+    assert old_image.preview_url.split(f"{settings.s3_settings.bucket_public}/")[-1] in garbage_keys
+
+
+async def test__update_product__readded_image_keeps_files(
+    async_client_authorized: AsyncClient,
+    get_product: ProductInDB,
+    get_test_session,
+) -> None:
+    old_image = get_product.images[0]
+    response_json = await request_patch(
+        async_client_authorized, view_name="product:update", payload={"images": [d.IMAGE]}, product_id=get_product.id
+    )
+    assert response_json["images"][0]["id"] != str(old_image.id)
+    assert response_json["images"][0]["preview_url"] == old_image.preview_url
+    assert len(await crud.get_all(get_test_session, ImageVariantsInDB)) == 1
+    assert not await crud.get_all(get_test_session, StorageGarbageInDB)
+
+
+async def test__update_product__readded_after_removal_dequeues_files(
+    async_client_authorized: AsyncClient,
+    get_product: ProductInDB,
+    get_test_session,
+) -> None:
+    await request_patch(
+        async_client_authorized, view_name="product:update", payload={"images": []}, product_id=get_product.id
+    )
+    assert await crud.get_all(get_test_session, StorageGarbageInDB)
+
+    await request_patch(
+        async_client_authorized, view_name="product:update", payload={"images": [d.IMAGE]}, product_id=get_product.id
+    )
+    assert not await crud.get_all(get_test_session, StorageGarbageInDB)
+
+
 async def test__change_product_status__returns_422(monkeypatch, async_client_authorized):
     monkeypatch.setattr("app.services.seller_products.Service", mocks.MockServiceETL)
     response_json = await request_patch(
@@ -0,0 +1,159 @@
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.config import settings
+from app.models.fields_extensions_models import StorageGarbageInDB, UploadedFileInDB, UploadedFileKind
+from app.models.products_models import ProductInDB
+from app.storage import StorageGarbageCollector, dequeue_storage_garbage, enqueue_storage_garbage, get_s3
+from tests import crud
+from tests.mocks import SELLER_ID
+
+BUCKET_PUBLIC = settings.s3_settings.bucket_public
+BUCKET_PRIVATE = settings.s3_settings.bucket_private
+OLD = datetime.now(timezone.utc) - timedelta(days=2)
+NEW = datetime.now(timezone.utc)
+
+
+class FakeS3Client:
+    def __init__(self) -> None:
+        self.objects: dict[str, dict[str, datetime]] = {}
+        self.failed_keys: set[str] = set()
+        self.deleted: list[tuple[str, str]] = []
+        self.page_size = 2
+
+    def delete_objects(self, Bucket, Delete) -> dict:
+        assert len(Delete["Objects"]) <= settings.storage_gc_settings.batch_size
+        errors = []
+        for obj in Delete["Objects"]:
+            if obj["Key"] in self.failed_keys:
+                errors.append({"Key": obj["Key"], "Code": "InternalError"})
+            else:
+                self.deleted.append((Bucket, obj["Key"]))
+        return {"Errors": errors} if errors else {}
+
+    def list_objects_v2(self, Bucket, Prefix, ContinuationToken=None) -> dict:
+        keys = sorted(key for key in self.objects.get(Bucket, {}) if key.startswith(Prefix))
+        start = int(ContinuationToken or 0)
+        end = start + self.page_size
+        response = {
+            "Contents": [{"Key": key, "LastModified": self.objects[Bucket][key]} for key in keys[start:end]],
+            "IsTruncated": end < len(keys),
+        }
+        if response["IsTruncated"]:
+            response["NextContinuationToken"] = str(end)
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def fake_s3_client(monkeypatch):
+    s3_client = FakeS3Client()
+    get_s3().close()
+    monkeypatch.setattr("boto3.client", lambda *args, **kwargs: s3_client)
+    yield s3_client
+    get_s3().close()
+
+
+@pytest.fixture
+def storage_gc(monkeypatch, get_test_session) -> StorageGarbageCollector:
+    @asynccontextmanager
+    async def test_session():
+        yield get_test_session
+
+    monkeypatch.setattr("app.storage.gc.async_session", test_session)
+    return StorageGarbageCollector(
+        drain_interval=1,
+        reconcile_interval=1,
+        batch_size=2,
+        grace_period=timedelta(days=1).total_seconds(),
+        uploaded_file_ttl=timedelta(days=1).total_seconds(),
+    )
+
+
+async def get_garbage(session) -> set[tuple[str, str]]:
+    return {(garbage.bucket, garbage.key) for garbage in await crud.get_all(session, StorageGarbageInDB)}
+
+
+async def test_drain_deletes_in_batches_and_keeps_failed(storage_gc, fake_s3_client, get_test_session) -> None:
+    keys = [f"temp/products/images/preview_url/{number}.jpeg" for number in range(5)]
+    await enqueue_storage_garbage(get_test_session, BUCKET_PUBLIC, keys)
+    await enqueue_storage_garbage(get_test_session, BUCKET_PUBLIC, keys[:1])
+    await get_test_session.commit()
+    fake_s3_client.failed_keys = {keys[-1]}
+
+    assert await storage_gc.drain() == 4
+    assert sorted(key for _, key in fake_s3_client.deleted) == keys[:-1]
+    assert await get_garbage(get_test_session) == {(BUCKET_PUBLIC, keys[-1])}
+
+
+async def test_drain_keeps_files_referenced_again(
+    get_product: ProductInDB, storage_gc, fake_s3_client, get_test_session
+) -> None:
+    image = get_product.images[0]
+    image_key = image.preview_url.split(f"{BUCKET_PUBLIC}/")[-1]
+    variant_key = f"products/images/variants/{image.content_hash}/128x64.webp"
+    orphan_keys = ["temp/products/images/preview_url/orphan.jpeg", f"temp/products/images/preview_url/{'0' * 64}.jpeg"]
+    await enqueue_storage_garbage(get_test_session, BUCKET_PUBLIC, [image_key, variant_key, *orphan_keys])
+    await get_test_session.commit()
+
+    assert await storage_gc.drain() == 2
+    assert sorted(fake_s3_client.deleted) == [(BUCKET_PUBLIC, key) for key in sorted(orphan_keys)]
+    assert not await get_garbage(get_test_session)
+
+
+async def test_dequeue_storage_garbage(get_test_session) -> None:
+    content_hash = "a" * 64
+    keys = [
+        f"temp/products/images/preview_url/{content_hash}.jpeg",
+        f"products/images/variants/{content_hash}/128x64.webp",
+        f"temp/products/images/preview_url/{'b' * 64}.jpeg",
+    ]
+    await enqueue_storage_garbage(get_test_session, BUCKET_PUBLIC, keys)
+    await enqueue_storage_garbage(get_test_session, BUCKET_PRIVATE, keys[:1])
+    await dequeue_storage_garbage(get_test_session, BUCKET_PUBLIC, [content_hash])
+    assert await get_garbage(get_test_session) == {(BUCKET_PUBLIC, keys[-1]), (BUCKET_PRIVATE, keys[0])}
+
+
+async def test_reconcile_enqueues_unreferenced_files(
+    get_product: ProductInDB, storage_gc, fake_s3_client, get_test_session
+) -> None:
+    image, document = get_product.images[0], get_product.documents[0]
+    image_key = image.preview_url.split(f"{BUCKET_PUBLIC}/")[-1]
+    expired_file = await crud.create(
+        get_test_session,
+        UploadedFileInDB,
+        seller_id=SELLER_ID,
+        kind=UploadedFileKind.image,
+        key="temp/uploads/images/expired.jpeg",
+        name="expired.jpeg",
+        extension="jpeg",
+        content_type="image/jpeg",
+        size=1,
+        created_at=OLD,
+    )
+    fake_s3_client.objects = {
+        BUCKET_PUBLIC: {
+            image_key: OLD,
+            "temp/products/images/preview_url/orphan.jpeg": OLD,
+            "temp/products/images/preview_url/new.jpeg": NEW,
+            "products/images/preview_url/orphan.jpeg": OLD,
+            "default.svg": OLD,
+        },
+        BUCKET_PRIVATE: {
+            document.key: OLD,
+            "temp/products/documents/orphan.pdf": OLD,
+        },
+    }
+
+    assert await storage_gc.reconcile() == 4
+    assert await get_garbage(get_test_session) == {
+        (BUCKET_PUBLIC, "temp/products/images/preview_url/orphan.jpeg"),
+        (BUCKET_PUBLIC, "products/images/preview_url/orphan.jpeg"),
+        (BUCKET_PRIVATE, "temp/products/documents/orphan.pdf"),
+        (BUCKET_PRIVATE, expired_file.key),
+    }
+    assert not await crud.get_all(get_test_session, UploadedFileInDB)
@@ -1,9 +1,12 @@
 import base64
 import io
 import json
+from mimetypes import guess_type
+from tempfile import SpooledTemporaryFile
 from typing import Any
 from uuid import uuid4
 
+from botocore.exceptions import ClientError
 from botocore.response import StreamingBody
 from fastapi import Request
 from httpx import AsyncClient
@@ -12,6 +15,7 @@ from httpx import Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.cache.cache import Cache, get_redis_client
+from app.core.config import immutable_cache_control
 from app.core.config import settings as app_settings
 from app.db import get_session
 from app.main import app
@@ -84,29 +88,80 @@ def mock_s3_client(*args, **kwargs) -> None:
     assert kwargs["endpoint_url"] == app_settings.s3_settings.url
     assert kwargs["aws_access_key_id"] == app_settings.s3_settings.access_key
     assert kwargs["aws_secret_access_key"] == app_settings.s3_settings.secret_key
+    assert kwargs["config"].max_pool_connections == app_settings.s3_settings.max_pool_connections
 
     class MockS3Client:
         @staticmethod
-        def get_object(Bucket, Key) -> dict[str, Any]:
+        def get_object(Bucket, Key, Range=None) -> dict[str, Any]:
             assert isinstance(Bucket, str)
             assert isinstance(Key, str)
-            assert Key.startswith("temp/products/documents/")
-            data = base64.b64encode(S3_IMAGE)
-            return {"Body": StreamingBody(io.BytesIO(data), len(data))}
+            if Key.startswith(("temp/uploads/images/", "temp/products/images/original_url/")):
+                data = S3_IMAGE
+            else:
+                assert Key.startswith("temp/products/documents/")
+                data = base64.b64encode(S3_IMAGE)
+            if Range is None:
+                return {"Body": StreamingBody(io.BytesIO(data), len(data)), "ContentLength": len(data)}
+            start, end = Range.removeprefix("bytes=").split("-")
+            start, end = (len(data) - int(end), len(data) - 1) if not start else (int(start), int(end or len(data) - 1))
+            if start >= len(data):
+                raise ClientError({"Error": {"Code": "InvalidRange"}}, "GetObject")
+            part = data[start : end + 1]
+            return {
+                "Body": StreamingBody(io.BytesIO(part), len(part)),
+                "ContentLength": len(part),
+                "ContentRange": f"bytes {start}-{start + len(part) - 1}/{len(data)}",
+            }
 
         @staticmethod
-        def upload_fileobj(fileobj, bucket, key, ExtraArgs) -> None:
-            assert isinstance(fileobj, io.BytesIO)
+        def copy_object(Bucket, Key, CopySource, ACL) -> dict[str, Any]:
+            assert CopySource == {"Bucket": Bucket, "Key": f"temp/{Key}"}
+            assert Key.startswith(("products/images/", "products/documents/"))
+            assert ACL == ("public-read" if Key.startswith("products/images/") else "private")
+            return {}
+
+        @staticmethod
+        def delete_objects(Bucket, Delete) -> dict[str, Any]:
+            assert isinstance(Bucket, str)
+            for obj in Delete["Objects"]:
+                assert obj["Key"].startswith(("temp/products/", "temp/uploads/"))
+            return {}
+
+        @staticmethod
+        def upload_fileobj(fileobj, bucket, key, ExtraArgs, Config) -> None:
+            assert Config.multipart_chunksize == app_settings.s3_settings.multipart_chunksize
+            assert Config.max_concurrency == app_settings.s3_settings.multipart_concurrency
+            assert isinstance(fileobj, (io.BytesIO, SpooledTemporaryFile))
             assert isinstance(bucket, str)
             assert isinstance(key, str)
-            assert key.endswith(".jpeg")
-            assert key.startswith("temp/products/images/") or key.startswith("temp/products/documents/")
+            assert key.endswith((".jpeg", ".png", ".webp", ".pdf"))
+            assert key.startswith(
+                ("temp/products/images/", "temp/products/documents/", "temp/uploads/images/", "products/images/")
+            )
             assert (
-                (ExtraArgs == {"ACL": "public-read"})
-                if key.startswith("temp/products/images/")
-                else (ExtraArgs == {"ACL": "private"})
+                (
+                    ExtraArgs
+                    == {
+                        "ACL": "public-read",
+                        "ContentType": guess_type(key)[0],
+                        "CacheControl": immutable_cache_control,
+                    }
+                )
+                if key.startswith(("temp/products/images/", "products/images/"))
+                else (ExtraArgs == {"ACL": "private", "ContentType": guess_type(key)[0]})
             )
 
+        @staticmethod
+        def generate_presigned_url(ClientMethod, Params, ExpiresIn) -> str:
+            assert ClientMethod == "get_object"
+            assert Params["Key"].startswith("temp/products/documents/")
+            assert ExpiresIn == app_settings.s3_settings.presigned_url_expires
+            return f"{app_settings.s3_settings.url}/{Params['Bucket']}/{Params['Key']}?X-Amz-Expires={ExpiresIn}"
+
+        @staticmethod
+        def close() -> None:
+            pass
+
     return MockS3Client
 
 
@@ -1,9 +1,17 @@
+from time import time
+from types import SimpleNamespace
+from uuid import uuid4
+
 import pytest
 from fastapi import status
 from fastapi.exceptions import HTTPException
+from httpx import AsyncClient, Request, Response
 
+from app.cache import Cache, TokenCache
 from app.core.config import settings
-from app.middlewares.auth import api_key_auth
+from app.main import app
+from app.middlewares.auth import JWTBearer, SellerCheck, api_key_auth
+from tests.utils import encode_jwt, reverse
 
 
 def test_api_key_auth_raises_exc():
@@ -14,3 +22,99 @@ def test_api_key_auth_raises_exc():
 
 def test_api_key_auth_with_valid_input():
     api_key_auth(settings.app_settings.api_key)
+
+
+class FakeHTTPClient:
+    def __init__(self, seller_id: str) -> None:
+        self.seller_id = seller_id
+        self.requests: list[Request] = []
+
+    async def send(self, request: Request) -> Response:
+        self.requests.append(request)
+        return Response(status.HTTP_200_OK, json=self.seller_id)
+
+
+@pytest.fixture
+def fake_http_client(monkeypatch) -> FakeHTTPClient:
+    http_client = FakeHTTPClient(str(uuid4()))
+    monkeypatch.setattr("app.middlewares.auth.get_http_client", lambda: http_client)
+    monkeypatch.setattr("app.middlewares.auth.get_token_cache", lambda: TokenCache(ttl=300, local_ttl=30, max_size=10))
+    return http_client
+
+
+async def test_seller_check_caches_verified_token(fake_http_client: FakeHTTPClient, get_test_redis) -> None:
+    cache = Cache(redis=get_test_redis)
+    seller_check = SellerCheck()
+    for _ in range(3):
+        request = SimpleNamespace()
+        assert await seller_check.verify_seller(token="token", request=request, cache=cache)
+        assert (request.seller_id, request.user_token) == (fake_http_client.seller_id, "token")
+    assert len(fake_http_client.requests) == 1
+
+    await seller_check.verify_seller(token="other-token", request=SimpleNamespace(), cache=cache)
+    assert len(fake_http_client.requests) == 2
+
+
+async def test_revoke_token(
+    monkeypatch, fake_http_client: FakeHTTPClient, async_client_unauthorized: AsyncClient, get_test_redis
+) -> None:
+    token_cache = TokenCache(ttl=300, local_ttl=30, max_size=10)
+    monkeypatch.setattr("app.api.v3.routers.seller_products.get_token_cache", lambda: token_cache)
+    cache = Cache(redis=get_test_redis)
+    await token_cache.add(cache, "token", fake_http_client.seller_id)
+    url = reverse(app, "auth:revoke_token")
+
+    response = await async_client_unauthorized.post(url, json={"token": "token"})
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    response = await async_client_unauthorized.post(url, json={}, headers={"X-API-KEY": settings.app_settings.api_key})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    response = await async_client_unauthorized.post(
+        url, json={"token": "token"}, headers={"X-API-KEY": settings.app_settings.api_key}
+    )
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert await token_cache.get(cache, "token") is None
+
+
+@pytest.fixture
+def local_jwt(monkeypatch) -> None:
+    monkeypatch.setattr(settings.auth_settings, "local_jwt", True)
+
+
+async def test_seller_check_verifies_token_locally(local_jwt, fake_http_client: FakeHTTPClient) -> None:
+    token = encode_jwt({"seller_id": fake_http_client.seller_id, "exp": time() + 60}, settings.app_settings.secret_key)
+    request = SimpleNamespace()
+    assert await SellerCheck().verify_seller(token=token, request=request)
+    assert (request.seller_id, request.user_token) == (fake_http_client.seller_id, token)
+    assert not fake_http_client.requests
+
+
+async def test_seller_check_falls_back_to_remote(monkeypatch, local_jwt, fake_http_client: FakeHTTPClient) -> None:
+    token = encode_jwt({"user_id": "1", "exp": time() + 60}, settings.app_settings.secret_key)
+    request = SimpleNamespace()
+    assert await SellerCheck().verify_seller(token=token, request=request)
+    assert request.seller_id == fake_http_client.seller_id
+    assert len(fake_http_client.requests) == 1
+
+    monkeypatch.setattr(settings.auth_settings, "remote_fallback", False)
+    with pytest.raises(HTTPException) as exc_info:
+        await SellerCheck().verify_seller(token=token, request=SimpleNamespace())
+    assert exc_info.value.status_code == status.HTTP_403_FORBIDDEN
+    assert len(fake_http_client.requests) == 1
+
+
+async def test_seller_check_rejects_expired_token(local_jwt, fake_http_client: FakeHTTPClient) -> None:
+    token = encode_jwt({"seller_id": fake_http_client.seller_id, "exp": time() - 600}, settings.app_settings.secret_key)
+    with pytest.raises(HTTPException) as exc_info:
+        await SellerCheck().verify_seller(token=token, request=SimpleNamespace())
+    assert exc_info.value.status_code == status.HTTP_403_FORBIDDEN
+    assert not fake_http_client.requests
+
+
+async def test_jwt_bearer_verifies_token_locally(local_jwt, fake_http_client: FakeHTTPClient) -> None:
+    token = encode_jwt({"user_id": "1", "phone": "79990000000", "exp": time() + 60}, settings.app_settings.secret_key)
+    request = SimpleNamespace()
+    assert await JWTBearer().verify_jwt(token=token, request=request)
+    assert (request.user_id, request.phone) == ("1", "79990000000")
+    invalid_token = encode_jwt({"user_id": "1", "phone": "79990000000", "exp": time() + 60}, "other")
+    assert not await JWTBearer().verify_jwt(token=invalid_token, request=SimpleNamespace())
+    assert not fake_http_client.requests
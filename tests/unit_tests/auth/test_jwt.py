@@ -0,0 +1,36 @@
+from time import time
+
+import pytest
+
+from app.middlewares.jwt import JWTError, decode_jwt
+from tests.utils import encode_jwt
+
+SECRET_KEY = "secret"
+
+
+def test_decode_jwt() -> None:
+    claims = {"user_id": "1", "exp": time() + 60}
+    assert decode_jwt(encode_jwt(claims, SECRET_KEY), SECRET_KEY, "HS256") == claims
+
+
+def test_decode_jwt_leeway() -> None:
+    token = encode_jwt({"exp": time() - 10}, SECRET_KEY)
+    assert decode_jwt(token, SECRET_KEY, "HS256", leeway=30)
+    with pytest.raises(JWTError, match="истёк"):
+        decode_jwt(token, SECRET_KEY, "HS256")
+
+
+@pytest.mark.parametrize(
+    "token, match",
+    (
+        ("not-a-jwt", "некорректный"),
+        ("a.b.c", "некорректный"),
+        (encode_jwt({"exp": time() + 60}, "other"), "подпись"),
+        (encode_jwt({"exp": time() + 60}, SECRET_KEY, algorithm="none"), "алгоритм"),
+        (encode_jwt({"user_id": "1"}, SECRET_KEY), "срока действия"),
+        (encode_jwt({"exp": time() + 60, "nbf": time() + 600}, SECRET_KEY), "ещё не действителен"),
+    ),
+)
+def test_decode_jwt_raises(token: str, match: str) -> None:
+    with pytest.raises(JWTError, match=match):
+        decode_jwt(token, SECRET_KEY, "HS256")
@@ -0,0 +1,46 @@
+from fastapi import FastAPI, UploadFile, status
+from httpx import AsyncClient
+
+from app.middlewares.body_size_limit import BodySizeLimitMiddleware
+
+MAX_SIZE = 1024
+
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(BodySizeLimitMiddleware, max_sizes={"/upload": MAX_SIZE})
+
+    @app.post("/upload")
+    @app.post("/other")
+    async def upload(file: UploadFile) -> dict[str, int | None]:
+        return {"size": file.size}
+
+    return app
+
+
+async def chunks(size: int):
+    yield b'--x\r\nContent-Disposition: form-data; name="file"; filename="a.bin"\r\n\r\n'
+    for _ in range(size // 256):
+        yield b"-" * 256
+    yield b"\r\n--x--\r\n"
+
+
+async def test_body_size_limit() -> None:
+    async with AsyncClient(app=create_app(), base_url="http://test") as client:
+        response = await client.post("/upload", files={"file": ("a.bin", b"-" * 100)})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"size": 100}
+
+        response = await client.post("/upload", files={"file": ("a.bin", b"-" * MAX_SIZE)})
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        response = await client.post("/other", files={"file": ("a.bin", b"-" * MAX_SIZE)})
+        assert response.status_code == status.HTTP_200_OK
+
+
+async def test_body_size_limit_without_content_length() -> None:
+    async with AsyncClient(app=create_app(), base_url="http://test") as client:
+        response = await client.post(
+            "/upload", content=chunks(MAX_SIZE * 2), headers={"Content-Type": "multipart/form-data; boundary=x"}
+        )
+        assert "content-length" not in response.request.headers
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
@@ -1,6 +1,6 @@
 import pytest
 
-from app.core.config import AppSettings, PostgresSettings
+from app.core.config import AppSettings, PostgresSettings, S3Settings
 from tests.mocks import MockValidationInfo
 
 
@@ -68,3 +68,24 @@ def test_build_dsn(value, expected) -> None:
         ),
     )
     assert actual == expected
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    (
+        (None, 64),
+        ("", 64),
+        (100, 100),
+    ),
+)
+def test_build_max_pool_connections(value, expected) -> None:
+    actual = S3Settings.build_max_pool_connections(
+        value, info=MockValidationInfo(executor_size=16, multipart_concurrency=4)
+    )
+    assert actual == expected
+
+
+def test_build_max_pool_connections_below_concurrency() -> None:
+    with pytest.raises(ValueError):
+        S3Settings.build_max_pool_connections(32, info=MockValidationInfo(executor_size=16, multipart_concurrency=4))
+    assert S3Settings().max_pool_connections >= S3Settings().executor_size * S3Settings().multipart_concurrency
@@ -0,0 +1,176 @@
+import asyncio
+
+from httpx import AsyncClient, MockTransport, Request, Response
+
+from app.core.config import settings
+from app.http_client import HTTPClient, SingleFlight, get_http_client
+
+
+def create_http_client(max_connections_per_host: int = settings.ecom_settings.max_connections_per_host) -> HTTPClient:
+    return HTTPClient(
+        http2=settings.ecom_settings.http2,
+        max_connections=settings.ecom_settings.max_connections,
+        max_keepalive_connections=settings.ecom_settings.max_keepalive_connections,
+        max_connections_per_host=max_connections_per_host,
+        keepalive_expiry=settings.ecom_settings.keepalive_expiry,
+        timeout=settings.ecom_settings.timeout,
+        connect_timeout=settings.ecom_settings.connect_timeout,
+    )
+
+
+def patch_async_client(monkeypatch, handler) -> list[dict]:
+    created = []
+
+    class MockTransportAsyncClient(AsyncClient):
+        def __init__(self, **kwargs) -> None:
+            created.append(kwargs)
+            super().__init__(transport=MockTransport(handler), **kwargs)
+
+    monkeypatch.setattr("app.http_client.client.AsyncClient", MockTransportAsyncClient)
+    return created
+
+
+def test_get_http_client() -> None:
+    http_client = get_http_client()
+    assert isinstance(http_client, HTTPClient)
+    assert http_client.http2 == settings.ecom_settings.http2
+    assert http_client.max_connections_per_host == settings.ecom_settings.max_connections_per_host
+    assert http_client.timeout.connect == settings.ecom_settings.connect_timeout
+    assert http_client.timeout.read == settings.ecom_settings.timeout
+
+
+async def test_http_client_is_created_once(monkeypatch) -> None:
+    created = patch_async_client(monkeypatch, lambda request: Response(200, json={"host": request.url.host}))
+    http_client = create_http_client()
+    http_client.start()
+    try:
+        for _ in range(3):
+            response = await http_client.send(Request("GET", "http://auth/check-token"))
+            assert response.json() == {"host": "auth"}
+        assert len(created) == 1
+        assert created[0]["limits"] is http_client.limits
+    finally:
+        await http_client.close()
+    assert http_client._client is None
+
+
+async def test_http_client_applies_timeout(monkeypatch) -> None:
+    timeouts = []
+
+    def handler(request: Request) -> Response:
+        timeouts.append(request.extensions.get("timeout"))
+        return Response(200)
+
+    patch_async_client(monkeypatch, handler)
+    http_client = create_http_client()
+    try:
+        await http_client.send(Request("GET", "http://auth/check-token"))
+        await http_client.send(Request("GET", "http://auth/check-token", extensions={"timeout": {"read": 1}}))
+    finally:
+        await http_client.close()
+    assert timeouts == [
+        {
+            "connect": settings.ecom_settings.connect_timeout,
+            "read": settings.ecom_settings.timeout,
+            "write": settings.ecom_settings.timeout,
+            "pool": settings.ecom_settings.timeout,
+        },
+        {"read": 1},
+    ]
+
+
+async def test_http_client_limits_requests_per_host(monkeypatch) -> None:
+    max_connections_per_host = 2
+    active = {"auth": 0, "sellers": 0}
+    max_active = {"auth": 0, "sellers": 0}
+
+    async def handler(request: Request) -> Response:
+        host = request.url.host
+        active[host] += 1
+        max_active[host] = max(max_active[host], active[host])
+        await asyncio.sleep(0.01)
+        active[host] -= 1
+        return Response(200)
+
+    patch_async_client(monkeypatch, handler)
+    http_client = create_http_client(max_connections_per_host)
+    try:
+        await asyncio.gather(
+            *(http_client.send(Request("GET", f"http://{host}/{number}")) for host in active for number in range(5))
+        )
+    finally:
+        await http_client.close()
+    assert max_active == {"auth": max_connections_per_host, "sellers": max_connections_per_host}
+
+
+async def test_single_flight_shares_in_flight_call() -> None:
+    single_flight = SingleFlight()
+    calls = 0
+
+    async def call() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    assert await asyncio.gather(*(single_flight.do("key", call) for _ in range(5))) == [1] * 5
+    assert await single_flight.do("key", call) == 2
+    assert not single_flight.calls
+
+
+async def test_single_flight_shares_exception_and_survives_cancellation() -> None:
+    single_flight = SingleFlight()
+    started = asyncio.Event()
+
+    async def call() -> None:
+        started.set()
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream")
+
+    cancelled_waiter = asyncio.ensure_future(single_flight.do("key", call))
+    await started.wait()
+    waiters = [asyncio.ensure_future(single_flight.do("key", call)) for _ in range(2)]
+    cancelled_waiter.cancel()
+    results = await asyncio.gather(cancelled_waiter, *waiters, return_exceptions=True)
+    assert isinstance(results[0], asyncio.CancelledError)
+    assert all(isinstance(result, ValueError) for result in results[1:])
+
+
+async def test_http_client_coalesces_identical_requests(monkeypatch) -> None:
+    requests = []
+
+    async def handler(request: Request) -> Response:
+        requests.append(request)
+        await asyncio.sleep(0.01)
+        return Response(200, json={"authorization": request.headers.get("Authorization")})
+
+    patch_async_client(monkeypatch, handler)
+    http_client = create_http_client()
+    try:
+        responses = await asyncio.gather(
+            *(
+                http_client.send(Request("GET", "http://sellers/check", headers={"Authorization": f"Bearer {token}"}))
+                for token in ("a", "a", "a", "b")
+            )
+        )
+        assert [response.json()["authorization"] for response in responses] == ["Bearer a"] * 3 + ["Bearer b"]
+        assert len(requests) == 2
+
+        await asyncio.gather(*(http_client.send(Request("POST", "http://storages/", json=["1"])) for _ in range(2)))
+        assert len(requests) == 4
+        await asyncio.gather(
+            *(http_client.send(Request("POST", "http://storages/", json=["1"]), coalesce=True) for _ in range(2))
+        )
+        assert len(requests) == 5
+    finally:
+        await http_client.close()
+
+
+async def test_http_client_starts_with_http2() -> None:
+    http_client = create_http_client()
+    http_client.http2 = True
+    http_client.start()
+    try:
+        assert http_client._client is not None
+    finally:
+        await http_client.close()
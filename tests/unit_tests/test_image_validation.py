@@ -0,0 +1,58 @@
+import base64
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from app.core.config import settings
+from app.images import ImageValidationError, validate_image
+from app.schemas.castom_types import ImageBase64File
+from tests.utils import get_content, get_image
+
+
+def _save(image: Image.Image, image_format: str = "PNG", **params) -> bytes:
+    in_mem_image = BytesIO()
+    image.save(in_mem_image, format=image_format, **params)
+    return in_mem_image.getvalue()
+
+
+@pytest.mark.parametrize("image_format", ("jpeg", "png"))
+def test_validate_image_returns_header(image_format: str) -> None:
+    header = validate_image(get_image(image_format=image_format, size=10))
+    assert header.image_format == image_format.upper()
+    assert (header.width, header.height, header.frames) == (10, 10, 1)
+
+
+def test_validate_image_keeps_file_position() -> None:
+    file = BytesIO(get_image(size=10))
+    validate_image(file)
+    assert file.tell() == 0
+
+
+@pytest.mark.parametrize(
+    "image, err_msg",
+    (
+        (b"not an image at all", "unsupported image format"),
+        (get_image(image_format="gif", size=10), "unsupported image format"),
+        (get_image(size=10)[:20], "the image header is damaged"),
+        (_save(Image.new("1", (settings.image_settings.max_dimension + 1, 1))), "the image side must not exceed"),
+        (
+            _save(Image.new("RGB", (10, 10)), save_all=True, append_images=[Image.new("RGB", (10, 10), "red")]),
+            "frames",
+        ),
+    ),
+)
+def test_validate_image_raises_exc(image: bytes, err_msg: str) -> None:
+    with pytest.raises(ImageValidationError, match=err_msg):
+        validate_image(image)
+
+
+def test_validate_image_rejects_too_many_pixels(monkeypatch) -> None:
+    monkeypatch.setattr(settings.image_settings, "max_pixels", 99)
+    with pytest.raises(ImageValidationError, match="the image must not exceed 99 pixels"):
+        validate_image(get_image(size=10))
+
+
+def test_image_base64_file_rejects_unsupported_content() -> None:
+    with pytest.raises(ValueError, match="unsupported image format"):
+        ImageBase64File.validate(get_content(data=base64.b64encode(b"<svg></svg>" * 10).decode()), "handler")
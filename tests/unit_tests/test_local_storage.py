@@ -0,0 +1,93 @@
+from io import BytesIO
+
+import pytest
+
+from app.storage import LocalStorage, StorageRangeError
+from app.storage.backend import parse_byte_range
+
+BUCKET = "bucket"
+CONTENT = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def local_storage(tmp_path) -> LocalStorage:
+    return LocalStorage(root=str(tmp_path), url="http://storage")
+
+
+async def read_body(stored_file) -> bytes:
+    return b"".join([chunk async for chunk in stored_file.body])
+
+
+@pytest.mark.parametrize(
+    "byte_range, size, expected",
+    (
+        ("bytes=0-9", 100, (0, 9)),
+        ("bytes=90-", 100, (90, 99)),
+        ("bytes=90-1000", 100, (90, 99)),
+        ("bytes=-10", 100, (90, 99)),
+        ("bytes=-1000", 100, (0, 99)),
+    ),
+)
+def test_parse_byte_range(byte_range, size, expected) -> None:
+    assert parse_byte_range(byte_range, size) == expected
+
+
+@pytest.mark.parametrize("byte_range", ("bytes=100-", "bytes=10-5", "bytes=-0", "bytes=0-1,5-6", "items=0-1"))
+def test_parse_byte_range_raises(byte_range) -> None:
+    with pytest.raises(StorageRangeError):
+        parse_byte_range(byte_range, 100)
+
+
+async def test_put_and_read(local_storage: LocalStorage, tmp_path) -> None:
+    await local_storage.put(BUCKET, "temp/products/documents/document.pdf", BytesIO(CONTENT), public=False)
+    assert (tmp_path / BUCKET / "temp/products/documents/document.pdf").read_bytes() == CONTENT
+    assert await local_storage.read(BUCKET, "temp/products/documents/document.pdf") == CONTENT
+
+
+async def test_get_streams_in_chunks(local_storage: LocalStorage) -> None:
+    await local_storage.put(BUCKET, "temp/document.pdf", BytesIO(CONTENT), public=False)
+    stored_file = await local_storage.get(BUCKET, "temp/document.pdf", chunk_size=100)
+    chunks = [chunk async for chunk in stored_file.body]
+    assert b"".join(chunks) == CONTENT
+    assert [len(chunk) for chunk in chunks[:-1]] == [100] * (len(chunks) - 1)
+    assert stored_file.content_length == len(CONTENT)
+    assert stored_file.content_range is None
+
+
+async def test_get_range(local_storage: LocalStorage) -> None:
+    await local_storage.put(BUCKET, "temp/document.pdf", BytesIO(CONTENT), public=False)
+    stored_file = await local_storage.get(BUCKET, "temp/document.pdf", chunk_size=7, byte_range="bytes=10-49")
+    assert await read_body(stored_file) == CONTENT[10:50]
+    assert stored_file.content_length == 40
+    assert stored_file.content_range == f"bytes 10-49/{len(CONTENT)}"
+    with pytest.raises(StorageRangeError):
+        await local_storage.get(BUCKET, "temp/document.pdf", chunk_size=7, byte_range=f"bytes={len(CONTENT)}-")
+
+
+async def test_get_empty_file(local_storage: LocalStorage) -> None:
+    await local_storage.put(BUCKET, "temp/empty.pdf", BytesIO(), public=False)
+    stored_file = await local_storage.get(BUCKET, "temp/empty.pdf", chunk_size=7)
+    assert await read_body(stored_file) == b""
+    assert stored_file.content_length == 0
+
+
+async def test_delete_many_and_list_objects(local_storage: LocalStorage) -> None:
+    keys = ["temp/a.jpeg", "temp/b/c.jpeg", "other/d.jpeg"]
+    for key in keys:
+        await local_storage.put(BUCKET, key, BytesIO(CONTENT), public=True)
+    pages = [page async for page in local_storage.list_objects(BUCKET, "temp/")]
+    assert [stored_object.key for page in pages for stored_object in page] == ["temp/a.jpeg", "temp/b/c.jpeg"]
+    assert await local_storage.delete_many(BUCKET, ["temp/a.jpeg", "temp/missing.jpeg", "../escape"]) == {"../escape"}
+    pages = [page async for page in local_storage.list_objects(BUCKET, "")]
+    assert [stored_object.key for page in pages for stored_object in page] == ["other/d.jpeg", "temp/b/c.jpeg"]
+
+
+async def test_presign(local_storage: LocalStorage) -> None:
+    assert await local_storage.presign(BUCKET, "temp/a.pdf", 300) == "http://storage/bucket/temp/a.pdf"
+
+
+async def test_copy(local_storage: LocalStorage) -> None:
+    await local_storage.put(BUCKET, "temp/products/a.pdf", BytesIO(CONTENT), public=False)
+    await local_storage.copy(BUCKET, "temp/products/a.pdf", "products/a.pdf", public=False)
+    assert await local_storage.read(BUCKET, "products/a.pdf") == CONTENT
+    assert await local_storage.read(BUCKET, "temp/products/a.pdf") == CONTENT
@@ -0,0 +1,102 @@
+import asyncio
+import io
+import threading
+import time
+
+from app.core.config import immutable_cache_control, settings
+from app.storage import S3, get_s3, get_storage
+from tests.mocks import mock_s3_client
+
+
+def create_s3(executor_size: int = settings.s3_settings.executor_size) -> S3:
+    return S3(
+        max_pool_connections=settings.s3_settings.max_pool_connections,
+        executor_size=executor_size,
+        multipart_threshold=settings.s3_settings.multipart_threshold,
+        multipart_chunksize=settings.s3_settings.multipart_chunksize,
+        multipart_concurrency=settings.s3_settings.multipart_concurrency,
+    )
+
+
+def test_get_s3() -> None:
+    s3 = get_s3()
+    assert isinstance(s3, S3)
+    assert s3.max_pool_connections == settings.s3_settings.max_pool_connections
+    assert s3.executor_size == settings.s3_settings.executor_size
+    assert s3.transfer_config.multipart_threshold == settings.s3_settings.multipart_threshold
+    assert s3.transfer_config.multipart_chunksize == settings.s3_settings.multipart_chunksize
+    assert s3.transfer_config.max_concurrency == settings.s3_settings.multipart_concurrency
+
+
+def test_s3_client_is_created_once(monkeypatch) -> None:
+    calls = []
+
+    def counting_s3_client(*args, **kwargs):
+        calls.append(kwargs)
+        return mock_s3_client(*args, **kwargs)
+
+    monkeypatch.setattr("boto3.client", counting_s3_client)
+    s3 = create_s3()
+    try:
+        assert s3.client is s3.client
+        s3.start()
+        assert len(calls) == 1
+    finally:
+        s3.close()
+    assert s3._client is None
+    assert s3.executor is None
+    s3.client
+    s3.close()
+    assert len(calls) == 2
+
+
+def test_service_storage_is_shared_s3(get_service) -> None:
+    assert get_service.storage is get_storage() is get_s3()
+
+
+async def test_s3_run_uses_bounded_executor(patch_s3) -> None:
+    executor_size = 2
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def blocking_call() -> str:
+        nonlocal active, max_active
+        with lock:
+            active += 1
+            max_active = max(max_active, active)
+        time.sleep(0.01)
+        with lock:
+            active -= 1
+        return threading.current_thread().name
+
+    s3 = create_s3(executor_size)
+    try:
+        thread_names = await asyncio.gather(*(s3.run(blocking_call) for _ in range(6)))
+    finally:
+        s3.close()
+    assert max_active == executor_size
+    assert all(thread_name.startswith("s3") for thread_name in thread_names)
+
+
+async def test_s3_put_sets_object_headers(monkeypatch) -> None:
+    calls = []
+
+    class RecordingS3Client:
+        def upload_fileobj(self, fileobj, bucket, key, ExtraArgs, Config) -> None:
+            calls.append(ExtraArgs)
+
+        def close(self) -> None:
+            pass
+
+    monkeypatch.setattr("boto3.client", lambda *args, **kwargs: RecordingS3Client())
+    s3 = create_s3()
+    try:
+        await s3.put("bucket", "temp/a.webp", io.BytesIO(b"a"), True, "image/webp", immutable_cache_control)
+        await s3.put("bucket", "temp/b.pdf", io.BytesIO(b"b"), False)
+    finally:
+        s3.close()
+    assert calls == [
+        {"ACL": "public-read", "ContentType": "image/webp", "CacheControl": immutable_cache_control},
+        {"ACL": "private"},
+    ]
@@ -0,0 +1,130 @@
+import asyncio
+import json
+from time import time
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException, status
+from httpx import AsyncClient
+
+from app.cache import Cache, SellerProfileCache, get_seller_profile_cache
+from app.core.config import settings
+from app.main import app
+from tests.utils import reverse
+
+SELLER_ID = str(uuid4())
+SELLER_DATA = {"id": SELLER_ID, "brand_name": "Мир посуды", "legal_name": "ИП Иванов И.И.", "is_active": True}
+
+
+class FakeSellersService:
+    def __init__(self, delay: float = 0) -> None:
+        self.delay = delay
+        self.calls = 0
+        self.error: Exception | None = None
+        self.data = dict(SELLER_DATA)
+
+    async def fetch(self) -> dict:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return dict(self.data)
+
+
+@pytest.fixture
+def cache(get_test_redis) -> Cache:
+    return Cache(redis=get_test_redis)
+
+
+def create_seller_profile_cache(fresh_ttl: int = 300) -> SellerProfileCache:
+    return SellerProfileCache(fresh_ttl=fresh_ttl, ttl=3600, refresh_timeout=30)
+
+
+async def make_stale(cache: Cache) -> None:
+    entry = json.loads(await cache.get_value(f"seller_profile:{SELLER_ID}"))
+    entry["fetched_at"] = time() - 600
+    await cache.set_value(f"seller_profile:{SELLER_ID}", json.dumps(entry))
+
+
+async def wait_refresh(seller_profile_cache: SellerProfileCache) -> None:
+    await asyncio.gather(*seller_profile_cache.refresh_tasks.values())
+
+
+def test_get_seller_profile_cache() -> None:
+    seller_profile_cache = get_seller_profile_cache()
+    assert seller_profile_cache.fresh_ttl == settings.ecom_settings.seller_cache_fresh_ttl
+    assert seller_profile_cache.ttl == settings.ecom_settings.seller_cache_ttl
+    assert seller_profile_cache.refresh_timeout == settings.ecom_settings.seller_cache_refresh_timeout
+
+
+async def test_seller_profile_cache_is_shared_between_workers(cache: Cache, get_test_redis) -> None:
+    sellers_service = FakeSellersService()
+    assert await create_seller_profile_cache().get(cache, SELLER_ID, sellers_service.fetch) == SELLER_DATA
+    assert await get_test_redis.ttl(f"seller_profile:{SELLER_ID}") == 3600
+
+    assert await create_seller_profile_cache().get(cache, SELLER_ID, sellers_service.fetch) == SELLER_DATA
+    assert sellers_service.calls == 1
+
+
+async def test_seller_profile_cache_coalesces_concurrent_misses(cache: Cache) -> None:
+    sellers_service = FakeSellersService(delay=0.05)
+    seller_profile_cache = create_seller_profile_cache()
+    results = await asyncio.gather(
+        *(seller_profile_cache.get(cache, SELLER_ID, sellers_service.fetch) for _ in range(5))
+    )
+    assert results == [SELLER_DATA] * 5
+    assert sellers_service.calls == 1
+
+
+async def test_seller_profile_cache_serves_stale_and_refreshes_once(cache: Cache) -> None:
+    sellers_service = FakeSellersService()
+    seller_profile_cache = create_seller_profile_cache()
+    await seller_profile_cache.get(cache, SELLER_ID, sellers_service.fetch)
+    await make_stale(cache)
+    sellers_service.delay = 0.05
+    sellers_service.data["brand_name"] = "Новый бренд"
+
+    for _ in range(3):
+        assert await seller_profile_cache.get(cache, SELLER_ID, sellers_service.fetch) == SELLER_DATA
+    await wait_refresh(seller_profile_cache)
+    assert sellers_service.calls == 2
+    data = await seller_profile_cache.get(cache, SELLER_ID, sellers_service.fetch)
+    assert data["brand_name"] == "Новый бренд"
+
+
+async def test_seller_profile_cache_keeps_stale_when_refresh_fails(cache: Cache) -> None:
+    sellers_service = FakeSellersService()
+    seller_profile_cache = create_seller_profile_cache()
+    await seller_profile_cache.get(cache, SELLER_ID, sellers_service.fetch)
+    await make_stale(cache)
+    sellers_service.error = HTTPException(status_code=502)
+
+    assert await seller_profile_cache.get(cache, SELLER_ID, sellers_service.fetch) == SELLER_DATA
+    await wait_refresh(seller_profile_cache)
+    assert sellers_service.calls == 2
+    assert await seller_profile_cache.get(cache, SELLER_ID, sellers_service.fetch) == SELLER_DATA
+
+
+async def test_seller_profile_cache_invalidate(cache: Cache) -> None:
+    sellers_service = FakeSellersService()
+    seller_profile_cache = create_seller_profile_cache()
+    await seller_profile_cache.get(cache, SELLER_ID, sellers_service.fetch)
+
+    await seller_profile_cache.invalidate(cache, SELLER_ID)
+    await seller_profile_cache.get(cache, SELLER_ID, sellers_service.fetch)
+    assert sellers_service.calls == 2
+
+
+async def test_invalidate_seller_cache(
+    monkeypatch, cache: Cache, async_client_unauthorized: AsyncClient, get_test_redis
+) -> None:
+    seller_profile_cache = create_seller_profile_cache()
+    monkeypatch.setattr("app.api.v3.routers.seller_products.get_seller_profile_cache", lambda: seller_profile_cache)
+    await seller_profile_cache.get(cache, SELLER_ID, FakeSellersService().fetch)
+    url = reverse(app, "sellers:invalidate_cache").format(seller_id=SELLER_ID)
+
+    response = await async_client_unauthorized.delete(url)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    response = await async_client_unauthorized.delete(url, headers={"X-API-KEY": settings.app_settings.api_key})
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert await get_test_redis.get(f"seller_profile:{SELLER_ID}") is None
@@ -1,7 +1,10 @@
+import asyncio
+
 import pytest
 from fastapi import status
 from fastapi.exceptions import HTTPException
 
+from app.core.config import settings as app_settings
 from app.main import app
 from app.services.seller_products import Service
 from tests import mocks as m
@@ -17,9 +20,8 @@ async def test_get_response_from_external_service_raise_502_on_invalid_protocol(
 
 async def test_get_response_from_external_service_raise_502_on_unsuccessfull_status_code(
     get_service: Service,
-    monkeypatch,
+    patch_http_client,
 ) -> None:
-    monkeypatch.setattr("app.services.base.AsyncClient", m.MockAsyncClient)
     url = test_settings.test_service_dsn + reverse(app, "product:get_all")
     status_code = status.HTTP_403_FORBIDDEN
     expected_err_msg = f"Ошибка в получении данных от внешнего сервиса ({url}): status code {status_code}"
@@ -30,9 +32,8 @@ async def test_get_response_from_external_service_raise_502_on_unsuccessfull_sta
 
 async def test_get_response_from_external_service_returns_data(
     get_service: Service,
-    monkeypatch,
+    patch_http_client,
 ) -> None:
-    monkeypatch.setattr("app.services.base.AsyncClient", m.MockAsyncClient)
     url = test_settings.test_service_dsn + reverse(app, "product:get_all")
     status_code = status.HTTP_200_OK
     fake_data_from_external_service = {"product_id": str(m.UUID_ID), "storage_quantity": 10}
@@ -99,3 +100,77 @@ async def test_get_product_storage_quantity_returns_valid_data(get_service_depen
     service = m.MockServiceExternalData(*get_service_dependencies)
     service.fake_external_data = input_data
     assert await service._get_product_storage_quantity(product_id=m.UUID_ID) == expected
+
+
+async def test_gather_in_window_limits_concurrency(get_service: Service) -> None:
+    running = []
+    peak = []
+
+    async def job(number: int) -> int:
+        running.append(number)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(number)
+        return number
+
+    assert await get_service._gather_in_window([job(number) for number in range(6)], window=2) == list(range(6))
+    assert max(peak) == 2
+
+
+class SlowExternalDataService(m.MockServiceETL):
+    delay: float = 0.05
+    running: int = 0
+    peak: int = 0
+
+    async def _wait(self) -> None:
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(self.delay)
+        self.running -= 1
+
+    async def _get_seller_data(self, *args, **kwargs):
+        await self._wait()
+        return await super()._get_seller_data(*args, **kwargs)
+
+    async def _get_product_storage_quantity(self, *args, **kwargs):
+        await self._wait()
+        return await super()._get_product_storage_quantity(*args, **kwargs)
+
+
+async def test_create_product_info_for_ETL_calls_services_concurrently(get_service_dependencies, get_product) -> None:
+    service = SlowExternalDataService(*get_service_dependencies)
+    product_info = await service.create_product_info_for_ETL(product_in_db=get_product, user_token="user_token")
+    assert service.peak == 2
+    assert product_info["storage_quantity"] == 10
+    assert product_info["category"]["id"] == str(get_product.subcategory.category_id)
+
+
+async def test_create_product_info_for_ETL_cancels_other_call_on_error(get_service_dependencies, get_product) -> None:
+    class FailingSellerService(SlowExternalDataService):
+        cancelled: bool = False
+
+        async def _get_seller_data(self, *args, **kwargs):
+            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY)
+
+        async def _get_product_storage_quantity(self, *args, **kwargs):
+            try:
+                return await super()._get_product_storage_quantity(*args, **kwargs)
+            except asyncio.CancelledError:
+                self.cancelled = True
+                raise
+
+    service = FailingSellerService(*get_service_dependencies)
+    with pytest.raises(HTTPException) as exc_info:
+        await service.create_product_info_for_ETL(product_in_db=get_product, user_token="user_token")
+    check_exception_info(exc_info, expected_error_code=status.HTTP_502_BAD_GATEWAY)
+    assert service.cancelled
+
+
+async def test_create_product_info_for_ETL_raises_504_after_deadline(
+    monkeypatch, get_service_dependencies, get_product
+) -> None:
+    monkeypatch.setattr(app_settings.ecom_settings, "etl_deadline", 0.01)
+    service = SlowExternalDataService(*get_service_dependencies)
+    with pytest.raises(HTTPException) as exc_info:
+        await service.create_product_info_for_ETL(product_in_db=get_product, user_token="user_token")
+    check_exception_info(exc_info, expected_error_code=status.HTTP_504_GATEWAY_TIMEOUT)
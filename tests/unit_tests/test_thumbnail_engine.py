@@ -0,0 +1,94 @@
+from io import BytesIO
+
+from PIL import Image
+
+from app.core.config import image_encoding_profiles, image_sizes, image_webp_fields, settings
+from app.images import ThumbnailEngine, ThumbnailResult, get_thumbnail_engine
+from app.images.processing import create_thumbnails, create_variant, get_content_hash
+from tests.utils import get_image
+
+
+def test_get_thumbnail_engine() -> None:
+    engine = get_thumbnail_engine()
+    assert isinstance(engine, ThumbnailEngine)
+    assert engine.pool_size == settings.image_settings.pool_size
+    assert engine.queue_size == settings.image_settings.queue_size
+
+
+async def test_create_thumbnails_returns_all_sizes() -> None:
+    engine = ThumbnailEngine(pool_size=1, queue_size=1)
+    try:
+        result = await engine.create_thumbnails(get_image(size=100))
+    finally:
+        engine.shutdown()
+    assert isinstance(result, ThumbnailResult)
+    assert result.image_format == "JPEG"
+    assert result.thumbnails.keys() == {*image_sizes, *image_webp_fields.values()}
+    for size_title in image_sizes:
+        assert Image.open(BytesIO(result.thumbnails[size_title].content)).format == "JPEG"
+        assert Image.open(BytesIO(result.thumbnails[image_webp_fields[size_title]].content)).format == "WEBP"
+    assert result.process_time > 0
+    assert result.queue_wait_time >= 0
+
+
+def test_shutdown_without_start() -> None:
+    engine = ThumbnailEngine(pool_size=1, queue_size=1)
+    engine.shutdown()
+    assert engine.executor is None
+
+
+def _create_thumbnails(image: bytes) -> ThumbnailResult:
+    return create_thumbnails(image, image_sizes, image_encoding_profiles, image_webp_fields)
+
+
+def _get_size(result: ThumbnailResult, image_field: str) -> tuple[int, int]:
+    return Image.open(BytesIO(result.thumbnails[image_field].content)).size
+
+
+def test_create_thumbnails_sizes_are_not_cascaded() -> None:
+    result = _create_thumbnails(get_image(size=1000))
+    for size_title, size_value in image_sizes.items():
+        assert _get_size(result, size_title) == size_value
+        assert _get_size(result, image_webp_fields[size_title]) == size_value
+
+
+def test_create_thumbnails_does_not_upscale() -> None:
+    result = _create_thumbnails(get_image(size=100))
+    assert _get_size(result, "preview_url") == (100, 100)
+    assert _get_size(result, "small_url") == (100, 100)
+    assert _get_size(result, "mini_url") == (64, 64)
+
+
+def test_create_thumbnails_strips_exif_and_applies_orientation() -> None:
+    image = Image.new("RGB", (200, 100))
+    exif = image.getexif()
+    exif[0x0112] = 6  # Orientation: поворот на 90°
+    in_mem_image = BytesIO()
+    image.save(in_mem_image, format="JPEG", exif=exif)
+    result = _create_thumbnails(in_mem_image.getvalue())
+    thumbnail = Image.open(BytesIO(result.thumbnails["preview_url"].content))
+    assert thumbnail.size == (100, 200)
+    assert not thumbnail.getexif()
+
+
+def test_create_thumbnails_png_source() -> None:
+    result = _create_thumbnails(get_image(image_format="png", size=100))
+    assert result.image_format == "PNG"
+    assert result.thumbnails["mini_url"].image_format == "PNG"
+    assert result.thumbnails["mini_webp_url"].image_format == "WEBP"
+
+
+def test_get_content_hash_depends_on_image_and_profiles() -> None:
+    image = get_image(size=100)
+    engine = ThumbnailEngine(pool_size=1, queue_size=1)
+    assert engine.get_content_hash(image) == engine.get_content_hash(image)
+    assert engine.get_content_hash(image) != engine.get_content_hash(get_image(size=101))
+    assert get_content_hash(image, image_sizes) != get_content_hash(image, image_sizes | {"mini_url": (32, 32)})
+
+
+def test_create_variant_from_png_with_alpha_to_jpeg() -> None:
+    in_mem_image = BytesIO()
+    Image.new("RGBA", (400, 200)).save(in_mem_image, format="PNG")
+    thumbnail = create_variant(in_mem_image.getvalue(), (100, 100), "JPEG", {"quality": 80})
+    variant = Image.open(BytesIO(thumbnail.content))
+    assert (variant.format, variant.size) == ("JPEG", (100, 50))
@@ -0,0 +1,68 @@
+from uuid import uuid4
+
+import pytest
+
+from app.cache import Cache, TokenCache, get_token_cache
+from app.core.config import settings
+
+TOKEN = "seller-token"
+SELLER_ID = str(uuid4())
+
+
+def create_token_cache(local_ttl: int = 30, max_size: int = 10) -> TokenCache:
+    return TokenCache(ttl=300, local_ttl=local_ttl, max_size=max_size)
+
+
+@pytest.fixture
+def cache(get_test_redis) -> Cache:
+    return Cache(redis=get_test_redis)
+
+
+def test_get_token_cache() -> None:
+    token_cache = get_token_cache()
+    assert token_cache.ttl == settings.auth_settings.token_cache_ttl
+    assert token_cache.local_ttl == settings.auth_settings.token_cache_local_ttl
+    assert token_cache.max_size == settings.auth_settings.token_cache_size
+
+
+async def test_token_cache_is_shared_between_workers(cache: Cache, get_test_redis) -> None:
+    await create_token_cache().add(cache, TOKEN, SELLER_ID)
+    assert TOKEN.encode() not in b"".join(await get_test_redis.keys())
+
+    other_worker_cache = create_token_cache()
+    assert await other_worker_cache.get(cache, TOKEN) == SELLER_ID
+    await get_test_redis.flushall()
+    assert await other_worker_cache.get(cache, TOKEN) == SELLER_ID
+    assert await other_worker_cache.get(cache, "unknown-token") is None
+
+
+async def test_token_cache_local_tier_expires(cache: Cache, get_test_redis) -> None:
+    token_cache = create_token_cache(local_ttl=-1)
+    await token_cache.add(cache, TOKEN, SELLER_ID)
+    await get_test_redis.flushall()
+    assert await token_cache.get(cache, TOKEN) is None
+
+
+async def test_token_cache_local_tier_evicts_least_recently_used(cache: Cache, get_test_redis) -> None:
+    token_cache = create_token_cache(max_size=2)
+    for number in range(3):
+        await token_cache.add(cache, f"token-{number}", SELLER_ID)
+    await get_test_redis.flushall()
+    assert [await token_cache.get(cache, f"token-{number}") for number in range(3)] == [None, SELLER_ID, SELLER_ID]
+
+
+async def test_token_cache_revoke(cache: Cache) -> None:
+    token_cache = create_token_cache()
+    other_seller_id = str(uuid4())
+    await token_cache.add(cache, TOKEN, SELLER_ID)
+    await token_cache.add(cache, "other-token", SELLER_ID)
+    await token_cache.add(cache, "other-seller-token", other_seller_id)
+
+    await token_cache.revoke(cache, token=TOKEN)
+    assert await token_cache.get(cache, TOKEN) is None
+    assert await create_token_cache().get(cache, "other-token") == SELLER_ID
+
+    await token_cache.revoke(cache, seller_id=SELLER_ID)
+    assert await token_cache.get(cache, "other-token") is None
+    assert await create_token_cache().get(cache, "other-token") is None
+    assert await create_token_cache().get(cache, "other-seller-token") == other_seller_id
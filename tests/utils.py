@@ -1,5 +1,7 @@
 import base64
+import hmac
 import json
+from hashlib import sha256
 from http import HTTPStatus
 from pprint import pprint
 from typing import Any, Sequence, TypeAlias
@@ -339,3 +341,15 @@ async def is_db_populated(session: AsyncSession) -> bool:
     ):
         assert await crud.get_all(session, model), f"{model} is empty"
     return True
+
+
+def encode_jwt(claims: dict[str, Any], secret_key: str, algorithm: str = "HS256") -> str:
+    """Подписывает claims ключом secret_key (HMAC-SHA256)."""
+
+    def base64url_encode(data: bytes) -> str:
+        return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+    header = base64url_encode(json.dumps({"alg": algorithm, "typ": "JWT"}).encode())
+    payload = base64url_encode(json.dumps(claims).encode())
+    signature = hmac.new(secret_key.encode(), f"{header}.{payload}".encode(), sha256).digest()
+    return f"{header}.{payload}.{base64url_encode(signature)}"